@@ -0,0 +1,273 @@
+# risk_detection/camera_stream.py
+import os
+import cv2
+import numpy as np
+import sys
+import logging
+from collections import deque
+from supervision import BoxAnnotator, LabelAnnotator, ColorLookup
+from in_out.video_clip_writer import VideoClipWriter
+from in_out.frame_reader import FrameReader
+from utils.visualization import draw_hud
+from utils.frame_pool import FramePool
+from inference.pose_crops import PoseRegionPlanner
+from inference.tracking import MotionExtrapolator
+from inference.motion_gate import MotionGate
+from utils.overload_controller import SHED_VISUALIZATION, SHED_WRITE_OUTPUT, SHED_LOW_PRIORITY
+from risk_engine import RiskEngine
+from engine.frame_context import FrameContext
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+RISK_DICT = {
+    "extraccion_stickout": "Pie dentro del Radio de Giro",
+    "acople_pintubular": "Persona entre la llaveTM120 y Tubular",
+    "cabron_abierto": "Persona cerca al Cabron Abierto",
+    "pickup_tubular": "Manos en el Elevador/Brazotaladro",
+    "tubular_pendulando": "Golpe por Tubular Pendulado",
+    "zona_riesgo_pickup_tubular": "Golpe por Pickup Tubular",
+    "acople_pintubular_mano_safata": "Atrapamiento por mano en la safata"
+}
+
+
+def hud_lines(results, labels=None):
+    """Líneas del HUD por escena: estado de la escena y, solo si hay riesgo, su texto (etiqueta de la regla o RISK_DICT)."""
+    labels = labels or {}
+    return [
+        f"Escena {k}: {'SI' if v['scene'] else 'NO'} | Riesgo: {(labels.get(k) or RISK_DICT.get(k, k)) if v['risk'] else 'NO'}"
+        for k, v in results.items()
+    ]
+
+
+class CameraStream:
+    """
+    Estado propio de una cámara: fuente de video, motor de escenas (con sus polígonos),
+    búfer de pre-roll, grabador de clips y salida de video.
+    Los modelos, la BBDD y la baliza se comparten entre cámaras.
+    """
+
+    def __init__(self, cfg, multi_camera=False):
+        self.cfg = cfg
+        self.camera_id = cfg.CAMERA_ID
+        self.multi_camera = multi_camera
+        self.engine = RiskEngine(cfg)
+        self.reader = None
+        self.clip_writer = None
+        self.video_writer = None
+        self.pre_roll_buffer = deque()
+        self.frame_pool = None
+        self.canvas = None
+        self.pose_planner = None
+        self.motion = None
+        self.motion_gate = None
+        self.last_detections = None   # Últimas detecciones de los modelos (puerta de movimiento)
+        self.pose_ran = True          # Si en ellas corrió la pose (con LAZY_POSE puede no haber corrido)
+        self.pose_reused = False      # Si se les dio la pose anterior (sobrecarga: SHED_POSE_RATE)
+        self.context = None           # FrameContext del último frame procesado
+        self._frame = None            # Frame de salida del frame en curso (entre begin() y finish())
+        self.previous_risk_states = {}
+        self.window_name = f"RiskEngine {self.camera_id}" if multi_camera else "RiskEngine"
+
+    # -------------------------
+    # Inicialización
+    # -------------------------
+    def setup(self):
+        self._setup_clip_writer()
+        self._setup_video_capture()
+
+    def _setup_clip_writer(self):
+        if self.cfg.CLIP_ENABLED:
+            self.clip_writer = VideoClipWriter(self.cfg)
+            self.clip_writer.start_controller()
+
+    def _setup_video_capture(self):
+        logger.info(f"📹 [{self.camera_id}] Conectando a video fuente: {self.cfg.VIDEO_SOURCE}")
+        self.reader = FrameReader(self.cfg.VIDEO_SOURCE, threaded=self.cfg.CAPTURE_THREADED, clock=self.cfg.FRAME_CLOCK)
+        try:
+            self.reader.open()
+        except RuntimeError:
+            logger.error(f"❌ [{self.camera_id}] No se pudo abrir la fuente: {self.cfg.VIDEO_SOURCE}")
+            raise
+        self.reader.start_controller()
+
+        if self.cfg.NATIVE_RESOLUTION and all(self.reader.frame_size):
+            # Zonas y umbrales se escalan una sola vez a la resolución nativa; no hay resize por frame
+            self.cfg.apply_resolution(*self.reader.frame_size)
+            logger.info(f"📐 [{self.camera_id}] Resolución nativa de trabajo: {self.cfg.RESIZE[0]}x{self.cfg.RESIZE[1]}")
+
+        self.setup_buffers(self.reader.fps)
+
+    def setup_buffers(self, fps, pre_roll=True):
+        """
+        Crea el pre-roll, el pool de frames, el lienzo y la salida de video para un FPS dado.
+        Con pre_roll=False (pipeline multi-proceso) el pre-roll vive en el proceso de I/O.
+        """
+        pre_roll_size = int(fps * self.cfg.CLIP_PREROLL_SEC) if (self.cfg.CLIP_ENABLED and pre_roll) else 0
+        self._release_pre_roll()
+        self.pre_roll_buffer = deque(maxlen=pre_roll_size)
+        logger.info(f"📹 [{self.camera_id}] FPS: {fps:.2f} | Buffer pre-roll: {pre_roll_size} frames")
+
+        # Pool de frames: pre-roll + cola del grabador de clips + frames en vuelo
+        width, height = self.cfg.RESIZE
+        pool_size = pre_roll_size + (VideoClipWriter.FRAME_QUEUE_SIZE if pre_roll else 0) + self.cfg.FRAME_POOL_MARGIN
+        self.frame_pool = FramePool(pool_size, (height, width, 3))
+        self.canvas = np.empty((height, width, 3), dtype=np.uint8) if self.cfg.VISUALIZE else None
+        # Las zonas ya están en píxeles de la resolución de trabajo
+        self.pose_planner = PoseRegionPlanner(self.cfg)
+        self.motion = MotionExtrapolator(self.cfg.RESIZE)
+        self.motion_gate = MotionGate(self.cfg)
+        self.last_detections = None
+
+        if self.cfg.WRITE_OUTPUT:
+            output_path = self.cfg.OUTPUT_PATH
+            if self.multi_camera:
+                root, ext = os.path.splitext(output_path)
+                output_path = f"{root}_{self.camera_id}{ext}"
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            self.video_writer = cv2.VideoWriter(output_path, fourcc, fps, self.cfg.RESIZE)
+            logger.info(f"💾 [{self.camera_id}] Grabación activada → {output_path}")
+
+    # -------------------------
+    # Procesamiento por frame
+    # -------------------------
+    def load_frame(self, frame, ts=None):
+        """
+        Lleva el frame capturado a un slot del pool: si ya está en la resolución de trabajo
+        solo se copia; si no, se redimensiona directamente dentro del slot.
+        'ts': timestamp del frame (captura o video), que viaja con el slot hasta el motor.
+        """
+        slot = self.frame_pool.acquire()
+        slot.ts = ts
+        if frame.shape == slot.array.shape:
+            np.copyto(slot.array, frame)
+        else:
+            cv2.resize(frame, self.cfg.RESIZE, dst=slot.array)
+        return slot
+
+    def needs_inference(self, frame):
+        """
+        False si la puerta de movimiento permite reutilizar las últimas detecciones: nada cambió
+        en las zonas y, si ahora alguna escena pide keypoints, la pose ya corrió en ellas.
+        """
+        changed = self.motion_gate.changed(frame)
+        if changed or self.last_detections is None:
+            return True
+        return not self.pose_ran and self.engine.needs_pose(self.last_detections["objects"])
+
+    def process(self, slot, detections, db_logger, fps=None, shed=frozenset()):
+        """
+        Evalúa las escenas con las detecciones ya calculadas para este frame.
+        El slot queda limpio (se comparte con el pre-roll y los clips); las anotaciones
+        se dibujan sobre un lienzo preasignado solo si hay visualización.
+        'shed': pasos recortados por sobrecarga (utils/overload_controller.py).
+        Devuelve (hay_riesgo, frame_de_salida).
+        """
+        ctx, frame = self.begin(slot, detections, shed)
+        results = self.engine.evaluate(ctx, frame, throttle_low=SHED_LOW_PRIORITY in shed, ts=slot.ts)
+        return self.finish(results, db_logger, fps, shed)
+
+    def begin(self, slot, detections, shed=frozenset()):
+        """
+        Primera mitad de process(): pre-roll/clip, lienzo y FrameContext del frame.
+        Devuelve (ctx, frame_para_el_motor) para evaluar las escenas (de varias cámaras a la
+        vez con RiskEngine.evaluate_many) y luego llamar a finish().
+        """
+        if self.cfg.CLIP_ENABLED:
+            self._push_pre_roll(slot)
+            self.clip_writer.put_frame(slot)
+
+        visualize = self.cfg.VISUALIZE and SHED_VISUALIZATION not in shed
+        self._frame = slot.array
+        if visualize:
+            np.copyto(self.canvas, slot.array)
+            self._frame = self.canvas
+
+        self.context = FrameContext(detections["objects"], detections["pose"])
+        return self.context, self._frame if visualize else None
+
+    def finish(self, results, db_logger, fps=None, shed=frozenset()):
+        """Segunda mitad de process(): eventos y clips, HUD y video de salida. Devuelve (hay_riesgo, frame_de_salida)."""
+        frame = self._frame
+        any_risk = self._handle_risks(results, db_logger)
+        if self.cfg.VISUALIZE and SHED_VISUALIZATION not in shed:
+            self._visualize(frame, self.context, results, fps)
+
+        if self.video_writer and SHED_WRITE_OUTPUT not in shed:
+            self.video_writer.write(frame)
+        return any_risk, frame
+
+    def _push_pre_roll(self, slot):
+        if self.pre_roll_buffer.maxlen == 0:
+            return
+        if len(self.pre_roll_buffer) == self.pre_roll_buffer.maxlen:
+            self.pre_roll_buffer.popleft().release()
+        self.pre_roll_buffer.append(slot.retain())
+
+    def _release_pre_roll(self):
+        while self.pre_roll_buffer:
+            self.pre_roll_buffer.popleft().release()
+
+    def _handle_risks(self, results, db_logger):
+        any_risk = False # Bandera para la Baliza
+        for scene, data in results.items():
+            current = data["risk"]
+            prev = self.previous_risk_states.get(scene, False)
+
+            video_file_name = None
+
+            # Lógica para el Grabador de Clips
+            if self.cfg.CLIP_ENABLED:
+                # Transición: De NO RIESGO a RIESGO
+                if current and not prev:
+                    ts_str = data["time"].replace(":", "-").replace(".", "_")
+                    prefix = f"{self.camera_id}_" if self.multi_camera else ""
+                    video_file_name = f"{prefix}{scene}_{ts_str}.mp4"
+                    logger.info(f"🎬 [Clip] [{self.camera_id}] Comando START enviado para: {scene}")
+                    self.clip_writer.start_clip(scene, list(self.pre_roll_buffer), video_file_name)
+                # Transición: De RIESGO a NO RIESGO
+                elif not current and prev:
+                    logger.info(f"🎬 [Clip] [{self.camera_id}] Comando STOP enviado para: {scene}")
+                    self.clip_writer.stop_clip(scene)
+
+            # Actualizar el estado anterior
+            self.previous_risk_states[scene] = current
+            if current:
+                any_risk = True
+                db_logger.log_event(
+                    scene_name=scene,
+                    ts=data["time"],
+                    scene_active=data["scene"],
+                    risk_active=data["risk"],
+                    video_file=video_file_name,
+                    camera_id=self.camera_id
+                )
+        return any_risk
+
+    # -------------------------
+    # Visualización
+    # -------------------------
+    def _visualize(self, frame, ctx, results, fps):
+        if not self.cfg.VISUALIZE:
+            return
+
+        box_annot = BoxAnnotator(thickness=1, color_lookup=ColorLookup.INDEX)
+        lab_annot = LabelAnnotator(color_lookup=ColorLookup.INDEX, text_padding=3, text_scale=0.35, text_thickness=0, smart_position=True)
+
+        frame = box_annot.annotate(scene=frame, detections=ctx.det_obj)
+        frame = lab_annot.annotate(scene=frame, detections=ctx.det_obj, labels=ctx.class_names.tolist())
+
+        draw_hud(frame, fps, hud_lines(results, self.engine.labels), ctx.keypoints)
+
+    # -------------------------
+    # Limpieza
+    # -------------------------
+    def cleanup(self):
+        if self.clip_writer: self.clip_writer.stop()
+        self._release_pre_roll()
+        if self.reader: self.reader.stop_controller()
+        if self.video_writer: self.video_writer.release()
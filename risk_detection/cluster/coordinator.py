@@ -0,0 +1,191 @@
+# risk_detection/cluster/coordinator.py
+"""
+Coordinador de cámaras para varios nodos de detección.
+
+Los workers se reportan periódicamente (POST /heartbeat) con su capacidad en FPS y
+el rendimiento medido; el coordinador les responde con las cámaras que deben atender.
+Cada cámara cuesta su FPS objetivo y se asigna al nodo vivo con más holgura
+(capacidad - carga). Si un nodo deja de reportarse durante NODE_TIMEOUT_SEC sus
+cámaras se reasignan. Las cámaras que ya están corriendo solo se mueven si su nodo
+está sobrecargado y otro nodo puede recibirlas sin sobrecargarse (mover una cámara
+reinicia el estado de sus escenas).
+
+Uso (desde risk_detection/):
+    python -m cluster.coordinator --cameras ../config_data/cameras.json --port 8765
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from config import Config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+
+class NodeState:
+    """Último reporte de un worker."""
+
+    def __init__(self, node_id, capacity_fps):
+        self.node_id = node_id
+        self.capacity_fps = capacity_fps
+        self.processed_fps = 0.0
+        self.last_seen = time.monotonic()
+        self.cameras = []
+
+    def to_dict(self, demand):
+        load = sum(demand[c] for c in self.cameras)
+        return {
+            "capacity_fps": round(self.capacity_fps, 2),
+            "processed_fps": round(self.processed_fps, 2),
+            "load_fps": round(load, 2),
+            "headroom_fps": round(self.capacity_fps - load, 2),
+            "cameras": list(self.cameras),
+            "last_seen_sec": round(time.monotonic() - self.last_seen, 1),
+        }
+
+
+class Coordinator:
+    """Registro de nodos y asignación de cámaras por holgura de FPS."""
+
+    def __init__(self, cameras, node_timeout_sec=15.0, default_camera_fps=15.0):
+        # cameras: lista de dicts de CAMERAS_FILE; 'fps' opcional = FPS objetivo de la cámara
+        self.demand = {c["camera_id"]: float(c.get("fps", default_camera_fps)) for c in cameras}
+        self.node_timeout_sec = node_timeout_sec
+        self.nodes = {}
+        self.lock = threading.Lock()
+
+    # -------------------------
+    # Reportes de los workers
+    # -------------------------
+    def heartbeat(self, node_id, capacity_fps, processed_fps=0.0):
+        """Registra el reporte del nodo y devuelve su lista de cámaras asignadas."""
+        with self.lock:
+            node = self.nodes.get(node_id)
+            if node is None:
+                node = self.nodes[node_id] = NodeState(node_id, capacity_fps)
+                logger.info(f"🟢 [Coordinador] Nodo registrado: {node_id} ({capacity_fps:.1f} FPS)")
+            node.capacity_fps = float(capacity_fps)
+            node.processed_fps = float(processed_fps)
+            node.last_seen = time.monotonic()
+            self._expire_nodes()
+            self._assign_unassigned()
+            self._rebalance_overloaded()
+            return list(node.cameras)
+
+    def _expire_nodes(self):
+        now = time.monotonic()
+        for node_id in [n for n, s in self.nodes.items() if now - s.last_seen > self.node_timeout_sec]:
+            orphaned = self.nodes.pop(node_id).cameras
+            logger.warning(f"🔴 [Coordinador] Nodo {node_id} sin reporte. Reasignando cámaras: {orphaned}")
+
+    def _assign_unassigned(self):
+        assigned = {c for node in self.nodes.values() for c in node.cameras}
+        pending = sorted((c for c in self.demand if c not in assigned), key=lambda c: -self.demand[c])
+        for cam_id in pending:
+            # Nodo con más holgura; si ninguno tiene holgura suficiente, igual se asigna al de más holgura
+            node = max(self.nodes.values(), key=self._headroom, default=None)
+            if node is None:
+                return
+            if self._headroom(node) < self.demand[cam_id]:
+                logger.warning(f"🟡 [Coordinador] Sin holgura suficiente para {cam_id} ({self.demand[cam_id]:.1f} FPS). Asignada a {node.node_id} de todas formas.")
+            node.cameras.append(cam_id)
+            logger.info(f"📹 [Coordinador] {cam_id} → {node.node_id}")
+
+    def _headroom(self, node):
+        return node.capacity_fps - sum(self.demand[c] for c in node.cameras)
+
+    def _rebalance_overloaded(self):
+        for node in list(self.nodes.values()):
+            while self._headroom(node) < 0 and len(node.cameras) > 1:
+                cam_id = node.cameras[-1]
+                target = max((n for n in self.nodes.values() if n is not node), key=self._headroom, default=None)
+                if target is None or self._headroom(target) < self.demand[cam_id]:
+                    break
+                node.cameras.pop()
+                target.cameras.append(cam_id)
+                logger.info(f"♻️ [Coordinador] {cam_id}: {node.node_id} (sobrecargado) → {target.node_id}")
+
+    def status(self):
+        with self.lock:
+            self._expire_nodes()
+            self._assign_unassigned()
+            self._rebalance_overloaded()
+            assigned = {c for node in self.nodes.values() for c in node.cameras}
+            return {
+                "nodes": {n: s.to_dict(self.demand) for n, s in self.nodes.items()},
+                "unassigned": [c for c in self.demand if c not in assigned],
+            }
+
+
+def make_handler(coordinator):
+    class CoordinatorHandler(BaseHTTPRequestHandler):
+        def _send_json(self, code, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != "/heartbeat":
+                return self._send_json(404, {"error": "not found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                report = json.loads(self.rfile.read(length) or b"{}")
+                cameras = coordinator.heartbeat(report["node_id"], report["capacity_fps"], report.get("processed_fps", 0.0))
+            except (KeyError, ValueError) as e:
+                return self._send_json(400, {"error": f"reporte inválido: {e}"})
+            self._send_json(200, {"cameras": cameras})
+
+        def do_GET(self):
+            if self.path != "/status":
+                return self._send_json(404, {"error": "not found"})
+            self._send_json(200, coordinator.status())
+
+        def log_message(self, format, *args):
+            pass  # Los heartbeats inundarían el log
+
+    return CoordinatorHandler
+
+
+def serve(coordinator, host="0.0.0.0", port=8765):
+    server = ThreadingHTTPServer((host, port), make_handler(coordinator))
+    logger.info(f"🚀 [Coordinador] Escuchando en {host}:{port} ({len(coordinator.demand)} cámaras)")
+    return server
+
+
+def main():
+    cfg = Config()
+    parser = argparse.ArgumentParser(description="Coordinador de cámaras entre nodos de detección.")
+    parser.add_argument("--cameras", default=cfg.CAMERAS_FILE, help="JSON de cámaras (por defecto CAMERAS_FILE).")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=cfg.COORDINATOR_PORT)
+    args = parser.parse_args()
+    if not args.cameras:
+        parser.error("Se requiere --cameras o CAMERAS_FILE")
+
+    with open(args.cameras, "r", encoding="utf-8") as f:
+        cameras = json.load(f)["cameras"]
+    coordinator = Coordinator(cameras, node_timeout_sec=cfg.NODE_TIMEOUT_SEC, default_camera_fps=cfg.DEFAULT_CAMERA_FPS)
+    server = serve(coordinator, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.warning("🛑 [Coordinador] Deteniendo...")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# risk_detection/cluster/worker.py
+"""
+Nodo worker del clúster de detección.
+
+Se reporta al coordinador cada HEARTBEAT_SEC con su capacidad y el rendimiento
+medido, y ejecuta un RiskDetectionApp con las cámaras que el coordinador le asigna
+(filtradas de CAMERAS_FILE). Cuando la asignación cambia, reinicia el app con la
+nueva lista reutilizando los modelos ya cargados. Los eventos se escriben en el
+almacén compartido RESULT_STORE_PATH.
+
+Uso (desde risk_detection/):
+    NODE_ID=nodo-a COORDINATOR_URL=http://10.0.0.5:8765 CAMERAS_FILE=../config_data/cameras.json \\
+    RESULT_STORE_PATH=/mnt/compartido/registros_riesgos.db python -m cluster.worker
+"""
+import sys
+import copy
+import json
+import time
+import signal
+import logging
+import threading
+import urllib.request
+import urllib.error
+
+from config import Config
+from inference.model_runner import ModelRunner
+from main_realtime import RiskDetectionApp
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+
+class WorkerNode:
+    def __init__(self, cfg: Config):
+        if not cfg.COORDINATOR_URL or not cfg.CAMERAS_FILE:
+            raise ValueError("El modo worker requiere COORDINATOR_URL y CAMERAS_FILE")
+        self.cfg = cfg
+        self.node_id = cfg.NODE_ID
+        self.keep_running = True
+        self.assigned = None          # None = aún sin respuesta del coordinador
+        self.reassigned = threading.Event()
+        self.runner = ModelRunner(cfg)
+        self.app = None
+        self.thread = threading.Thread(target=self._heartbeat_worker, daemon=True)
+
+    # -------------------------
+    # Reporte al coordinador
+    # -------------------------
+    def _report(self):
+        """Capacidad declarada, salvo que el nodo no alcance el FPS de sus fuentes: entonces la medida."""
+        capacity = self.cfg.NODE_CAPACITY_FPS
+        processed = 0.0
+        app = self.app
+        if app is not None and app.fps_smoothed and app.cameras:
+            processed = app.fps_smoothed * len(app.cameras)
+            demand = sum(cam.reader.fps for cam in app.cameras if cam.reader)
+            if demand and processed < 0.9 * demand:
+                capacity = processed  # Saturado: lo que procesa es su capacidad real
+        return {"node_id": self.node_id, "capacity_fps": capacity, "processed_fps": processed}
+
+    def _heartbeat(self):
+        body = json.dumps(self._report()).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.cfg.COORDINATOR_URL.rstrip('/')}/heartbeat", data=body,
+            headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.cfg.HEARTBEAT_SEC) as response:
+            return sorted(json.loads(response.read())["cameras"])
+
+    def _heartbeat_worker(self):
+        while self.keep_running:
+            try:
+                cameras = self._heartbeat()
+                if cameras != self.assigned:
+                    logger.info(f"📹 [Worker {self.node_id}] Nueva asignación: {cameras}")
+                    self.assigned = cameras
+                    self.reassigned.set()
+                    if self.app is not None:
+                        self.app.keep_running = False  # El bucle principal reinicia con la nueva lista
+            except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+                # Sin coordinador se siguen atendiendo las cámaras actuales
+                logger.warning(f"⚠️ [Worker {self.node_id}] Coordinador no disponible: {e}")
+            time.sleep(self.cfg.HEARTBEAT_SEC)
+
+    # -------------------------
+    # Bucle principal
+    # -------------------------
+    def graceful_shutdown(self, signum, frame):
+        logger.warning(f"🛑 [Worker {self.node_id}] Señal de apagado recibida.")
+        self.keep_running = False
+        if self.app is not None:
+            self.app.keep_running = False
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.graceful_shutdown)
+        signal.signal(signal.SIGTERM, self.graceful_shutdown)
+        self.thread.start()
+
+        while self.keep_running:
+            if not self.assigned:
+                self.reassigned.wait(timeout=self.cfg.HEARTBEAT_SEC)
+                self.reassigned.clear()
+                continue
+            self.reassigned.clear()
+            node_cfg = copy.copy(self.cfg)
+            node_cfg.ASSIGNED_CAMERAS = list(self.assigned)
+            self.app = RiskDetectionApp(node_cfg)
+            self.app.runner = self.runner  # Los modelos se cargan una sola vez por nodo
+            try:
+                self.app.setup()
+                self.app.run()
+            except Exception as e:
+                logger.exception(f"❌ [Worker {self.node_id}] Error en ejecución: {e}")
+                time.sleep(5)
+            finally:
+                # RiskDetectionApp.run() instala sus manejadores; se recuperan los del worker
+                signal.signal(signal.SIGINT, self.graceful_shutdown)
+                signal.signal(signal.SIGTERM, self.graceful_shutdown)
+                # La próxima asignación arma otra app: sus escenas no deben acumularse en el banco del proceso
+                self.app.release_scenes()
+            if not self.reassigned.is_set() and not self.app.keep_running:
+                self.keep_running = False  # Se detuvo por señal o tecla 'q', no por reasignación
+        self.runner.stop()
+        logger.info(f"✅ [Worker {self.node_id}] Finalizado.")
+
+
+def main():
+    cfg = Config()
+    cfg.apply_thread_settings()
+    WorkerNode(cfg).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
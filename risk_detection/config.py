@@ -1,10 +1,22 @@
 # risk_detection/config.py
 import numpy as np
 import torch
+import cv2
 import os
+import copy
+import json
 from dotenv import load_dotenv
 load_dotenv()
 
+
+def _parse_resolution(value):
+    """'1152x648' → (1152, 648); 'native' → None (se usa la resolución nativa del stream)."""
+    if value is None or value.strip().lower() == "native":
+        return None
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
 class Config:
     #---------------------------------------------------------------------------------- Modelos -----------------------------------------------------------------------------------
 
@@ -31,8 +43,111 @@ class Config:
     # VIDEO_SOURCE = "risk_detection/videos/ch0005_20250522T133145Z_20250522T142433Z_X00010000867000000-00.23.05.353-00.24.22.387-seg07-merged-1761015701433.mp4"
 
     VIDEO_SOURCE = os.getenv("RTSP_URL")
+    CAMERA_ID = os.environ.get("CAMERA_ID", "cam01")
+
+    # Modo multi-cámara: JSON con la lista de cámaras (id, fuente y polígonos/umbrales propios).
+    # Si no se define, el proceso atiende solo VIDEO_SOURCE.
+    CAMERAS_FILE = os.environ.get("CAMERAS_FILE")
+
+    # Captura en hilo separado con búfer de "último frame" (evita juzgar frames atrasados)
+    CAPTURE_THREADED = True if os.environ.get("CAPTURE_THREADED", "True") == "True" else False
+    CAPTURE_READ_TIMEOUT = 5.0        # Segundos máx. esperando un frame nuevo antes de reiniciar
+    # Reloj del motor (ventanas de escena y hora de los eventos): "capture" (hora de captura de cada
+    # frame) o "video" (inicio + PTS del video, para reprocesar grabaciones más rápido que en vivo)
+    FRAME_CLOCK = os.environ.get("FRAME_CLOCK", "capture")
+    CAPTURE_STATS_EVERY_SEC = 60      # Cada cuántos segundos se registran las métricas de captura
+
+    # Topología: "thread" (un proceso) o "multiprocess" (captura, inferencia, motor e I/O en procesos
+    # separados; los frames viajan por un anillo de memoria compartida)
+    PIPELINE_MODE = os.environ.get("PIPELINE_MODE", "thread")
+    SHM_RING_SLOTS = 16               # Frames por cámara en el anillo de memoria compartida
+    PIPELINE_QUEUE_SIZE = 2           # Frames pendientes por cámara entre captura→inferencia→motor
+    IO_QUEUE_SIZE = 512               # Mensajes pendientes hacia el proceso de I/O (frames de clips y eventos)
 
-    RESIZE = (1152, 648)
+    # Clúster: un coordinador reparte las cámaras de CAMERAS_FILE entre nodos según su holgura de FPS.
+    # Todos los nodos escriben en un almacén de resultados compartido (SQLite en un volumen común).
+    NODE_ID = os.environ.get("NODE_ID", os.environ.get("HOSTNAME", "node01"))
+    COORDINATOR_URL = os.environ.get("COORDINATOR_URL")              # p. ej. http://10.0.0.5:8765
+    COORDINATOR_PORT = int(os.environ.get("COORDINATOR_PORT", 8765))
+    NODE_CAPACITY_FPS = float(os.environ.get("NODE_CAPACITY_FPS", 30.0))  # FPS totales que el nodo puede procesar
+    DEFAULT_CAMERA_FPS = 15.0         # FPS objetivo de una cámara sin 'fps' en CAMERAS_FILE
+    HEARTBEAT_SEC = 5.0               # Cada cuánto se reporta el nodo al coordinador
+    NODE_TIMEOUT_SEC = 15.0           # Sin reporte durante este tiempo, el nodo se da por caído
+    RESULT_STORE_PATH = os.environ.get("RESULT_STORE_PATH")          # Almacén compartido (si no, LOG_DIR/registros_riesgos.db)
+    ASSIGNED_CAMERAS = None           # Ids asignados por el coordinador (None = todas las de CAMERAS_FILE)
+
+    # Resolución de trabajo (zonas, umbrales y entrada a los modelos). "native" evita el resize por frame.
+    RESIZE = _parse_resolution(os.environ.get("INFERENCE_RESOLUTION", "1152x648"))
+    CALIBRATION_RESOLUTION = (1152, 648)   # Resolución en la que se calibraron zonas y umbrales
+    MODEL_IMGSZ = int(os.environ.get("MODEL_IMGSZ", 640))  # Tamaño de entrada (letterbox) de los modelos
+    FRAME_POOL_MARGIN = 8             # Slots extra del pool de frames (frames en vuelo por cámara)
+    # Ejecución de los modelos: "sequential" (uno tras otro), "thread" (ambos a la vez en hilos)
+    # o "process" (cada modelo en su proceso con su propio presupuesto de hilos intra-op)
+    INFERENCE_EXECUTOR = os.environ.get("INFERENCE_EXECUTOR", "sequential")
+    INFERENCE_THREADS_OBJ = int(os.environ.get("INFERENCE_THREADS_OBJ", 0))    # Hilos intra-op del modelo de objetos (0 = por defecto)
+    INFERENCE_THREADS_POSE = int(os.environ.get("INFERENCE_THREADS_POSE", 0))  # Hilos intra-op del modelo de pose (0 = por defecto)
+    TORCH_INTEROP_THREADS = int(os.environ.get("TORCH_INTEROP_THREADS", 0))  # Hilos inter-op de torch (0 = por defecto)
+    CV2_THREADS = int(os.environ.get("CV2_THREADS", -1))                     # Hilos de OpenCV (-1 = por defecto)
+    # Perfil del equipo generado por tools/autotune.py; sus valores reemplazan los de esta clase
+    # salvo los definidos explícitamente por variable de entorno
+    HOST_PROFILE = os.environ.get("HOST_PROFILE", "host_profile.json")
+    # Backend de los modelos: "torch" (ultralytics/PyTorch) u "onnx" (ONNX Runtime en CPU; los .pt se
+    # exportan una vez a ONNX_CACHE_DIR, por defecto una carpeta 'onnx' junto a los pesos)
+    INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch")
+    ONNX_CACHE_DIR = os.environ.get("ONNX_CACHE_DIR")
+    # Precisión de los modelos ONNX: "fp32" o "int8" (variantes de tools/quantize_models.py; ver su reporte antes de activar)
+    MODEL_PRECISION = os.environ.get("MODEL_PRECISION", "fp32")
+    # Pose perezosa: el modelo de pose solo corre en los frames donde alguna escena declara necesitarla
+    LAZY_POSE = True if os.environ.get("LAZY_POSE", "True") == "True" else False
+    # Pose por recortes: "full" (frame completo), "zones" (unión de zonas y equipos + margen)
+    # o "persons" (un recorte por persona a POSE_CROP_IMGSZ; ver inference/pose_crops.py)
+    POSE_CROP_MODE = os.environ.get("POSE_CROP_MODE", "full")
+    POSE_CROP_IMGSZ = int(os.environ.get("POSE_CROP_IMGSZ", 256))  # Entrada de la pose por recorte de persona
+    POSE_PERSON_CLASS = os.environ.get("POSE_PERSON_CLASS")         # Clase del detector para personas (si existe)
+    POSE_CROP_MARGIN_NORM = 40 / 1152   # Margen del recorte de zonas (40 px a 1152)
+    POSE_CROP_MARGIN_RATIO = 0.3        # Margen del recorte de persona, relativo a su caja
+    POSE_FULL_EVERY = 15                # Frames entre poses de frame completo (descubrir personas nuevas)
+    # ROI del detector: el modelo de objetos solo ve la zona de trabajo (más resolución efectiva
+    # a igual MODEL_IMGSZ). Por defecto, la unión de los polígonos de riesgo más un margen;
+    # DETECTOR_ROI_NORM = [x1, y1, x2, y2] normalizado la fija a mano (también por cámara).
+    DETECTOR_ROI_ENABLED = True if os.environ.get("DETECTOR_ROI_ENABLED", "False") == "True" else False
+    DETECTOR_ROI_NORM = None
+    DETECTOR_ROI_MARGIN_NORM = 120 / 1152   # Margen alrededor de las zonas (120 px a 1152) para los equipos
+    # Detectar cada N frames: los modelos corren en 1 de cada N frames y entre medias las cajas y
+    # keypoints se extrapolan (inference/tracking.py). "1" = todos, entero fijo o "auto" (según la latencia)
+    DETECT_EVERY_N = os.environ.get("DETECT_EVERY_N", "1")
+    DETECT_EVERY_MAX = int(os.environ.get("DETECT_EVERY_MAX", 4))  # Tope de N en modo "auto"
+    # Puerta de movimiento: si nada cambió en las regiones vigiladas desde el último frame inferido,
+    # se reutilizan sus detecciones y keypoints. Por defecto la región es la unión de las zonas más
+    # un margen; MOTION_GATE_ROIS_NORM = [[x1, y1, x2, y2], ...] normalizadas las fija a mano
+    MOTION_GATE_ENABLED = True if os.environ.get("MOTION_GATE_ENABLED", "False") == "True" else False
+    MOTION_GATE_ROIS_NORM = None
+    MOTION_GATE_MARGIN_NORM = 120 / 1152   # Margen alrededor de las zonas (120 px a 1152) para los equipos
+    MOTION_GATE_WIDTH = 160                # Ancho de la imagen reducida que se compara
+    MOTION_GATE_PIXEL_DIFF = 15            # Diferencia de gris (0-255) para contar un píxel como cambiado
+    MOTION_GATE_THRESHOLD = float(os.environ.get("MOTION_GATE_THRESHOLD", 0.002))  # Fracción de píxeles cambiados
+    MOTION_GATE_REFRESH_EVERY = int(os.environ.get("MOTION_GATE_REFRESH_EVERY", 30))  # Inferencia forzada cada N frames
+    # Gobernador de actividad: sin escenas activas, sin clases de ninguna escena y sin personas durante
+    # IDLE_AFTER_SEC, las cámaras se decodifican a IDLE_FPS (el resto con grab(), sin decodificar)
+    IDLE_GOVERNOR_ENABLED = True if os.environ.get("IDLE_GOVERNOR_ENABLED", "False") == "True" else False
+    IDLE_FPS = float(os.environ.get("IDLE_FPS", 2.0))
+    IDLE_AFTER_SEC = float(os.environ.get("IDLE_AFTER_SEC", 10.0))
+    # Control de sobrecarga: si la latencia por frame supera el presupuesto (OVERLOAD_BUDGET_MS; 0 = 1/FPS
+    # de la fuente) se recorta trabajo en orden: visualización → WRITE_OUTPUT → tasa de pose → escenas de
+    # prioridad baja uno de cada dos frames, y se restaura al recuperar holgura (utils/overload_controller.py)
+    OVERLOAD_CONTROL_ENABLED = True if os.environ.get("OVERLOAD_CONTROL_ENABLED", "False") == "True" else False
+    OVERLOAD_BUDGET_MS = float(os.environ.get("OVERLOAD_BUDGET_MS", 0))
+    OVERLOAD_SHED_RATIO = 1.0       # Latencia/presupuesto por encima de la cual se recorta un paso
+    OVERLOAD_RESTORE_RATIO = 0.6    # Latencia/presupuesto por debajo de la cual se restaura un paso
+    OVERLOAD_SHED_AFTER = 15        # Frames seguidos sobre el presupuesto para recortar
+    OVERLOAD_RESTORE_AFTER = 90     # Frames seguidos con holgura para restaurar
+    # Prioridad por escena ("high", "normal" o "low") que reemplaza la declarada en engine/. Ej: {"cabron_abierto": "high"}
+    SCENE_PRIORITIES = json.loads(os.environ.get("SCENE_PRIORITIES", "{}"))
+    # Escenas declarativas: JSON de reglas (ej. config_data/scene_rules.json) compilado en un solo plan
+    # de evaluación por frame (engine/rules.py). Sin definir se usan las clases de engine/
+    SCENE_RULES_FILE = os.environ.get("SCENE_RULES_FILE")
+    # Letterbox y tensor de entrada una sola vez por frame, compartidos por todos los modelos
+    SHARED_PREPROCESS = True if os.environ.get("SHARED_PREPROCESS", "True") == "True" else False
     CONF_OBJ = 0.4
     CONF_POSE = 0.5
     LOG_DIR = os.environ.get("LOG_DIR", "logs")
@@ -81,9 +196,13 @@ class Config:
     #     [542,373],[524.999,373.587],[505,375],[475,383],[459.909,392.351],[447.6,404.861]
     # ], dtype=np.int32)
 
-    POLIGONO_RIESGO_STICKOUT = np.array([[483, 387], [514, 382], [544, 379], [572, 383], [590, 390],
-                                         [593, 409], [566, 425], [530, 429], [496, 426], [471, 420],
-                                         [464, 402]], dtype=np.int32)
+    # Los polígonos se definen normalizados (x/ancho, y/alto) y apply_resolution() genera su
+    # versión en píxeles (POLIGONO_*) para la resolución de trabajo.
+    POLIGONO_RIESGO_STICKOUT_NORM = np.array([
+        [0.41927, 0.59722], [0.44618, 0.58951], [0.47222, 0.58488], [0.49653, 0.59105], [0.51215, 0.60185],
+        [0.51476, 0.63117], [0.49132, 0.65586], [0.46007, 0.66204], [0.43056, 0.65741], [0.40885, 0.64815],
+        [0.40278, 0.62037]
+    ])
 
     # POLIGONO_RIESGO_STICKOUT = np.array([
     # [441.735, 356.126],[453.298, 343.954],[471.555, 335.034],[493.465, 328.952],[511.722, 324.491],
@@ -94,33 +213,36 @@ class Config:
     # ], dtype=np.int32)
 
     # Polígono para riesgo de 'Tubular Pendulando'
-    POLIGONO_RIESGO_PIN_TUBULAR = np.array([
-        [648.09,299.612],[694.554,376.517],[618.179,389.497],[578.395,312.429]
-    ], dtype=np.int32)
+    POLIGONO_RIESGO_PIN_TUBULAR_NORM = np.array([
+        [0.5625, 0.46142], [0.60243, 0.58025], [0.53646, 0.60031], [0.50174, 0.48148]
+    ])
 
     # Polígono para riesgo de 'Acople Pintubular usuario cerca a llavetm120'
-    POLIGONO_RIESGO_STICKOUT_LLAVETM120 = np.array([
-        [445.351,281.2],[447.405,324.957],[628.626,318.8],[625.545,280.835]
-    ], dtype=np.int32)
+    POLIGONO_RIESGO_STICKOUT_LLAVETM120_NORM = np.array([
+        [0.38628, 0.43364], [0.38802, 0.5], [0.54514, 0.49074], [0.54253, 0.4321]
+    ])
 
     # Polígono para riesgo de 'Persona cerca de pickup'
-    POLIGONO_RIESGO_PICK_UP_TUBULAR = np.array([
-        [643, 279], [703, 378], [607, 405], [560, 299]
-    ], dtype=np.int32)
+    POLIGONO_RIESGO_PICK_UP_TUBULAR_NORM = np.array([
+        [0.55816, 0.43056], [0.61024, 0.58333], [0.52691, 0.625], [0.48611, 0.46142]
+    ])
 
     #----------------------------------------------------------------------------- Umbrales y Persistencias --------------------------------------------------------------------------
 
+    # Las distancias (*_NORM) se expresan como fracción del ancho del frame y las áreas como fracción
+    # del área del frame; apply_resolution() genera los umbrales en píxeles (*_PX) que usan las escenas.
+
     # Escena -> Extracción stickout (Brazotaladro extrae el Stickout de la profundidad y persona coloca el pie dentro del circulo de rotación de las orejas)
     EXTR_OVERLAP_MIN = 0.05          # Umbral minimo de solapamiento entre el brazotaladro y el stickout
     EXTR_ALIGN_RATIO = 0.8           # Indica, máximo cuanto procentaje pueden estar desalineados ambos boundingbox verticalmente
-    EXTR_DIST_PX = 10.0              # Umbral de distancia máxima en pixeles que debe haber entre ambos objetos
+    EXTR_DIST_NORM = 10.0 / 1152     # Umbral de distancia máxima (10 px a 1152) que debe haber entre ambos objetos
     EXTR_SCENE_ON = 5                # frames consecutivos para activar la escena
     EXTR_SCENE_OFF = 10              # frames consecutivos para desactivar la escena
     EXTR_RISK_ON = 5                 # frames consecutivos para activar el riesgo
     EXTR_RISK_OFF = 10               # frames consecutivos para desactivar el riesgo
 
     # Escena -> Cabron abierto (Persona cerca al cabrón cuando se encuentra abierto)
-    CABRON_PIE_PROX_PX = 20          # Umbral de distancia maxima en pixeles entre el cabrón y la persona
+    CABRON_PIE_PROX_NORM = 20 / 1152 # Umbral de distancia maxima (20 px a 1152) entre el cabrón y la persona
     CABRON_SCENE_ON = 5              # frames consecutivos para activar la escena
     CABRON_SCENE_OFF = 10            # frames consecutivos para desactivar la escena
     CABRON_RISK_ON = 5               # frames consecutivos para activar el riesgo
@@ -128,7 +250,7 @@ class Config:
 
     #Escena -> Pickup Tubular (Persona toca el brazotaladro cuando él se encuentra acoplado al tubular horizontal)
     PICKUP_OVERLAP_MIN = 0.05        # Umbral minimo de solapamiento entre el brazotaladro y el tubular
-    PICKUP_DIST_PX = 30.0            # Umbral de distancia máxima en pixeles que debe haber entre ambos objetos
+    PICKUP_DIST_NORM = 30.0 / 1152   # Umbral de distancia máxima (30 px a 1152) que debe haber entre ambos objetos
     PICKUP_SCENE_ON = 7              # frames consecutivos para activar la escena
     PICKUP_SCENE_OFF = 5             # frames consecutivos para desactivar la escena
     PICKUP_RISK_ON = 8               # frames consecutivos para activar el riesgo
@@ -145,25 +267,170 @@ class Config:
     ACOPLE_HEIGHT_BUFFER = 20        # Cantidad de alturas/frames que almacenaria la ventana de validación
     ACOPLE_INC_MIN = 0.40            # +40% de variación respecto a la media reciente
     ACOPLE_WINDOW_SEC = 32           # ventana de riesgo post-confirmación
-    ACOPLE_AREA_MIN_STICKOUT = 9000
+    ACOPLE_AREA_MIN_STICKOUT_NORM = 9000 / (1152 * 648)  # Área mínima del stickout (9000 px² a 1152x648)
     ACOPLE_SCENE_ON = 6              # frames consecutivos para activar la escena
     ACOPLE_RISK_ON = 5               # frames consecutivos para activar el riesgo
     ACOPLE_RISK_OFF = 8              # frames consecutivos para desactivar el riesgo
 
     #Escena -> Pickup Tubular Zona riesgo (Persona cerca del brazotaladro cuando él se encuentra acoplado al tubular horizontal)
     PICKUP_ZONE_OVERLAP_MIN = 0.05   # Umbral minimo de solapamiento entre el brazotaladro y el tubular
-    PICKUP_ZONE_DIST_PX = 30.0       # Umbral de distancia máxima en pixeles que debe haber entre ambos objetos
+    PICKUP_ZONE_DIST_NORM = 30.0 / 1152  # Umbral de distancia máxima (30 px a 1152) que debe haber entre ambos objetos
     PICKUP_ZONE_SCENE_ON = 5         # frames consecutivos para activar la escena
     PICKUP_ZONE_SCENE_OFF = 5        # frames consecutivos para desactivar la escena
     PICKUP_ZONE_RISK_ON = 5          # frames consecutivos para activar el riesgo
     PICKUP_ZONE_RISK_OFF = 5         # frames consecutivos para desactivar el riesgo
 
     #Escen -> Mano Safata (Persona ubica la mano en la entrada de la safata justo cuando se va a realizar el acople pin tubular)
-    MANO_PIE_PROX_PX = 50            # Umbral de distancia maxima en pixeles entre el stickout y el pie de la persona
+    MANO_PIE_PROX_NORM = 50 / 1152   # Umbral de distancia maxima (50 px a 1152) entre el stickout y el pie de la persona
     MANO_OVERLAP_MIN = 0.5           # Umbral minimo de solapamiento entre el stickout y la safata
-    MANO_DIST_PX = 5.0               # Umbral de distancia máxima en pixeles que debe haber entre el stickout y la safata
+    MANO_DIST_NORM = 5.0 / 1152      # Umbral de distancia máxima (5 px a 1152) que debe haber entre el stickout y la safata
     MANO_EXTENSION_FACTOR = 0.65     # Factor de extensión de la mano respecto al antebrazo (0.40 significa que la mano tendria de longitud el 40% del antebrazo)
     MANO_SCENE_ON = 5                # frames consecutivos para activar la escena
     MANO_SCENE_OFF = 8               # frames consecutivos para desactivar la escena
     MANO_RISK_ON = 8                 # frames consecutivos para activar el riesgo
     MANO_RISK_OFF = 10               # frames consecutivos para desactivar el riesgo
+
+    #------------------------------------------------------------------------------ Escalado a resolución ---------------------------------------------------------------------------
+
+    # Atributo en píxeles → atributo normalizado del que se deriva
+    ZONE_KEYS = {
+        "POLIGONO_RIESGO_STICKOUT": "POLIGONO_RIESGO_STICKOUT_NORM",
+        "POLIGONO_RIESGO_PIN_TUBULAR": "POLIGONO_RIESGO_PIN_TUBULAR_NORM",
+        "POLIGONO_RIESGO_STICKOUT_LLAVETM120": "POLIGONO_RIESGO_STICKOUT_LLAVETM120_NORM",
+        "POLIGONO_RIESGO_PICK_UP_TUBULAR": "POLIGONO_RIESGO_PICK_UP_TUBULAR_NORM",
+    }
+    DISTANCE_KEYS = {
+        "EXTR_DIST_PX": "EXTR_DIST_NORM",
+        "CABRON_PIE_PROX_PX": "CABRON_PIE_PROX_NORM",
+        "PICKUP_DIST_PX": "PICKUP_DIST_NORM",
+        "PICKUP_ZONE_DIST_PX": "PICKUP_ZONE_DIST_NORM",
+        "MANO_PIE_PROX_PX": "MANO_PIE_PROX_NORM",
+        "MANO_DIST_PX": "MANO_DIST_NORM",
+    }
+    AREA_KEYS = {
+        "ACOPLE_AREA_MIN_STICKOUT": "ACOPLE_AREA_MIN_STICKOUT_NORM",
+    }
+    ROI_KEYS = {
+        "DETECTOR_ROI": "DETECTOR_ROI_NORM",
+        "MOTION_GATE_ROIS": "MOTION_GATE_ROIS_NORM",
+    }
+
+    # Atributo → variable de entorno que lo define (si no coinciden); la variable gana al perfil del equipo
+    ENV_KEYS = {
+        "RESIZE": "INFERENCE_RESOLUTION",
+    }
+
+    def __init__(self):
+        self.load_host_profile()
+        # Valores en píxeles por defecto; con "native" se recalculan al conocer el tamaño del stream
+        self.NATIVE_RESOLUTION = self.RESIZE is None
+        self.apply_resolution(*(self.RESIZE or self.CALIBRATION_RESOLUTION))
+
+    def apply_resolution(self, width, height):
+        """
+        Fija la resolución de trabajo y escala una sola vez los polígonos y umbrales
+        normalizados a píxeles de esa resolución.
+        """
+        self.RESIZE = (int(width), int(height))
+        size = np.array(self.RESIZE, dtype=np.float64)
+        for key, norm_key in self.ZONE_KEYS.items():
+            setattr(self, key, np.round(getattr(self, norm_key) * size).astype(np.int32))
+        for key, norm_key in self.DISTANCE_KEYS.items():
+            setattr(self, key, round(getattr(self, norm_key) * self.RESIZE[0], 4))
+        for key, norm_key in self.AREA_KEYS.items():
+            setattr(self, key, round(getattr(self, norm_key) * self.RESIZE[0] * self.RESIZE[1], 2))
+        self.DETECTOR_ROI = self._detector_roi() if self.DETECTOR_ROI_ENABLED else None
+        self.MOTION_GATE_ROIS = [self._region_px(box, self.MOTION_GATE_MARGIN_NORM)
+                                 for box in (self.MOTION_GATE_ROIS_NORM or [None])]
+        return self
+
+    #------------------------------------------------------------------------------ Perfil del equipo ------------------------------------------------------------------------------
+
+    def load_host_profile(self, path=None):
+        """
+        Aplica los 'settings' del perfil del equipo (tools/autotune.py), si existe. Las
+        variables de entorno definidas explícitamente tienen prioridad sobre el perfil.
+        """
+        path = path or self.HOST_PROFILE
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            settings = json.load(f)["settings"]
+        applied = {}
+        for key, value in settings.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Parámetro desconocido en el perfil {path}: {key}")
+            if self.ENV_KEYS.get(key, key) in os.environ:
+                continue
+            if key == "RESIZE":
+                value = _parse_resolution(value) if isinstance(value, str) else tuple(value)
+            setattr(self, key, value)
+            applied[key] = value
+        return applied
+
+    def apply_thread_settings(self):
+        """Hilos de OpenCV e inter-op de torch del proceso (los intra-op se fijan por modelo en inference/executors.py)."""
+        if self.CV2_THREADS >= 0:
+            cv2.setNumThreads(self.CV2_THREADS)
+        if self.TORCH_INTEROP_THREADS > 0 and torch.get_num_interop_threads() != self.TORCH_INTEROP_THREADS:
+            try:
+                torch.set_num_interop_threads(self.TORCH_INTEROP_THREADS)
+            except RuntimeError:
+                pass  # Solo se puede fijar antes del primer trabajo en paralelo de torch
+
+    def _region_px(self, norm_box=None, margin_norm=0.0):
+        """
+        Región en píxeles (x1, y1, x2, y2): la caja normalizada 'norm_box' o, si es None,
+        la unión de los polígonos de riesgo más 'margin_norm' (fracción del ancho).
+        """
+        width, height = self.RESIZE
+        if norm_box is not None:
+            x1, y1, x2, y2 = np.asarray(norm_box, dtype=np.float64) * [width, height, width, height]
+        else:
+            points = np.concatenate([getattr(self, key).reshape(-1, 2) for key in self.ZONE_KEYS])
+            margin = margin_norm * width
+            (x1, y1), (x2, y2) = points.min(axis=0) - margin, points.max(axis=0) + margin
+        roi = (max(0, int(x1)), max(0, int(y1)), min(width, int(np.ceil(x2))), min(height, int(np.ceil(y2))))
+        if roi[2] <= roi[0] or roi[3] <= roi[1]:
+            raise ValueError(f"Región vacía: {roi} (cámara {self.CAMERA_ID})")
+        return roi
+
+    def _detector_roi(self):
+        """ROI del detector: DETECTOR_ROI_NORM o zonas + DETECTOR_ROI_MARGIN_NORM. None si cubre el frame entero."""
+        roi = self._region_px(self.DETECTOR_ROI_NORM, self.DETECTOR_ROI_MARGIN_NORM)
+        return None if roi == (0, 0, *self.RESIZE) else roi
+
+    #------------------------------------------------------------------------------------ Cámaras -----------------------------------------------------------------------------------
+
+    def for_camera(self, camera):
+        """
+        Devuelve una copia de la configuración para una cámara: su id, su fuente y
+        los overrides (polígonos, umbrales) definidos en CAMERAS_FILE.
+        """
+        cam_cfg = copy.copy(self)
+        cam_cfg.CAMERA_ID = camera["camera_id"]
+        cam_cfg.VIDEO_SOURCE = camera.get("source", self.VIDEO_SOURCE)
+        derived = {**self.ZONE_KEYS, **self.DISTANCE_KEYS, **self.AREA_KEYS, **self.ROI_KEYS}
+        for key, value in camera.get("overrides", {}).items():
+            if not hasattr(self, key):
+                raise ValueError(f"Override desconocido para la cámara {cam_cfg.CAMERA_ID}: {key}")
+            if key in derived:
+                raise ValueError(f"{key} se deriva de la resolución; use {derived[key]} en la cámara {cam_cfg.CAMERA_ID}")
+            if key.startswith("POLIGONO_"):
+                value = np.array(value, dtype=np.float64)
+            setattr(cam_cfg, key, value)
+        return cam_cfg.apply_resolution(*cam_cfg.RESIZE)
+
+    def load_cameras(self):
+        """Lista de configuraciones por cámara (una sola si no hay CAMERAS_FILE)."""
+        if not self.CAMERAS_FILE:
+            return [self]
+        with open(self.CAMERAS_FILE, "r", encoding="utf-8") as f:
+            cameras = json.load(f)["cameras"]
+        if self.ASSIGNED_CAMERAS is not None:
+            cameras = [c for c in cameras if c["camera_id"] in self.ASSIGNED_CAMERAS]
+        return [self.for_camera(c) for c in cameras]
+
+    @property
+    def MULTI_CAMERA(self):
+        return bool(self.CAMERAS_FILE)
@@ -10,55 +10,166 @@ from abc import ABC, abstractmethod
 from datetime import datetime
 import time
 import pytz
+import numpy as np
+from .hysteresis_bank import HysteresisBank
+from utils.frame_clock import frame_stamp
+
+# Cuándo necesita pose una escena (ver BaseScene.needs_pose)
+POSE_NEVER = "never"              # No usa keypoints
+POSE_WHEN_ACTIVE = "when_active"  # Solo evalúa el riesgo (con keypoints) mientras la escena está activa
+POSE_WHEN_CLASSES = "when_classes"  # La propia condición de escena usa keypoints cuando están sus clases
+
+# Prioridad de la escena ante sobrecarga (ver utils/overload_controller.py)
+PRIORITY_HIGH = "high"      # Siempre a tasa completa (pose incluida)
+PRIORITY_NORMAL = "normal"  # Puede recibir la pose del keyframe anterior
+PRIORITY_LOW = "low"        # Además puede evaluarse uno de cada dos frames
+SCENE_PRIORITIES = (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)
+
+
+def _bank_state(attr):
+    """Atributo de estado de la escena respaldado por su fila en el HysteresisBank."""
+    def get(self):
+        return getattr(self.bank, attr)[self.row].item()
+
+    def set(self, value):
+        getattr(self.bank, attr)[self.row] = value
+    return property(get, set)
+
 
 class BaseScene(ABC):
     """
     Clase base abstracta para las escenas y riesgos.
     Todas las escenas deben heredar de esta clase y sobrescribir:
-        - evaluate(det_obj, res_pose, frame)
+        - scene_condition(ctx): condición instantánea de escena (None = sin dato en este frame)
+        - risk_condition(ctx): condición instantánea de riesgo (solo se evalúa con la escena activa)
+        - draw(ctx, frame, risk): visualización opcional mientras se evalúa el riesgo
+    El estado (contadores, activación, ventana, historial de alturas) vive en una fila del
+    HysteresisBank compartido y lo avanza RiskEngine para todas las escenas y cámaras a la vez.
+    Deben declarar sus entradas:
+        - required_classes: clases de objetos sin las cuales la escena no puede activarse
+        - pose_policy: cuándo usa keypoints (POSE_NEVER, POSE_WHEN_ACTIVE, POSE_WHEN_CLASSES)
+        - scene_on_key / scene_off_key / risk_on_key / risk_off_key: atributos de Config con los
+          frames seguidos para activar/desactivar escena y riesgo
+        - window_key: atributo de Config con la duración (s) de las escenas de ventana fija, que se
+          abren una vez al confirmarse y se cierran solo por tiempo (sin scene_off_key)
+        - priority: qué trabajo se le puede recortar ante sobrecarga (PRIORITY_*);
+          Config.SCENE_PRIORITIES puede cambiarla por nombre de escena
+        - label: texto del riesgo en el HUD (opcional)
+    Las escenas también pueden declararse como reglas en JSON (engine/rules.py).
     """
 
     name: str = "base_scene"
+    required_classes: tuple = ()
+    pose_policy: str = POSE_WHEN_ACTIVE
+    scene_on_key: str = None
+    scene_off_key: str = None
+    risk_on_key: str = None
+    risk_off_key: str = None
+    window_key: str = None
+    priority: str = PRIORITY_NORMAL
+    label: str = None
 
-    def __init__(self, cfg):
-
-        self.cfg = cfg
+    scene_active = _bank_state("scene_active")
+    scene_active_pos = _bank_state("scene_pos")
+    scene_active_neg = _bank_state("scene_neg")
+    risk_active = _bank_state("risk_active")
+    risk_active_pos = _bank_state("risk_pos")
+    risk_active_neg = _bank_state("risk_neg")
 
-        self.scene_active = False
-        self.scene_active_pos = 0
-        self.scene_active_neg = 0
+    def __init__(self, cfg, bank=None):
 
-        self.risk_active = False
-        self.risk_active_pos = 0
-        self.risk_active_neg = 0
+        self.cfg = cfg
+        self.priority = cfg.SCENE_PRIORITIES.get(self.name, self.priority)
+        if self.priority not in SCENE_PRIORITIES:
+            raise ValueError(f"Prioridad desconocida para {self.name}: {self.priority}")
 
-        self.heights_stickout = []
-        self.t0 = None
+        # Fila propia en el banco de estado (escena y riesgo inactivos, contadores en 0)
+        self.bank = bank or HysteresisBank.shared()
+        self.row = int(self.bank.add(1)[0])
+        self.bank.configure(self.row, **self.persistence())
 
         self.logs_enabled = True
         self.bogota = pytz.timezone("America/Bogota")
 
+    def persistence(self):
+        """Umbrales de persistencia de la escena (ver HysteresisBank.configure), leídos de Config."""
+        value = lambda key: getattr(self.cfg, key) if key else 0
+        return {
+            "scene_on": value(self.scene_on_key),
+            "scene_off": value(self.scene_off_key),
+            "risk_on": value(self.risk_on_key),
+            "risk_off": value(self.risk_off_key),
+            "window_sec": getattr(self.cfg, self.window_key) if self.window_key else None,
+        }
+
     # ============================================================
     # Métodos principales a implementar
     # ============================================================
 
     @abstractmethod
-    def evaluate(self, det_obj, res_pose, frame):
+    def scene_condition(self, ctx):
         """
-        Evalúa la escena y su riesgo en un frame.
-        Debe retornar un diccionario con la forma:
-        {
-            "scene": bool,
-            "risk": bool,
-            "extras": dict(opcional)
-        }
+        Condición instantánea de la escena en el frame: bool, o None si en este frame no
+        hay dato (el frame no cuenta ni como positivo ni como negativo).
 
         Args:
-            det_obj: detecciones YOLO / Supervision (sv.Detections)
-            res_pose: resultado de modelo de pose YOLO
-            frame: imagen actual (para visualización opcional)
+            ctx: FrameContext del frame (detecciones de objetos y keypoints precalculados)
+        """
+        raise NotImplementedError("Cada subclase debe implementar scene_condition().")
+
+    @abstractmethod
+    def risk_condition(self, ctx):
+        """Condición instantánea del riesgo (solo se pide con la escena activa)."""
+        raise NotImplementedError("Cada subclase debe implementar risk_condition().")
+
+    def draw(self, ctx, frame, risk):
+        """Visualización de la escena mientras se evalúa su riesgo ('risk': condición del frame)."""
+        pass
+
+    def evaluate(self, ctx, frame, ts=None):
+        """
+        Evalúa solo esta escena en un frame (RiskEngine avanza todas a la vez con el mismo resultado).
+        'ts': timestamp del frame en segundos (captura o video; None = ahora).
+        Retorna un diccionario con la forma {"time": str, "scene": bool, "risk": bool}.
         """
-        raise NotImplementedError("Cada subclase debe implementar evaluate().")
+        ts = time.time() if ts is None else ts
+        scene = self.scene_condition(ctx)
+        rows = np.array([self.row])
+        if self.bank.step_scene(rows, [bool(scene)], [scene is not None], ts)[0]:
+            risk = bool(self.risk_condition(ctx))
+            self.bank.step_risk(rows, [risk])
+            if frame is not None and self.cfg.VISUALIZE:
+                self.draw(ctx, frame, risk)
+        self.log_state()
+        return self.make_result(self.scene_active, self.risk_active, stamp=frame_stamp(ts, self.bogota))
+
+    # ============================================================
+    # Entradas declaradas
+    # ============================================================
+
+    def needs_pose(self, ctx):
+        """
+        True si evaluate() usará keypoints en este frame: la escena ya está activa, o
+        están sus clases y puede activarse en este mismo frame (POSE_WHEN_ACTIVE),
+        o simplemente están sus clases (POSE_WHEN_CLASSES).
+        """
+        if self.pose_policy == POSE_NEVER:
+            return False
+        if self.scene_active:
+            return True
+        if not ctx.has_all(self.required_classes):
+            return False
+        if self.pose_policy == POSE_WHEN_CLASSES or self.scene_on_key is None:
+            return True
+        return self.scene_active_pos + 1 >= getattr(self.cfg, self.scene_on_key)
+
+    def may_need_pose(self, ctx):
+        """Versión sin estado de needs_pose (para quien no ve los contadores de la escena)."""
+        return self.pose_policy != POSE_NEVER and ctx.has_all(self.required_classes)
+
+    def preconditions_met(self, ctx):
+        """True si están todas las clases sin las cuales la escena no puede activarse."""
+        return bool(self.required_classes) and ctx.has_all(self.required_classes)
 
     # ============================================================
     # Métodos utilitarios comunes
@@ -70,16 +181,7 @@ class BaseScene(ABC):
 
     def deactivate_scene(self):
         """Desactiva la escena y resetea contadores."""
-        self.scene_active = False
-        self.scene_active_pos = 0
-        self.scene_active_neg = 0
-
-        self.risk_active = False
-        self.risk_active_pos = 0
-        self.risk_active_neg = 0
-
-        self.t0 = None
-        self.heights_stickout.clear()
+        self.bank.reset([self.row])
 
     def activate_risk(self):
         """Marca si el riesgo está activo (solo para tracking visual)."""
@@ -113,9 +215,33 @@ class BaseScene(ABC):
             self.risk_active_neg += 1
             self.risk_active_pos = 0
 
-    def initialize_time(self):
-        "Inicializa la variable temporal para indicar un momento"
-        self.t0 = time.time()
+    def initialize_time(self, now=None):
+        "Inicializa la variable temporal para indicar un momento (el timestamp del frame, si se indica)"
+        self.t0 = time.time() if now is None else now
+
+    @property
+    def t0(self):
+        t0 = self.bank.t0[self.row]
+        return None if np.isnan(t0) else float(t0)
+
+    @t0.setter
+    def t0(self, value):
+        self.bank.t0[self.row] = np.nan if value is None else value
+
+    @property
+    def heights_stickout(self):
+        """Historial de alturas del stickout (copia, de la más antigua a la más reciente)."""
+        return self.bank.heights_of(self.row)
+
+    def window_remaining(self, now=None):
+        """
+        Segundos que le quedan a la ventana de la escena (0 si no está activa o no tiene ventana),
+        en el reloj de los frames: por defecto al timestamp del último frame evaluado.
+        """
+        if now is None:
+            now = self.bank.last_ts[self.row]
+            now = time.time() if np.isnan(now) else now
+        return float(self.bank.window_remaining([self.row], now)[0])
 
     def log_state(self):
         """Imprime mensaje de debug si está habilitado."""
@@ -126,9 +252,12 @@ class BaseScene(ABC):
     # Plantilla de retorno estándar
     # ============================================================
 
-    def make_result(self, scene: bool, risk: bool, extras: dict = None):
-        """Devuelve el formato de salida estándar para el motor."""
-        ts = datetime.now(self.bogota).isoformat()
+    def make_result(self, scene: bool, risk: bool, extras: dict = None, stamp: str = None):
+        """
+        Devuelve el formato de salida estándar para el motor. 'stamp': hora del frame ya
+        formateada (una sola por frame para todas las escenas; None = ahora).
+        """
+        ts = stamp or datetime.now(self.bogota).isoformat()
         return {
             "time": ts,
             "scene": bool(scene),
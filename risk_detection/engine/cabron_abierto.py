@@ -1,45 +1,25 @@
 # risk_detection/engine/cabron_abierto.py
 from shapely.geometry import box as shapely_box
-from .base_scene import BaseScene
-from utils.geometry_utils import has_all_classes, boxes_to_polys_by_name, feet_distance_to_geom
-from utils.pose_utils import iter_feet
+from .base_scene import BaseScene, POSE_WHEN_ACTIVE, PRIORITY_LOW
+from utils.box_relations import point_box_distance
 
 class CabronAbierto(BaseScene):
     name = "cabron_abierto"
+    required_classes = ("cabron",)
+    pose_policy = POSE_WHEN_ACTIVE
+    scene_on_key = "CABRON_SCENE_ON"
+    scene_off_key = "CABRON_SCENE_OFF"
+    risk_on_key = "CABRON_RISK_ON"
+    risk_off_key = "CABRON_RISK_OFF"
+    priority = PRIORITY_LOW
 
-    def __init__(self, cfg):
-        super().__init__(cfg)
+    def __init__(self, cfg, bank=None):
+        super().__init__(cfg, bank)
 
-    def evaluate(self, det_obj, res_pose, frame):
-        req = ["cabron"]
-        active = has_all_classes(det_obj, req)
+    def scene_condition(self, ctx):
+        return ctx.has_all(self.required_classes)
 
-        risk = False
-        self.increment_scene_active_pos_neg(active)
-
-        if self.scene_active_pos >= self.cfg.CABRON_SCENE_ON:
-            self.activate_scene()
-        elif self.scene_active_neg >= self.cfg.CABRON_SCENE_OFF:
-            self.deactivate_scene()
-        
-        if self.scene_active:
-            polys = boxes_to_polys_by_name(det_obj, req)
-            # print(polys)
-            # print(self.risk_active,self.risk_active_pos, self.risk_active_neg)
-            # print("------------------")
-            if polys:
-                cabron_geom = polys["cabron"]
-                feet = list(iter_feet(res_pose, self.cfg.FEET_IDXS))
-                risk = feet_distance_to_geom(feet, cabron_geom, self.cfg.CABRON_PIE_PROX_PX)
-            else:
-                risk = False
-            
-            self.increment_risk_active_pos_neg(risk)
-
-            if self.risk_active_pos >= self.cfg.CABRON_RISK_ON:
-                self.activate_risk()
-            elif self.risk_active_neg >= self.cfg.CABRON_RISK_OFF:
-                self.deactivate_risk()
-        self.log_state()
-        # print(f"Escena activa: {self.scene_active}, Riesgo activo: {self.risk_active}, Frames positivos: {self.risk_active_pos}, Frames_negativos: {self.risk_active_neg}")
-        return self.make_result(self.scene_active, self.risk_active)
+    def risk_condition(self, ctx):
+        """Algún pie cerca de alguno de los cabrones detectados."""
+        feet = ctx.feet(self.cfg.FEET_IDXS)
+        return bool((point_box_distance(feet, ctx.boxes("cabron")) <= self.cfg.CABRON_PIE_PROX_PX).any())
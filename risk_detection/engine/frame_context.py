@@ -0,0 +1,120 @@
+# ============================================================
+# risk_detection/engine/frame_context.py
+# ------------------------------------------------------------
+# Vistas precalculadas de las detecciones de un frame, armadas
+# una sola vez y compartidas por todas las escenas y el HUD.
+# ============================================================
+
+import numpy as np
+from shapely.geometry import box as shapely_box
+from utils.pose_utils import keypoints_array
+from utils.box_relations import BoxRelations
+
+
+class FrameContext:
+    """
+    Detecciones de un frame tal como las consumen las escenas:
+        - classes: conjunto de clases presentes (una sola vez, no un set por escena)
+        - mask(name) / boxes(name): máscara y cajas xyxy por clase (cacheadas)
+        - poly(name) / polys(names): caja shapely de la clase (la última detección, como
+          boxes_to_polys_by_name), creada solo si alguna escena la pide
+        - relation(a, b): BoxRelations entre todas las instancias de dos clases (cacheadas)
+        - keypoints / keypoint_conf: [N,K,2] y [N,K] en numpy (una sola copia desde la pose)
+        - feet(idxs) / points(idxs): puntos (x, y) de esos keypoints por persona, en orden
+        - in_zone(zone, idxs): si alguno de esos keypoints está dentro o toca una zona estática
+          (ZoneIndex; una sola consulta por juego de keypoints para todas las zonas)
+        - memo: resultados de los predicados de reglas (engine/rules.py) ya calculados en el frame
+    """
+
+    def __init__(self, det_obj, res_pose=None, zones=None):
+        self.det_obj = det_obj
+        self.res_pose = res_pose
+        self.zones = zones
+        names = det_obj.data.get("class_name")
+        self.class_names = names if names is not None else np.empty(0, dtype=str)
+        self.classes = frozenset(self.class_names.tolist())
+        self._masks = {}
+        self._boxes = {}
+        self._polys = {}
+        self._relations = {}
+        self._points = {}
+        self._zone_hits = {}
+        self._keypoints = None
+        self.memo = {}
+
+    # -------------------------
+    # Objetos
+    # -------------------------
+    def has_all(self, required):
+        """True si están todas las clases de 'required' (equivale a has_all_classes)."""
+        return self.classes.issuperset(required)
+
+    def mask(self, name):
+        if name not in self._masks:
+            self._masks[name] = self.class_names == name
+        return self._masks[name]
+
+    def boxes(self, name):
+        """Cajas xyxy [M,4] de la clase (vacío si no está)."""
+        if name not in self._boxes:
+            self._boxes[name] = self.det_obj.xyxy[self.mask(name)] if name in self.classes else np.empty((0, 4), dtype=np.float32)
+        return self._boxes[name]
+
+    def poly(self, name):
+        """Caja shapely de la última detección de la clase, o None si no está."""
+        if name not in self._polys:
+            boxes = self.boxes(name)
+            self._polys[name] = shapely_box(*boxes[-1]) if len(boxes) else None
+        return self._polys[name]
+
+    def polys(self, names):
+        """{clase: caja shapely} de las clases presentes de 'names' (como boxes_to_polys_by_name)."""
+        return {name: self.poly(name) for name in names if name in self.classes}
+
+    def relation(self, a, b):
+        """Relaciones par a par entre todas las instancias de las clases 'a' (filas) y 'b' (columnas)."""
+        if (a, b) not in self._relations:
+            self._relations[(a, b)] = BoxRelations(self.boxes(a), self.boxes(b))
+        return self._relations[(a, b)]
+
+    # -------------------------
+    # Pose
+    # -------------------------
+    @property
+    def keypoints_data(self):
+        """Keypoints (x, y, conf) [N,K,3]."""
+        if self._keypoints is None:
+            self._keypoints = keypoints_array(self.res_pose)
+        return self._keypoints
+
+    @property
+    def keypoints(self):
+        return self.keypoints_data[..., :2]
+
+    @property
+    def keypoint_conf(self):
+        return self.keypoints_data[..., 2]
+
+    def points(self, idxs):
+        """Puntos (x, y) [N·len(idxs), 2] de los keypoints 'idxs' de cada persona, persona a persona."""
+        idxs = tuple(idxs)
+        if idxs not in self._points:
+            self._points[idxs] = self.keypoints[:, list(idxs)].reshape(-1, 2).astype(np.float64)
+        return self._points[idxs]
+
+    def feet(self, feet_idxs=(15, 16)):
+        return self.points(feet_idxs)
+
+    # -------------------------
+    # Zonas estáticas
+    # -------------------------
+    def zone_hits(self, idxs):
+        """bool [N·len(idxs), Z]: qué puntos de points(idxs) están dentro o tocan cada zona."""
+        idxs = tuple(idxs)
+        if idxs not in self._zone_hits:
+            self._zone_hits[idxs] = self.zones.query(self.points(idxs))
+        return self._zone_hits[idxs]
+
+    def in_zone(self, zone, idxs):
+        """True si algún keypoint 'idxs' de alguna persona está dentro o toca la zona (clave POLIGONO_*)."""
+        return bool(self.zone_hits(idxs)[:, self.zones.slot[zone]].any())
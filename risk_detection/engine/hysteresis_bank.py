@@ -0,0 +1,200 @@
+# ============================================================
+# risk_detection/engine/hysteresis_bank.py
+# ------------------------------------------------------------
+# Estado de persistencia (histéresis y ventanas) de todas las
+# escenas de todas las cámaras en arreglos numpy: una fila por
+# escena y un paso vectorizado por frame para todas a la vez.
+# ============================================================
+
+import numpy as np
+
+GROW_ROWS = 16      # Filas que se agregan cuando se llena el banco
+
+
+class HysteresisBank:
+    """
+    Estructura de arreglos con el estado de las escenas (una fila por escena y cámara):
+        - scene_active / scene_pos / scene_neg y risk_active / risk_pos / risk_neg
+        - scene_on / scene_off / risk_on / risk_off: frames seguidos para activar/desactivar
+        - window: duración en s de las escenas de ventana fija (NaN = histéresis) y t0 su apertura,
+          ambas en el reloj de los frames (last_ts: timestamp del último frame de la fila)
+        - heights: historial circular de alturas de caja (acople) de capacidad fija por fila
+    step_scene() y step_risk() aplican a un conjunto de filas, dados los vectores de condición
+    del frame, la misma lógica que tenían las escenas una a una (BaseScene).
+    """
+
+    _shared = None
+
+    def __init__(self, rows=GROW_ROWS, heights=0):
+        self.size = 0
+        self._free = []     # Filas liberadas (release) que add() reutiliza antes de crecer
+        self.scene_active = np.zeros(rows, dtype=bool)
+        self.risk_active = np.zeros(rows, dtype=bool)
+        self.scene_pos = np.zeros(rows, dtype=np.int64)
+        self.scene_neg = np.zeros(rows, dtype=np.int64)
+        self.risk_pos = np.zeros(rows, dtype=np.int64)
+        self.risk_neg = np.zeros(rows, dtype=np.int64)
+        self.scene_on = np.zeros(rows, dtype=np.int64)
+        self.scene_off = np.zeros(rows, dtype=np.int64)
+        self.risk_on = np.zeros(rows, dtype=np.int64)
+        self.risk_off = np.zeros(rows, dtype=np.int64)
+        self.window = np.full(rows, np.nan)
+        self.t0 = np.full(rows, np.nan)
+        self.last_ts = np.full(rows, np.nan)     # Timestamp del último frame evaluado
+        self.heights = np.zeros((rows, heights))
+        self.heights_cap = np.zeros(rows, dtype=np.int64)
+        self.heights_len = np.zeros(rows, dtype=np.int64)
+        self.heights_head = np.zeros(rows, dtype=np.int64)   # Próxima posición a escribir
+
+    @classmethod
+    def shared(cls):
+        """Banco del proceso, compartido por los RiskEngine de todas las cámaras."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    # -------------------------
+    # Registro
+    # -------------------------
+    def add(self, n=1):
+        """Reserva 'n' filas (inactivas; primero las liberadas) y devuelve sus índices."""
+        reused, self._free = self._free[:n], self._free[n:]
+        new = n - len(reused)
+        if self.size + new > len(self.scene_active):
+            self._grow(max(self.size + new, len(self.scene_active) + GROW_ROWS))
+        rows = np.concatenate([np.array(reused, dtype=np.int64), np.arange(self.size, self.size + new)])
+        self.size += new
+        return rows
+
+    def release(self, rows):
+        """Devuelve filas al banco (escenas de un motor que se descarta): quedan vacías para otro add()."""
+        rows = np.asarray(rows, dtype=np.int64)
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                value[rows] = self._fill(name)
+        self._free.extend(rows.tolist())
+
+    @property
+    def in_use(self):
+        return self.size - len(self._free)
+
+    @staticmethod
+    def _fill(name):
+        return np.nan if name in ("window", "t0", "last_ts") else 0
+
+    def _grow(self, rows):
+        for name, value in list(vars(self).items()):
+            if isinstance(value, np.ndarray):
+                grown = np.full((rows,) + value.shape[1:], self._fill(name), dtype=value.dtype)
+                grown[:len(value)] = value
+                setattr(self, name, grown)
+
+    def configure(self, row, scene_on, scene_off, risk_on, risk_off, window_sec=None):
+        """Umbrales de persistencia de la fila; con 'window_sec' la escena es de ventana fija."""
+        self.scene_on[row], self.scene_off[row] = scene_on, scene_off
+        self.risk_on[row], self.risk_off[row] = risk_on, risk_off
+        self.window[row] = np.nan if window_sec is None else window_sec
+
+    def configure_heights(self, row, capacity):
+        """Capacidad del historial circular de alturas de la fila (vacía el historial)."""
+        if capacity > self.heights.shape[1]:
+            grown = np.zeros((len(self.heights), capacity))
+            grown[:, :self.heights.shape[1]] = self.heights
+            self.heights = grown
+        self.heights_cap[row] = capacity
+        self.heights_len[row] = 0
+        self.heights_head[row] = 0
+
+    # -------------------------
+    # Paso vectorizado
+    # -------------------------
+    def reset(self, rows):
+        """Desactiva la escena (y el riesgo) de las filas y resetea contadores, ventana e historial."""
+        self.scene_active[rows] = False
+        self.risk_active[rows] = False
+        for counters in (self.scene_pos, self.scene_neg, self.risk_pos, self.risk_neg, self.heights_len, self.heights_head):
+            counters[rows] = 0
+        self.t0[rows] = np.nan
+
+    def window_remaining(self, rows, now):
+        """Segundos que le quedan a la ventana de cada fila (0 si no está activa o no tiene ventana)."""
+        left = self.window[rows] - (now - self.t0[rows])
+        return np.where(self.scene_active[rows] & ~np.isnan(left), np.maximum(left, 0.0), 0.0)
+
+    def step_scene(self, rows, condition, valid, now):
+        """
+        Un frame de la condición de escena para las filas 'rows' (bool [n]); las filas con
+        'valid' False no tienen dato en este frame y no cuentan ni como positivo ni como negativo.
+        Histéresis: activa con scene_on positivos seguidos y resetea con scene_off negativos.
+        Ventana: se abre una vez (t0 = now) con scene_on positivos y se cierra al agotarse.
+        'now': timestamp del frame (s), uno para todas las filas o uno por fila.
+        Devuelve bool [n]: filas cuyo riesgo se evalúa en este frame (escena activa y en ventana).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        condition = np.asarray(condition, dtype=bool)
+        valid = np.asarray(valid, dtype=bool)
+        now = np.broadcast_to(np.asarray(now, dtype=np.float64), rows.shape)
+        self.last_ts[rows] = now
+
+        counted = rows[valid]
+        positive = condition[valid]
+        self.scene_pos[counted] = np.where(positive, self.scene_pos[counted] + 1, 0)
+        self.scene_neg[counted] = np.where(positive, 0, self.scene_neg[counted] + 1)
+
+        windowed = ~np.isnan(self.window[rows])
+        hyst = rows[~windowed]
+        on = self.scene_pos[hyst] >= self.scene_on[hyst]
+        self.scene_active[hyst[on]] = True
+        self.reset(hyst[~on & (self.scene_neg[hyst] >= self.scene_off[hyst])])
+
+        win, win_now = rows[windowed], now[windowed]
+        opening = valid[windowed] & ~self.scene_active[win] & (self.scene_pos[win] >= self.scene_on[win])
+        self.scene_active[win[opening]] = True
+        self.t0[win[opening]] = win_now[opening]
+        self.reset(win[self.scene_active[win] & ~(self.window_remaining(win, win_now) > 0)])
+
+        return self.scene_active[rows].copy()
+
+    def step_risk(self, rows, condition):
+        """Un frame de la condición de riesgo (bool [n]) para filas con la escena activa: histéresis risk_on/risk_off."""
+        rows = np.asarray(rows, dtype=np.int64)
+        condition = np.asarray(condition, dtype=bool)
+        self.risk_pos[rows] = np.where(condition, self.risk_pos[rows] + 1, 0)
+        self.risk_neg[rows] = np.where(condition, 0, self.risk_neg[rows] + 1)
+        on = self.risk_pos[rows] >= self.risk_on[rows]
+        self.risk_active[rows[on]] = True
+        self.risk_active[rows[~on & (self.risk_neg[rows] >= self.risk_off[rows])]] = False
+
+    # -------------------------
+    # Historial de alturas
+    # -------------------------
+    def push_heights(self, rows, values):
+        """Agrega una altura al historial de cada fila (descarta la más antigua si está lleno)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        cap = self.heights_cap[rows]
+        rows, values, cap = rows[cap > 0], np.asarray(values, dtype=np.float64)[cap > 0], cap[cap > 0]
+        self.heights[rows, self.heights_head[rows]] = values
+        self.heights_head[rows] = (self.heights_head[rows] + 1) % cap
+        self.heights_len[rows] = np.minimum(self.heights_len[rows] + 1, cap)
+
+    def trailing_mean(self, rows, fallback, skip_last=3, min_len=6):
+        """
+        Promedio del historial de cada fila sin sus 'skip_last' alturas más recientes, o 'fallback'
+        (por fila) si el historial tiene menos de 'min_len' alturas.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        fallback = np.asarray(fallback, dtype=np.float64)
+        length = self.heights_len[rows]
+        count = np.maximum(length - skip_last, 0)
+        cap = np.maximum(self.heights_cap[rows], 1)
+        j = np.arange(self.heights.shape[1])[None, :]
+        idx = (self.heights_head[rows] - length)[:, None] + j
+        values = self.heights[rows[:, None], idx % cap[:, None]]
+        total = np.where(j < count[:, None], values, 0.0).sum(axis=1)
+        mean = np.divide(total, count, out=np.zeros(len(rows)), where=count > 0)
+        return np.where(length >= min_len, mean, fallback)
+
+    def heights_of(self, row):
+        """Historial de alturas de la fila, de la más antigua a la más reciente."""
+        length, head, cap = self.heights_len[row], self.heights_head[row], max(self.heights_cap[row], 1)
+        return self.heights[row, (head - length + np.arange(length)) % cap].tolist()
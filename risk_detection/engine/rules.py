@@ -0,0 +1,372 @@
+# ============================================================
+# risk_detection/engine/rules.py
+# ------------------------------------------------------------
+# Escenas declarativas: reglas en JSON (config_data/scene_rules.json)
+# con precondiciones, predicados de escena y de riesgo y parámetros
+# de persistencia, compiladas en un único plan de evaluación.
+# ============================================================
+#
+# Formato: {"scenes": [regla, ...]} en el orden de evaluación. Cada regla:
+#   name, label (texto del HUD), priority (high/normal/low), pose_policy (never/when_active/when_classes),
+#   requires (clases sin las cuales no puede activarse), scene y risk (predicados), persistence y draw.
+#
+# Los números de un predicado pueden ser literales o el nombre de un atributo de Config
+# ("EXTR_OVERLAP_MIN"), que se lee en cada frame: así siguen valiendo los overrides por cámara
+# y el escalado a la resolución nativa (Config.apply_resolution).
+#
+# Predicados (un diccionario de una sola clave):
+#   {"all": [p, ...]} / {"any": [p, ...]} / {"not": p}
+#   {"has_classes": ["cabron"]}
+#   {"pair": {"a": clase, "b": clase, "where": condición de par}}: algún par de instancias la cumple
+#       condiciones de par ([M,N] sobre BoxRelations): all / any / not,
+#       {"compare": {"metric": overlap_min|iou|intersection|distance|center_dx|width_avg,
+#                    "op": ">"|">="|"<"|"<=", "value": v, "scale": "width_avg" (opcional)}}
+#       {"keypoints_near": {"box": "a"|"b", "keypoints": idxs, "max_distance": v}}
+#   {"boxes": {"class": c, "metric": center_x|center_y|width|height|area, "op": op, "value": v,
+#              "scale": "frame_width"|"frame_height" (opcional; umbral en píxeles enteros)}}
+#   {"keypoints_in_zone": {<puntos>, "zone": "POLIGONO_..."}}
+#   {"keypoints_near": {<puntos>, "class": c, "max_distance": v}}
+#   {"keypoints_in_boxes": {<puntos>, "class": c, "region": [fx1, fy1, fx2, fy2] (opcional)}}
+#   {"height_jump": {"class": c, "buffer": n, "min_increase": v, "min_area": v}}  (con estado; ver abajo)
+#   donde <puntos> es "keypoints": idxs, o "fingertips": {"arms": pares (codo, muñeca), "extension": v}.
+#
+# Persistencia: "hysteresis" (scene_on/scene_off/risk_on/risk_off, como las escenas de engine/)
+# o "window" (scene_on/window_sec/risk_on/risk_off: la escena dura una ventana fija, como el acople).
+# Se lee al crear la escena y vive, como en las clases, en el HysteresisBank compartido.
+#
+# Plan: cada predicado se compila una sola vez y se identifica por su definición normalizada, de
+# modo que el mismo predicado (o sub-predicado) usado por varias escenas es una única entrada del
+# plan y se calcula a lo sumo una vez por frame (resultados en FrameContext.memo). Las geometrías
+# de base (cajas, relaciones entre clases, puntos, zonas) ya las comparte el FrameContext.
+
+import json
+import operator
+import logging
+import sys
+
+import cv2
+import numpy as np
+
+from .base_scene import BaseScene, POSE_NEVER, POSE_WHEN_ACTIVE, POSE_WHEN_CLASSES, PRIORITY_NORMAL
+from utils.box_relations import box_areas, box_regions, point_box_distance, points_in_boxes
+from utils.pose_utils import virtual_fingertips
+from utils.visualization import draw_polygon, put_text
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+PAIR_METRICS = ("intersection", "iou", "overlap_min", "distance", "center_dx", "width_avg")
+BOX_METRICS = {
+    "center_x": lambda b: (b[:, 0] + b[:, 2]) / 2.0,
+    "center_y": lambda b: (b[:, 1] + b[:, 3]) / 2.0,
+    "width": lambda b: b[:, 2] - b[:, 0],
+    "height": lambda b: b[:, 3] - b[:, 1],
+    "area": box_areas,
+}
+FRAME_SCALES = {"frame_width": 0, "frame_height": 1}
+POSE_POLICIES = (POSE_NEVER, POSE_WHEN_ACTIVE, POSE_WHEN_CLASSES)
+PERSISTENCE_KEYS = {
+    "hysteresis": ("scene_on", "scene_off", "risk_on", "risk_off"),
+    "window": ("scene_on", "window_sec", "risk_on", "risk_off"),
+}
+
+
+def load_rules(path):
+    """Reglas del archivo JSON ({"scenes": [...]})."""
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f).get("scenes", [])
+    names = [r.get("name") for r in rules]
+    if len(set(names)) != len(names) or None in names:
+        raise ValueError(f"❌ Reglas de {path}: cada escena necesita un 'name' único")
+    return rules
+
+
+def _single(node, where):
+    """(tipo, argumentos) de un nodo {"tipo": argumentos}."""
+    if not isinstance(node, dict) or len(node) != 1:
+        raise ValueError(f"❌ Regla {where}: se esperaba un predicado de una sola clave, no {node!r}")
+    return next(iter(node.items()))
+
+
+class RulePlan:
+    """
+    Plan de evaluación de todas las reglas de una cámara: predicados compilados una sola vez
+    (indexados por su definición, compartidos entre escenas) y una RuleScene por regla.
+    """
+
+    def __init__(self, rules, cfg, bank=None):
+        self.cfg = cfg
+        self._predicates = {}   # clave -> función(ctx, escena)
+        self.scenes = [RuleScene(cfg, rule, self, bank) for rule in rules]
+        logger.info(f"📐 Reglas compiladas: {len(self.scenes)} escenas, {len(self._predicates)} predicados en el plan")
+
+    @classmethod
+    def from_file(cls, path, cfg, bank=None):
+        return cls(load_rules(path), cfg, bank)
+
+    # -------------------------
+    # Evaluación
+    # -------------------------
+    def value(self, key, ctx, scene):
+        """Resultado del predicado 'key' en el frame de 'ctx' (calculado una sola vez por frame)."""
+        memo = ctx.memo
+        if key not in memo:
+            memo[key] = self._predicates[key](ctx, scene)
+        return memo[key]
+
+    # -------------------------
+    # Compilación
+    # -------------------------
+    def compile(self, node, where, scene):
+        """Compila un predicado (y sus hijos) para 'scene' y devuelve su clave en el plan."""
+        kind, args = _single(node, where)
+        key = json.dumps(node, sort_keys=True)
+        if '"height_jump"' in key:
+            key = f"{scene.name}:{key}"   # Con estado propio de la escena: no se comparte
+        if key in self._predicates:
+            return key
+
+        if kind in ("all", "any"):
+            children = [self.compile(child, where, scene) for child in args]
+            combine = all if kind == "all" else any
+            fn = lambda ctx, scene: combine(bool(self.value(k, ctx, scene)) for k in children)
+        elif kind == "not":
+            child = self.compile(args, where, scene)
+            fn = lambda ctx, scene: self._negate(self.value(child, ctx, scene))
+        elif kind == "has_classes":
+            classes = tuple(args)
+            fn = lambda ctx, scene: ctx.has_all(classes)
+        elif kind == "pair":
+            fn = self._compile_pair(args, where)
+        elif kind == "boxes":
+            fn = self._compile_boxes(args, where)
+        elif kind == "keypoints_in_zone":
+            fn = self._compile_in_zone(args, where)
+        elif kind == "keypoints_near":
+            points = self._points(args, where)
+            cls, max_distance = args["class"], self.param(args["max_distance"], where)
+            fn = lambda ctx, scene: bool((point_box_distance(points(ctx), ctx.boxes(cls)) <= max_distance()).any())
+        elif kind == "keypoints_in_boxes":
+            points = self._points(args, where)
+            cls, region = args["class"], args.get("region")
+            fn = lambda ctx, scene: bool(points_in_boxes(points(ctx), self._regions(ctx.boxes(cls), region)).any())
+        elif kind == "height_jump":
+            fn = self._compile_height_jump(args, where, scene)
+        else:
+            raise ValueError(f"❌ Regla {where}: predicado desconocido '{kind}'")
+
+        self._predicates[key] = fn
+        return key
+
+    def param(self, value, where):
+        """Lector de un parámetro: literal o nombre de un atributo de Config (leído en cada frame)."""
+        if isinstance(value, str):
+            if not hasattr(self.cfg, value):
+                raise ValueError(f"❌ Regla {where}: parámetro de Config desconocido '{value}'")
+            return lambda: getattr(self.cfg, value)
+        return lambda: value
+
+    @staticmethod
+    def _negate(value):
+        return None if value is None else not value
+
+    @staticmethod
+    def _regions(boxes, region):
+        return boxes if region is None else box_regions(boxes, region)
+
+    @staticmethod
+    def _op(spec, where):
+        if spec.get("op") not in OPS:
+            raise ValueError(f"❌ Regla {where}: operador desconocido {spec.get('op')!r}")
+        return OPS[spec["op"]]
+
+    def _points(self, args, where):
+        """Lector de los puntos de un predicado: keypoints por índice o puntas de dedos virtuales."""
+        if "keypoints" in args:
+            idxs = self.param(args["keypoints"], where)
+            return lambda ctx: ctx.points(idxs())
+        if "fingertips" in args:
+            arms = self.param(args["fingertips"]["arms"], where)
+            extension = self.param(args["fingertips"]["extension"], where)
+            return lambda ctx: virtual_fingertips(ctx.keypoints, arms(), extension())
+        raise ValueError(f"❌ Regla {where}: faltan los puntos ('keypoints' o 'fingertips')")
+
+    def _compile_in_zone(self, args, where):
+        zone = args["zone"]
+        if zone not in self.cfg.ZONE_KEYS:
+            raise ValueError(f"❌ Regla {where}: zona desconocida '{zone}'")
+        if "keypoints" in args:
+            idxs = self.param(args["keypoints"], where)
+            return lambda ctx, scene: ctx.in_zone(zone, idxs())
+        points = self._points(args, where)
+        return lambda ctx, scene: bool(ctx.zones.query(points(ctx))[:, ctx.zones.slot[zone]].any())
+
+    def _compile_boxes(self, args, where):
+        cls, metric = args["class"], BOX_METRICS.get(args.get("metric"))
+        if metric is None:
+            raise ValueError(f"❌ Regla {where}: métrica de caja desconocida {args.get('metric')!r}")
+        op, value, scale = self._op(args, where), self.param(args["value"], where), args.get("scale")
+        if scale is not None and scale not in FRAME_SCALES:
+            raise ValueError(f"❌ Regla {where}: escala desconocida {scale!r}")
+
+        def fn(ctx, scene):
+            boxes = ctx.boxes(cls)
+            if not len(boxes):
+                return False
+            threshold = value()
+            if scale is not None:
+                threshold = int(self.cfg.RESIZE[FRAME_SCALES[scale]] * threshold)  # Línea en píxeles enteros
+            return bool(op(metric(boxes), threshold).any())
+        return fn
+
+    def _compile_pair(self, args, where):
+        a, b = args["a"], args["b"]
+        condition = self._compile_pair_condition(args["where"], where)
+        return lambda ctx, scene: bool(condition(ctx.relation(a, b), ctx, a, b).any())
+
+    def _compile_pair_condition(self, node, where):
+        """Condición de par compilada: función(rel, ctx, a, b) -> bool [M,N]."""
+        kind, args = _single(node, where)
+        if kind in ("all", "any"):
+            children = [self._compile_pair_condition(child, where) for child in args]
+            reduce = np.logical_and.reduce if kind == "all" else np.logical_or.reduce
+
+            def fn(rel, ctx, a, b):
+                return reduce([np.broadcast_to(c(rel, ctx, a, b), rel.shape) for c in children])
+            return fn
+        if kind == "not":
+            child = self._compile_pair_condition(args, where)
+            return lambda rel, ctx, a, b: ~np.broadcast_to(child(rel, ctx, a, b), rel.shape)
+        if kind == "compare":
+            metric, scale = args.get("metric"), args.get("scale")
+            if metric not in PAIR_METRICS or (scale is not None and scale not in PAIR_METRICS):
+                raise ValueError(f"❌ Regla {where}: métrica de par desconocida {metric!r}/{scale!r}")
+            op, value = self._op(args, where), self.param(args["value"], where)
+            if scale is None:
+                return lambda rel, ctx, a, b: op(getattr(rel, metric), value())
+            return lambda rel, ctx, a, b: op(getattr(rel, metric), getattr(rel, scale) * value())
+        if kind == "keypoints_near":
+            side = args.get("box")
+            if side not in ("a", "b"):
+                raise ValueError(f"❌ Regla {where}: 'box' debe ser 'a' o 'b'")
+            points, max_distance = self._points(args, where), self.param(args["max_distance"], where)
+
+            def fn(rel, ctx, a, b):
+                near = (point_box_distance(points(ctx), ctx.boxes(a if side == "a" else b)) <= max_distance()).any(axis=0)
+                return near[:, None] if side == "a" else near[None, :]
+            return fn
+        raise ValueError(f"❌ Regla {where}: condición de par desconocida '{kind}'")
+
+    def _compile_height_jump(self, args, where, scene):
+        """
+        Salto de altura de la (última) caja de la clase respecto al promedio de su historial
+        (historial circular de la fila de la escena en el HysteresisBank, que se vacía al
+        desactivarla), con área mínima. None si la clase no está: la escena no cuenta ese frame
+        ni como positivo ni como negativo.
+        """
+        cls = args["class"]
+        scene.bank.configure_heights(scene.row, self.param(args["buffer"], where)())
+        min_increase = self.param(args["min_increase"], where)
+        min_area = self.param(args["min_area"], where)
+
+        def fn(ctx, scene):
+            poly = ctx.poly(cls)
+            if poly is None:
+                return None
+            h = poly.bounds[3] - poly.bounds[1]
+            rows = [scene.row]
+            scene.bank.push_heights(rows, [h])
+            past = scene.bank.trailing_mean(rows, [h])[0]
+            inc_rel = (h - past) / max(past, 1.0)  # Incremento Relativo
+            return inc_rel > min_increase() and poly.area > min_area()
+        return fn
+
+
+class RuleScene(BaseScene):
+    """Escena definida por una regla declarativa; su geometría la resuelve el plan compartido."""
+
+    def __init__(self, cfg, rule, plan, bank=None):
+        self.name = rule["name"]
+        where = self.name
+        self.label = rule.get("label")
+        self.required_classes = tuple(rule.get("requires", ()))
+        self.pose_policy = rule.get("pose_policy", POSE_WHEN_ACTIVE)
+        self.priority = rule.get("priority", PRIORITY_NORMAL)
+        if self.pose_policy not in POSE_POLICIES:
+            raise ValueError(f"❌ Regla {where}: pose_policy desconocida {self.pose_policy!r}")
+
+        persistence = dict(rule.get("persistence", {}))
+        mode = persistence.pop("mode", "hysteresis")
+        if mode not in PERSISTENCE_KEYS or set(persistence) != set(PERSISTENCE_KEYS[mode]):
+            raise ValueError(f"❌ Regla {where}: persistencia inválida (modos y claves: {PERSISTENCE_KEYS})")
+        self.scene_on_key = persistence["scene_on"] if isinstance(persistence["scene_on"], str) else None
+        self._persistence = {k: plan.param(v, where) for k, v in persistence.items()}
+        super().__init__(cfg, bank)
+
+        self.plan = plan
+        self.scene_key = plan.compile(rule["scene"], where, self)
+        self.risk_key = plan.compile(rule["risk"], where, self)
+        self.draws = [self._compile_draw(item, where) for item in rule.get("draw", [])]
+
+    def persistence(self):
+        values = {k: read() for k, read in self._persistence.items()}
+        values.setdefault("scene_off", 0)
+        values.setdefault("window_sec", None)
+        return values
+
+    def scene_condition(self, ctx):
+        return self.plan.value(self.scene_key, ctx, self)
+
+    def risk_condition(self, ctx):
+        return self.plan.value(self.risk_key, ctx, self)
+
+    def draw(self, ctx, frame, risk):
+        for draw in self.draws:
+            draw(ctx, frame, risk)
+
+    # -------------------------
+    # Visualización
+    # -------------------------
+    def _compile_draw(self, item, where):
+        """
+        Elemento de visualización (solo mientras se evalúa el riesgo):
+            {"zone": "POLIGONO_...", "color_by": "risk_active"|"risk"}
+            {"text": "... {window_remaining}s", "at": [x, y]}
+            {"regions": {"class": c, "region": [fx1, fy1, fx2, fy2]}}
+            {"fingertips": {"arms": pares, "extension": v}}
+        """
+        if "zone" in item:
+            zone, by_instant = item["zone"], item.get("color_by", "risk_active") == "risk"
+            return lambda ctx, frame, risk: draw_polygon(frame, getattr(self.cfg, zone),
+                                                         active=risk if by_instant else self.risk_active)
+        if "text" in item:
+            text, at = item["text"], tuple(item.get("at", (20, 90)))
+            return lambda ctx, frame, risk: put_text(frame, text.format(window_remaining=int(self.window_remaining())), at)
+        if "regions" in item:
+            cls, region = item["regions"]["class"], item["regions"]["region"]
+
+            def draw_regions(ctx, frame, risk):
+                for x_min, y_min, x_max, y_max in box_regions(ctx.boxes(cls), region):
+                    cv2.rectangle(frame, (int(x_min), int(y_min)), (int(x_max), int(y_max)), (0, 0, 255), 2)
+            return draw_regions
+        if "fingertips" in item:
+            arms = self.plan.param(item["fingertips"]["arms"], where)
+            extension = self.plan.param(item["fingertips"]["extension"], where)
+
+            def draw_fingertips(ctx, frame, risk):
+                for pk in ctx.keypoints:
+                    for e_idx, w_idx in arms():
+                        e, w = pk[e_idx], pk[w_idx]
+                        if e[0] > 1 and w[0] > 1:
+                            tip = virtual_fingertips(np.array([[e, w]]), [(0, 1)], extension())[0]
+                            # Brazo (verde), mano proyectada y punta (azul)
+                            cv2.line(frame, (int(e[0]), int(e[1])), (int(w[0]), int(w[1])), (0, 255, 0), 2)
+                            cv2.line(frame, (int(w[0]), int(w[1])), (int(tip[0]), int(tip[1])), (255, 0, 0), 2)
+                            cv2.circle(frame, (int(tip[0]), int(tip[1])), 4, (255, 0, 0), -1)
+            return draw_fingertips
+        raise ValueError(f"❌ Regla {where}: elemento de visualización desconocido {item!r}")
@@ -15,6 +15,10 @@ worker_thread = None
 db_path = None
 
 class DBLogger:
+    def __init__(self, node_id=None):
+        # Nodo que registra los eventos (modo clúster: varios nodos escriben en el mismo almacén)
+        self.node_id = node_id
+
     def database_worker(self, db_file_path):
         """
         Este es el "worker" que se ejecuta en un hilo separado.
@@ -23,8 +27,11 @@ class DBLogger:
         # Cada hilo DEBE crear su propia conexión a SQLite
         conn = None
         try:
-            conn = sqlite3.connect(db_file_path)
+            # timeout: con el almacén compartido otros nodos pueden tener el archivo bloqueado un instante
+            conn = sqlite3.connect(db_file_path, timeout=30.0)
             cursor = conn.cursor()
+            # WAL permite que el uploader lea mientras los nodos escriben
+            cursor.execute("PRAGMA journal_mode=WAL")
             
             # Definimos la tabla (si no existe)
             # Esta tabla coincide con los datos que quieres guardar
@@ -35,9 +42,16 @@ class DBLogger:
                     scene_name TEXT,
                     scene_active BOOLEAN,
                     risk_active BOOLEAN,
-                    video_file TEXT
+                    video_file TEXT,
+                    camera_id TEXT,
+                    node_id TEXT
                 )
             """)
+            # BBDD creadas antes del modo multi-cámara / clúster no tienen camera_id ni node_id
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(riesgos)")]
+            for column in ("camera_id", "node_id"):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE riesgos ADD COLUMN {column} TEXT")
             conn.commit()
             print(f"🟢 [Logger] Hilo worker conectado a BBDD: {db_file_path}")
 
@@ -54,15 +68,15 @@ class DBLogger:
                     # print(f"DB Worker escribiendo en hilo: {threading.current_thread().name}")
                     # time.sleep(3)
                     # Desempaquetamos los datos que envía el hilo principal
-                    (scene_name, ts, scene_active, risk_active, video_file) = data
+                    (scene_name, ts, scene_active, risk_active, video_file, camera_id) = data
                     
                     # Convertimos los datos para un almacenamiento seguro
                     ts_str = str(ts)  # Convertimos timestamp/datetime a string
 
                     # Insertamos en la base de datos
                     cursor.execute(
-                        "INSERT INTO riesgos (timestamp, scene_name, scene_active, risk_active, video_file) VALUES (?, ?, ?, ?, ?)",
-                        (ts_str, scene_name, scene_active, risk_active, video_file)
+                        "INSERT INTO riesgos (timestamp, scene_name, scene_active, risk_active, video_file, camera_id, node_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (ts_str, scene_name, scene_active, risk_active, video_file, camera_id, self.node_id)
                     )
                     
                     # Hacemos commit de la transacción
@@ -79,10 +93,11 @@ class DBLogger:
                 print("🟢 [Logger] Conexión a BBDD cerrada.")
 
 
-    def start_logger(self, output_dir="logs"):
+    def start_logger(self, output_dir="logs", db_file=None):
         """
         Inicia el hilo worker de la base de datos.
         Debe llamarse una vez al inicio del programa.
+        db_file: ruta de un almacén compartido entre nodos (si no, registros_riesgos.db en output_dir).
         """
         global worker_thread, db_path
         
@@ -92,7 +107,8 @@ class DBLogger:
         # Crear un nombre de archivo único por día
         bogota = pytz.timezone("America/Bogota")
         today = datetime.now(bogota).strftime('%Y-%m-%d')
-        db_path = os.path.join(output_dir, f"registros_riesgos.db")
+        db_path = db_file or os.path.join(output_dir, f"registros_riesgos.db")
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
         
         # Iniciamos el hilo worker
         # 'daemon=True' asegura que el hilo se cierre si el script principal falla
@@ -103,13 +119,13 @@ class DBLogger:
         return db_path
 
 
-    def log_event(self, scene_name: str, ts, scene_active: bool, risk_active: bool, video_file: str):
+    def log_event(self, scene_name: str, ts, scene_active: bool, risk_active: bool, video_file: str, camera_id: str = None):
         """
         Esta es la función que tu hilo principal llamará.
         Es súper rápida porque solo pone datos en una cola (RAM).
         """
         try:
-            data = (scene_name, ts, scene_active, risk_active, video_file)
+            data = (scene_name, ts, scene_active, risk_active, video_file, camera_id)
             # data_queue.put_nowait(data) # Opción si no quieres bloquear nunca
             data_queue.put(data) # .put() es seguro y rápido
         except Exception as e:
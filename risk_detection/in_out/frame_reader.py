@@ -0,0 +1,226 @@
+# risk_detection/in_out/frame_reader.py
+import cv2
+import threading
+import time
+import sys
+import logging
+from collections import deque
+from in_out.synthetic_source import SyntheticVideoSource, is_synthetic_source, parse_synthetic_source
+from utils.frame_clock import CLOCK_CAPTURE, CLOCK_VIDEO, FRAME_CLOCKS, VideoClock
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger()
+
+LIVE_PREFIXES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+
+
+def is_live_source(source):
+    """True si la fuente es un stream en vivo (RTSP/HTTP/cámara local) y no un archivo."""
+    if is_synthetic_source(source):
+        return parse_synthetic_source(source)["realtime"]
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return True
+    return isinstance(source, str) and source.lower().startswith(LIVE_PREFIXES)
+
+
+class FrameReader:
+    """
+    Lector de video asíncrono (en un hilo) con búfer de un solo slot ("último frame").
+
+    El hilo de captura decodifica continuamente y sobrescribe el slot, de modo que
+    el hilo de inferencia siempre recibe el frame más reciente en lugar de frames
+    atrasados en el búfer de OpenCV/FFmpeg. Los frames sobrescritos sin haber sido
+    consumidos se cuentan como descartados.
+
+    Con fuentes de archivo (latest_only=False) el hilo espera a que se consuma cada
+    frame para no saltar frames del video.
+
+    Con decode_stride > 1 (modo ocioso) solo se decodifica uno de cada 'decode_stride'
+    frames; el resto se descarta con grab(), sin decodificar.
+    """
+
+    def __init__(self, source, threaded=True, latest_only=None, latency_window=300, clock=CLOCK_CAPTURE, clock_base=None):
+        self.source = source
+        self.threaded = threaded
+        self.latest_only = is_live_source(source) if latest_only is None else latest_only
+        # Timestamp de cada frame: el de captura o el del video (base + PTS; base = apertura por defecto)
+        if clock not in FRAME_CLOCKS:
+            raise ValueError(f"Reloj de frames desconocido: {clock}")
+        self.clock = clock
+        self.clock_base = clock_base
+        self._video_clock = None
+
+        self.cap = None
+        self.fps = None
+        self.frame_size = None      # (ancho, alto) nativos de la fuente
+        self.running = False
+        self.thread = None
+        self.decode_stride = 1
+
+        # Slot único compartido entre el hilo de captura y el de inferencia
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_ts = None       # time.time() del momento de captura
+        self._frame_mono = None     # time.monotonic() del momento de captura (para latencias)
+        self._frame_id = 0
+        self._last_read_id = 0
+        self._ended = False
+
+        # Contadores
+        self.frames_captured = 0
+        self.frames_consumed = 0
+        self.frames_dropped = 0
+        self.frames_skipped = 0     # Descartados con grab() sin decodificar (decode_stride)
+        self.queue_latencies = deque(maxlen=latency_window)  # segundos entre captura y consumo
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+    def open(self):
+        """Abre la fuente de video. Lanza RuntimeError si no se puede abrir."""
+        self.cap = SyntheticVideoSource(self.source) if is_synthetic_source(self.source) else cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"No se pudo abrir fuente: {self.source}")
+        if self.latest_only:
+            # Con el hilo drenando el stream, el búfer interno solo agrega latencia
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 15.0
+        self.frame_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        if self.clock == CLOCK_VIDEO:
+            self._video_clock = VideoClock(self.cap, self.clock_base, self.fps)
+        return self
+
+    def _timestamp(self):
+        """Timestamp (s) del frame recién leído según el reloj configurado."""
+        if self._video_clock is None:
+            return time.time()
+        return self._video_clock(self.frames_captured + self.frames_skipped)
+
+    def start_controller(self):
+        """Inicia el hilo de captura (si el modo hilo está activo)."""
+        if self.cap is None:
+            self.open()
+        if not self.threaded or self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run_worker, daemon=True)
+        self.thread.start()
+        logger.info(f"🟢 [FrameReader] Hilo de captura iniciado (último frame: {self.latest_only}).")
+
+    def stop_controller(self):
+        """Detiene el hilo de captura y libera la fuente."""
+        if self.running:
+            self.running = False
+            with self._cond:
+                self._cond.notify_all()
+            if self.thread:
+                self.thread.join(timeout=5.0)
+                if self.thread.is_alive():
+                    logger.error("🔴 [FrameReader] El hilo de captura no terminó a tiempo.")
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def set_decode_stride(self, stride):
+        """Decodifica uno de cada 'stride' frames (1 = todos)."""
+        self.decode_stride = max(1, int(stride))
+
+    def _read_strided(self):
+        """cap.read() precedido de decode_stride - 1 grab() (avanzan el stream sin decodificar)."""
+        for _ in range(self.decode_stride - 1):
+            if not self.cap.grab():
+                return False, None
+            self.frames_skipped += 1
+        return self.cap.read()
+
+    # -------------------------
+    # Hilo de captura (Productor)
+    # -------------------------
+    def _run_worker(self):
+        while self.running:
+            ok, frame = self._read_strided()
+            ts, mono = self._timestamp(), time.monotonic()
+
+            with self._cond:
+                if not ok:
+                    logger.warning("⚠️ [FrameReader] No se pudo leer frame de la fuente.")
+                    self._ended = True
+                    self._cond.notify_all()
+                    break
+
+                if not self.latest_only:
+                    # Modo sin pérdidas: esperar a que el consumidor tome el frame anterior
+                    while self.running and self._frame_id != self._last_read_id:
+                        self._cond.wait(timeout=0.5)
+                elif self._frame_id != self._last_read_id:
+                    self.frames_dropped += 1
+
+                self._frame = frame
+                self._frame_ts = ts
+                self._frame_mono = mono
+                self._frame_id += 1
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+        self.running = False
+
+    # -------------------------
+    # Lectura (Consumidor)
+    # -------------------------
+    def read(self, timeout=5.0):
+        """
+        Devuelve (ok, frame, ts) con el frame más reciente aún no consumido.
+        ts es el timestamp del frame (s): time.time() del momento de captura o, con clock="video",
+        el del video.
+        """
+        if not self.threaded:
+            ok, frame = self._read_strided()
+            if not ok:
+                return False, None, None
+            ts = self._timestamp()
+            self.frames_captured += 1
+            self.frames_consumed += 1
+            self.queue_latencies.append(0.0)
+            return True, frame, ts
+
+        with self._cond:
+            deadline = time.monotonic() + timeout
+            while self._frame_id == self._last_read_id and not self._ended:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"⚠️ [FrameReader] Sin frames nuevos en {timeout:.1f}s.")
+                    return False, None, None
+                self._cond.wait(timeout=remaining)
+
+            if self._frame_id == self._last_read_id:
+                return False, None, None  # Fuente terminada y sin frames pendientes
+
+            frame, ts = self._frame, self._frame_ts
+            self.queue_latencies.append(time.monotonic() - self._frame_mono)
+            self._last_read_id = self._frame_id
+            self.frames_consumed += 1
+            self._cond.notify_all()
+        return True, frame, ts
+
+    def get(self, prop):
+        """Acceso a propiedades de cv2.VideoCapture (p. ej. CAP_PROP_FPS)."""
+        return self.cap.get(prop) if self.cap is not None else 0.0
+
+    # -------------------------
+    # Métricas
+    # -------------------------
+    def stats(self):
+        """Resumen de contadores y latencia de cola (ms)."""
+        lat = sorted(self.queue_latencies)
+        return {
+            "frames_captured": self.frames_captured,
+            "frames_consumed": self.frames_consumed,
+            "frames_dropped": self.frames_dropped,
+            "frames_skipped": self.frames_skipped,
+            "queue_latency_ms_mean": round(1000 * sum(lat) / len(lat), 2) if lat else 0.0,
+            "queue_latency_ms_p95": round(1000 * lat[int(0.95 * (len(lat) - 1))], 2) if lat else 0.0,
+        }
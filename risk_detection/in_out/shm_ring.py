@@ -0,0 +1,110 @@
+# risk_detection/in_out/shm_ring.py
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+
+class SharedFrameRing:
+    """
+    Anillo de frames en memoria compartida para mover imágenes entre procesos sin
+    serializarlas (pickle). Solo viaja por las colas el número de secuencia.
+
+    Cada slot tiene una cabecera con la secuencia escrita (protocolo tipo seqlock):
+    el escritor marca el slot como inválido (-1) mientras copia y luego publica la
+    secuencia. Un lector valida con is_valid(seq) que el slot no se sobrescribió
+    mientras lo usaba; si el lector va más de 'n_slots' frames atrasado, pierde el frame.
+    """
+
+    def __init__(self, n_slots, shape, dtype=np.uint8, name=None, create=True):
+        self.n_slots = int(n_slots)
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        header_bytes = self.n_slots * 16  # int64 seq + float64 ts por slot
+        self.owner = create
+
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + self.n_slots * self.frame_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # El resource_tracker registra también los segmentos adjuntados y los borraría al
+            # salir este proceso; solo el creador debe liberarlos.
+            try:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+
+        self.name = self.shm.name
+        self._seqs = np.ndarray((self.n_slots,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self._ts = np.ndarray((self.n_slots,), dtype=np.float64, buffer=self.shm.buf, offset=self.n_slots * 8)
+        self._frames = np.ndarray((self.n_slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=header_bytes)
+        if create:
+            self._seqs[:] = -1
+            self._ts[:] = 0.0
+        self._next_seq = 0
+
+    @classmethod
+    def attach(cls, spec):
+        """Se adjunta a un anillo existente a partir de su spec() (desde otro proceso)."""
+        return cls(spec["n_slots"], spec["shape"], spec["dtype"], name=spec["name"], create=False)
+
+    def spec(self):
+        """Descripción serializable para adjuntarse desde otro proceso."""
+        return {"name": self.name, "n_slots": self.n_slots, "shape": self.shape, "dtype": self.dtype.str}
+
+    # -------------------------
+    # Escritura (un solo productor)
+    # -------------------------
+    def slot_for_write(self):
+        """Reserva el siguiente slot y devuelve (seq, vista) para escribir el frame en sitio."""
+        seq = self._next_seq
+        idx = seq % self.n_slots
+        self._seqs[idx] = -1
+        return seq, self._frames[idx]
+
+    def commit(self, seq, ts):
+        """Publica el slot escrito con slot_for_write()."""
+        idx = seq % self.n_slots
+        self._ts[idx] = ts
+        self._seqs[idx] = seq
+        self._next_seq = seq + 1
+
+    def write(self, frame, ts):
+        seq, view = self.slot_for_write()
+        np.copyto(view, frame)
+        self.commit(seq, ts)
+        return seq
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+    def is_valid(self, seq):
+        return self._seqs[seq % self.n_slots] == seq
+
+    def view(self, seq):
+        """Vista (sin copia) del frame 'seq', o None si ya se sobrescribió."""
+        if not self.is_valid(seq):
+            return None
+        return self._frames[seq % self.n_slots]
+
+    def timestamp(self, seq):
+        return float(self._ts[seq % self.n_slots])
+
+    def copy_to(self, seq, dst):
+        """Copia el frame 'seq' en 'dst'. Devuelve False si el slot se sobrescribió."""
+        view = self.view(seq)
+        if view is None:
+            return False
+        np.copyto(dst, view)
+        return self.is_valid(seq)
+
+    # -------------------------
+    # Limpieza
+    # -------------------------
+    def close(self):
+        self._seqs = self._ts = self._frames = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
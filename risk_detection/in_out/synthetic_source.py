@@ -0,0 +1,184 @@
+# risk_detection/in_out/synthetic_source.py
+import cv2
+import time
+import numpy as np
+from urllib.parse import urlparse, parse_qs
+
+SYNTHETIC_SCHEME = "synthetic://"
+
+
+def is_synthetic_source(source):
+    return isinstance(source, str) and source.startswith(SYNTHETIC_SCHEME)
+
+
+def parse_synthetic_source(source):
+    """
+    Interpreta una URI 'synthetic://[ruta_video]?param=valor&...'.
+
+    Parámetros:
+        fps               FPS de salida (por defecto el del archivo o 15)
+        width, height     Resolución de salida (por defecto la del archivo o 1920x1080)
+        realtime          1 = respeta el reloj a 'fps' (como una cámara); 0 = lo más rápido posible
+        loop              1 = reinicia el archivo al terminar
+        stall_every       Cada cuántos segundos se congela la fuente (0 = nunca)
+        stall_sec         Duración de cada congelamiento
+        disconnect_after  Segundos hasta simular una desconexión (read() devuelve False)
+        seed              Semilla para los frames generados
+    """
+    parsed = urlparse(source)
+    path = (parsed.netloc + parsed.path).strip() or None
+    params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+    return {
+        "path": path,
+        "fps": float(params["fps"]) if "fps" in params else None,
+        "width": int(params["width"]) if "width" in params else None,
+        "height": int(params["height"]) if "height" in params else None,
+        "realtime": params.get("realtime", "1") == "1",
+        "loop": params.get("loop", "1") == "1",
+        "stall_every": float(params.get("stall_every", 0)),
+        "stall_sec": float(params.get("stall_sec", 0)),
+        "disconnect_after": float(params.get("disconnect_after", 0)),
+        "seed": int(params.get("seed", 0)),
+    }
+
+
+class SyntheticVideoSource:
+    """
+    Fuente de video sintética con la misma interfaz que cv2.VideoCapture
+    (isOpened, read, grab, retrieve, get, set, release).
+
+    Reproduce en bucle un archivo local o genera frames con objetos en movimiento,
+    a un FPS y resolución configurables, en tiempo real o lo más rápido posible,
+    e inyecta congelamientos y desconexiones para pruebas de carga sin cámara.
+    """
+
+    def __init__(self, source):
+        opts = parse_synthetic_source(source) if isinstance(source, str) else dict(source)
+        self.path = opts["path"]
+        self.realtime = opts["realtime"]
+        self.loop = opts["loop"]
+        self.stall_every = opts["stall_every"]
+        self.stall_sec = opts["stall_sec"]
+        self.disconnect_after = opts["disconnect_after"]
+
+        self.cap = None
+        if self.path:
+            self.cap = cv2.VideoCapture(self.path)
+            if not self.cap.isOpened():
+                self.cap = None
+                self.opened = False
+                return
+        src_fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap else 0
+        src_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) if self.cap else 1920
+        src_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) if self.cap else 1080
+        self.fps = opts["fps"] or src_fps or 15.0
+        self.width = opts["width"] or src_w
+        self.height = opts["height"] or src_h
+
+        self.opened = True
+        self.frame_index = 0
+        self.stalls_injected = 0
+        self._t_start = time.monotonic()
+        self._next_due = self._t_start
+        self._next_stall = self._t_start + self.stall_every if self.stall_every > 0 else None
+        self._pending = None
+
+        rng = np.random.default_rng(opts["seed"])
+        self._background = rng.integers(40, 90, size=(self.height, self.width, 3), dtype=np.uint8)
+        self._colors = [tuple(int(c) for c in rng.integers(0, 255, 3)) for _ in range(6)]
+
+    # -------------------------
+    # Interfaz cv2.VideoCapture
+    # -------------------------
+    def isOpened(self):
+        return self.opened
+
+    def grab(self):
+        if not self.opened:
+            return False
+        if self.disconnect_after > 0 and time.monotonic() - self._t_start >= self.disconnect_after:
+            self.opened = False  # Desconexión simulada
+            return False
+        self._pace()
+        frame = self._next_frame()
+        if frame is None:
+            self.opened = False
+            return False
+        self._pending = frame
+        self.frame_index += 1
+        return True
+
+    def retrieve(self, image=None):
+        if self._pending is None:
+            return False, None
+        frame, self._pending = self._pending, None
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.frame_index
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return 1000.0 * self.frame_index / self.fps
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.opened = False
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    # -------------------------
+    # Generación y ritmo
+    # -------------------------
+    def _pace(self):
+        """Respeta el FPS en modo tiempo real e inyecta congelamientos periódicos."""
+        now = time.monotonic()
+        if self._next_stall is not None and now >= self._next_stall:
+            time.sleep(self.stall_sec)
+            self.stalls_injected += 1
+            now = time.monotonic()
+            self._next_stall = now + self.stall_every
+            self._next_due = now
+        if self.realtime:
+            if self._next_due > now:
+                time.sleep(self._next_due - now)
+            self._next_due = max(self._next_due, now) + 1.0 / self.fps
+
+    def _next_frame(self):
+        if self.cap is not None:
+            ok, frame = self.cap.read()
+            if not ok and self.loop:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = self.cap.read()
+            if not ok:
+                return None
+            if frame.shape[1] != self.width or frame.shape[0] != self.height:
+                frame = cv2.resize(frame, (self.width, self.height))
+            return frame
+
+        frame = self._background.copy()
+        t = self.frame_index / self.fps
+        for i, color in enumerate(self._colors):
+            cx = int((0.5 + 0.4 * np.sin(0.3 * t + i)) * self.width)
+            cy = int((0.5 + 0.35 * np.cos(0.2 * t + 1.7 * i)) * self.height)
+            half = int(0.04 * self.width) + 6 * i
+            cv2.rectangle(frame, (cx - half, cy - half), (cx + half, cy + half), color, -1)
+        cv2.putText(frame, f"synthetic #{self.frame_index}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        return frame
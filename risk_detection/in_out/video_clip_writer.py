@@ -19,8 +19,13 @@ class VideoClipWriter:
     """
     Un controlador asíncrono (en un hilo) para grabar clips de video.
     Maneja múltiples grabaciones de "escenas" simultáneamente.
+
+    Los frames llegan como FrameSlot (utils.frame_pool) compartidos con el pre-roll:
+    el writer retiene cada slot al encolarlo y lo libera al escribirlo o descartarlo.
     """
 
+    FRAME_QUEUE_SIZE = 120
+
     def __init__(self, cfg):
         self.cfg = cfg
         self.running = False
@@ -28,7 +33,7 @@ class VideoClipWriter:
         
         # Dos colas: una para comandos (START/STOP) y otra para frames
         self.command_queue = queue.Queue()
-        self.frame_queue = queue.Queue(maxsize=120) # maxsize previene uso de RAM infinito si el hilo se atora
+        self.frame_queue = queue.Queue(maxsize=self.FRAME_QUEUE_SIZE) # maxsize previene uso de RAM infinito si el hilo se atora
         
         # Diccionario para almacenar los grabadores de video activos
         # Clave: scene_name (str)
@@ -60,6 +65,9 @@ class VideoClipWriter:
             if self.thread.is_alive():
                 logger.error("🔴 [ClipWriter] El hilo no pudo detenerse a tiempo.")
         
+        # Liberar los slots que hayan quedado en las colas
+        self._drain_queues()
+
         # Cerrar todos los archivos de video que hayan quedado abiertos
         for writer, file_path in self.active_writers.values():
             try:
@@ -72,20 +80,23 @@ class VideoClipWriter:
 
     # --- Métodos llamados por el Hilo Principal (Productor) ---
 
-    def put_frame(self, frame):
-        """Añade un frame a la cola de frames (no bloqueante)."""
+    def put_frame(self, slot):
+        """Añade un frame (FrameSlot) a la cola de frames (no bloqueante)."""
         if not self.running: return
+        slot.retain()
         try:
-            self.frame_queue.put_nowait(frame)
+            self.frame_queue.put_nowait(slot)
         except queue.Full:
             # Esto es normal si el hilo de I/O se atrasa.
-            # Se descarta el frame más antiguo para priorizar el tiempo real.
-            pass 
+            # Se descarta el frame más reciente para priorizar el tiempo real.
+            slot.release()
 
     def start_clip(self, scene_name, pre_roll_frames, video_file_name):
         """Envía un comando para INICIAR la grabación de un clip (no bloqueante)."""
         if not self.running: return
         logger.debug(f"[ClipWriter] Comando START recibido para: {scene_name}")
+        for slot in pre_roll_frames:
+            slot.retain()
         self.command_queue.put(("START", scene_name, (pre_roll_frames, video_file_name)))
 
     def stop_clip(self, scene_name):
@@ -125,13 +136,16 @@ class VideoClipWriter:
                     # Si no hay grabaciones activas, vaciar la cola de frames
                     # para evitar que el búfer de pre-roll crezca indefinidamente
                     while not self.frame_queue.empty():
-                        self.frame_queue.get_nowait()
+                        self.frame_queue.get_nowait().release()
                 else:
                     # Si hay grabaciones, escribir frames
                     while not self.frame_queue.empty():
-                        frame = self.frame_queue.get_nowait()
-                        for writer, _ in self.active_writers.values():
-                            writer.write(frame)
+                        slot = self.frame_queue.get_nowait()
+                        try:
+                            for writer, _ in self.active_writers.values():
+                                writer.write(slot.array)
+                        finally:
+                            slot.release()
             
             except queue.Empty:
                 pass # No hay frames, continuar
@@ -142,8 +156,31 @@ class VideoClipWriter:
             # en un bucle vacío si no hay frames/comandos.
             time.sleep(0.001)
 
+    def _drain_queues(self):
+        """Vacía ambas colas liberando los slots retenidos."""
+        while not self.frame_queue.empty():
+            try:
+                self.frame_queue.get_nowait().release()
+            except queue.Empty:
+                break
+        while not self.command_queue.empty():
+            try:
+                cmd, _, data = self.command_queue.get_nowait()
+            except queue.Empty:
+                break
+            if cmd == "START":
+                for slot in data[0]:
+                    slot.release()
+
     def _handle_start(self, scene_name, pre_roll_frames, video_file_name):
         """Lógica para iniciar una grabación (llamado por el worker)."""
+        try:
+            self._start_writer(scene_name, pre_roll_frames, video_file_name)
+        finally:
+            for slot in pre_roll_frames:
+                slot.release()
+
+    def _start_writer(self, scene_name, pre_roll_frames, video_file_name):
         if scene_name in self.active_writers:
             logger.warning(f"[ClipWriter] 'START' ignorado: {scene_name} ya está grabando.")
             return
@@ -154,7 +191,7 @@ class VideoClipWriter:
                 logger.error(f"[ClipWriter] No se puede iniciar {scene_name}: búfer de pre-roll vacío.")
                 return
             
-            first_frame = pre_roll_frames[0]
+            first_frame = pre_roll_frames[0].array
             height, width, _ = first_frame.shape
             # Asumimos que el FPS del pre-roll es el FPS de grabación
             fps = len(pre_roll_frames) / max(self.cfg.CLIP_PREROLL_SEC, 1.0)
@@ -172,8 +209,8 @@ class VideoClipWriter:
                 raise IOError(f"cv2.VideoWriter no pudo abrir el archivo: {file_path}")
 
             # Escribir el búfer de pre-roll
-            for frame in pre_roll_frames:
-                writer.write(frame)
+            for slot in pre_roll_frames:
+                writer.write(slot.array)
                 
             # Añadir a la lista de grabadores activos
             self.active_writers[scene_name] = (writer, file_path)
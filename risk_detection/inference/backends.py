@@ -0,0 +1,271 @@
+# risk_detection/inference/backends.py
+"""
+Backends de inferencia de un modelo YOLO (INFERENCE_BACKEND):
+    torch   ultralytics.YOLO sobre PyTorch (ruta original, CPU o CUDA).
+    onnx    Los pesos .pt se exportan a ONNX una sola vez (caché junto a trained_model/)
+            y se ejecutan con ONNX Runtime en CPU, con optimización de grafo completa y
+            los hilos intra-op de cada modelo (INFERENCE_THREADS_OBJ / INFERENCE_THREADS_POSE).
+            Con MODEL_PRECISION="int8" usa las variantes cuantizadas por tools/quantize_models.py.
+Ambos devuelven lo mismo que espera el motor: sv.Detections con 'class_name' o PoseResult,
+en coordenadas del frame.
+"""
+import os
+import ast
+import sys
+import shutil
+import hashlib
+import logging
+
+import numpy as np
+from supervision import Detections
+
+from inference.results import PoseResult
+from inference.preprocess import PreprocessedBatch
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+NMS_IOU = 0.7          # Mismos valores por defecto que ultralytics
+NMS_MAX_WH = 7680      # Desplazamiento por clase para un NMS por clase en una sola pasada
+MAX_DET = 300
+KEYPOINT_VISIBLE = 0.5  # ultralytics lleva a (0, 0) los keypoints con confianza menor
+MODEL_PRECISIONS = ("fp32", "int8")
+INT8_SOURCE_KEY = "fp32_sha256"  # Metadato del .int8.onnx: hash del .onnx FP32 del que se cuantizó
+
+
+def class_names(names):
+    """Arreglo id → nombre de clase a partir del dict 'names' del modelo (para indexar con class_id)."""
+    return np.array([names[i] for i in range(len(names))])
+
+
+def to_detections(result, names=None):
+    """
+    Convierte un Results de ultralytics a sv.Detections con 'class_name' en data.
+    'names': arreglo de class_names() precalculado (si no, se arma con result.names).
+    """
+    det_obj = Detections.from_ultralytics(result)
+    names = class_names(result.names) if names is None else names
+    det_obj.data["class_name"] = names[det_obj.class_id.astype(int)]
+    return det_obj
+
+
+def model_weights(kind, cfg):
+    return cfg.MODEL_OBJ if kind == "objects" else cfg.MODEL_POSE
+
+
+def model_threads(kind, cfg):
+    return cfg.INFERENCE_THREADS_OBJ if kind == "objects" else cfg.INFERENCE_THREADS_POSE
+
+
+# -------------------------
+# PyTorch (ultralytics)
+# -------------------------
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, kind, cfg):
+        self.kind = kind
+        self.cfg = cfg
+        self.model = None
+        self.names = None
+
+    def load(self):
+        from ultralytics import YOLO
+        self.model = YOLO(model_weights(self.kind, self.cfg))
+        self.names = class_names(self.model.names)
+        return self
+
+    def predict(self, frames, conf, imgsz):
+        if not isinstance(frames, PreprocessedBatch):
+            results = self.model(frames, device=self.cfg.DEVICE, conf=conf, imgsz=imgsz, verbose=False)
+            if self.kind == "objects":
+                return [to_detections(r, self.names) for r in results]
+            return [PoseResult.from_ultralytics(r) for r in results]
+
+        # Lote ya preprocesado: ultralytics no repite el letterbox y las coordenadas se llevan al frame aquí
+        results = self.model(frames.tensor(self.cfg.DEVICE), device=self.cfg.DEVICE, conf=conf, verbose=False)
+        outputs = []
+        for r, info in zip(results, frames.infos):
+            if self.kind == "objects":
+                det_obj = to_detections(r, self.names)
+                det_obj.xyxy = info.boxes_to_frame(det_obj.xyxy)
+                outputs.append(det_obj)
+            else:
+                pose = PoseResult.from_ultralytics(r)
+                pose.keypoints.data[..., :2] = info.points_to_frame(pose.keypoints.xy)
+                pose.boxes_xyxy = info.boxes_to_frame(pose.boxes_xyxy)
+                outputs.append(pose)
+        return outputs
+
+
+# -------------------------
+# ONNX Runtime (CPU)
+# -------------------------
+def onnx_cache_path(weights, cfg):
+    """Ruta del .onnx exportado: ONNX_CACHE_DIR o una carpeta 'onnx' junto a los pesos."""
+    cache_dir = cfg.ONNX_CACHE_DIR or os.path.join(os.path.dirname(weights), "onnx")
+    return os.path.join(cache_dir, os.path.splitext(os.path.basename(weights))[0] + ".onnx")
+
+
+def int8_path(onnx_path):
+    """Ruta de la variante INT8 de un .onnx FP32 (misma carpeta de caché)."""
+    return os.path.splitext(onnx_path)[0] + ".int8.onnx"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def int8_is_current(fp32_path, path, meta):
+    """
+    True si el modelo INT8 se cuantizó del .onnx FP32 actual: por el hash guardado en sus
+    metadatos o, en modelos cuantizados sin él, porque no es más viejo que el FP32.
+    """
+    if INT8_SOURCE_KEY in meta:
+        return meta[INT8_SOURCE_KEY] == file_sha256(fp32_path)
+    return os.path.getmtime(path) >= os.path.getmtime(fp32_path)
+
+
+def export_onnx(weights, cfg):
+    """Exporta los pesos a ONNX (ejes dinámicos) solo si no hay caché o los pesos son más nuevos."""
+    path = onnx_cache_path(weights, cfg)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(weights):
+        return path
+    from ultralytics import YOLO
+    logger.info(f"📦 [ONNX] Exportando {weights} → {path}")
+    exported = YOLO(weights).export(format="onnx", dynamic=True, simplify=True, imgsz=cfg.MODEL_IMGSZ, device="cpu")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.abspath(exported) != os.path.abspath(path):
+        shutil.move(exported, path)
+    return path
+
+
+def _xywh_to_xyxy(xywh):
+    xyxy = np.empty_like(xywh)
+    xyxy[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+    xyxy[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+    return xyxy
+
+
+def nms(boxes, scores, iou_thres=NMS_IOU):
+    """Índices que sobreviven al NMS, de mayor a menor score."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_thres]
+    return np.array(keep, dtype=np.int64)
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, kind, cfg):
+        self.kind = kind
+        self.cfg = cfg
+        self.session = None
+        self.input_name = None
+        self.names = {}
+        self.name_array = None
+        self.kpt_shape = (17, 3)
+
+    def load(self):
+        import onnxruntime as ort
+        path = fp32_path = export_onnx(model_weights(self.kind, self.cfg), self.cfg)
+        if self.cfg.MODEL_PRECISION == "int8":
+            path = int8_path(fp32_path)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No existe el modelo INT8 {path}; genérelo con 'python -m tools.quantize_models'")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1   # Un solo grafo secuencial: todo el presupuesto va a intra-op
+        threads = model_threads(self.kind, self.cfg)
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        meta = self.session.get_modelmeta().custom_metadata_map
+        if path != fp32_path and not int8_is_current(fp32_path, path, meta):
+            self.session = None
+            raise RuntimeError(f"El modelo INT8 {path} se cuantizó de otros pesos (el FP32 se reexportó); "
+                               f"vuelva a generarlo con 'python -m tools.quantize_models'")
+        self.names = ast.literal_eval(meta["names"])
+        self.name_array = class_names(self.names)
+        if "kpt_shape" in meta:
+            self.kpt_shape = tuple(ast.literal_eval(meta["kpt_shape"]))
+        logger.info(f"🟢 [ONNX] Sesión {self.kind} lista ({os.path.basename(path)}, {self.cfg.MODEL_PRECISION}, hilos: {threads or 'auto'})")
+        return self
+
+    def predict(self, frames, conf, imgsz):
+        if not isinstance(frames, PreprocessedBatch):
+            frames = PreprocessedBatch.from_frames(frames, imgsz)
+        x = frames.images.transpose(0, 3, 1, 2).astype(np.float32)
+        x *= 1.0 / 255.0
+        preds = self.session.run(None, {self.input_name: x})[0]   # [B, 4 + clases (+ K*3), anclas]
+        decode = self._decode_objects if self.kind == "objects" else self._decode_pose
+        return [decode(pred.T, conf, info) for pred, info in zip(preds, frames.infos)]
+
+    def _candidates(self, pred, scores, conf):
+        """Anclas sobre el umbral tras NMS por clase: (índices, clases, scores)."""
+        cls = scores.argmax(axis=1)
+        score = scores[np.arange(len(scores)), cls]
+        idx = np.flatnonzero(score > conf)
+        boxes = _xywh_to_xyxy(pred[idx, :4])
+        keep = nms(boxes + cls[idx, None] * NMS_MAX_WH, score[idx])[:MAX_DET]
+        return idx[keep], cls[idx[keep]], score[idx[keep]]
+
+    def _decode_objects(self, pred, conf, info):
+        idx, cls, score = self._candidates(pred, pred[:, 4:4 + len(self.names)], conf)
+        det_obj = Detections(
+            xyxy=info.boxes_to_frame(_xywh_to_xyxy(pred[idx, :4])),
+            confidence=score.astype(np.float32),
+            class_id=cls.astype(int),
+        )
+        det_obj.data["class_name"] = self.name_array[det_obj.class_id]
+        return det_obj
+
+    def _decode_pose(self, pred, conf, info):
+        nc = len(self.names)
+        idx, _, score = self._candidates(pred, pred[:, 4:4 + nc], conf)
+        if not len(idx):
+            return PoseResult.empty()
+        kps = pred[idx, 4 + nc:].reshape(len(idx), *self.kpt_shape).copy()
+        if kps.shape[-1] == 2:  # Modelos sin confianza por keypoint
+            kps = np.concatenate([kps, np.ones(kps.shape[:2] + (1,), dtype=kps.dtype)], axis=-1)
+        kps[..., :2][kps[..., 2] < KEYPOINT_VISIBLE] = 0
+        kps[..., :2] = info.points_to_frame(kps[..., :2])
+        return PoseResult(kps, info.boxes_to_frame(_xywh_to_xyxy(pred[idx, :4])), score)
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def make_backend(kind, cfg):
+    if cfg.MODEL_PRECISION not in MODEL_PRECISIONS:
+        raise ValueError(f"MODEL_PRECISION desconocida: {cfg.MODEL_PRECISION} (opciones: {MODEL_PRECISIONS})")
+    if cfg.MODEL_PRECISION != "fp32" and cfg.INFERENCE_BACKEND != "onnx":
+        raise ValueError(f"MODEL_PRECISION={cfg.MODEL_PRECISION} requiere INFERENCE_BACKEND=onnx")
+    try:
+        return BACKENDS[cfg.INFERENCE_BACKEND](kind, cfg)
+    except KeyError:
+        raise ValueError(f"INFERENCE_BACKEND desconocido: {cfg.INFERENCE_BACKEND} (opciones: {list(BACKENDS)})")
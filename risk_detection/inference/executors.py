@@ -0,0 +1,398 @@
+# risk_detection/inference/executors.py
+import sys
+import signal
+import logging
+import threading
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from inference.backends import make_backend
+from inference.results import PoseResult
+from inference.preprocess import PreprocessedBatch
+from inference.pose_crops import merge_crop_poses
+from in_out.shm_ring import SharedFrameRing
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+MODEL_KINDS = ("objects", "pose")
+
+
+def _set_thread_budget(threads):
+    """Hilos intra-op de torch para este proceso (0 = valor por defecto de torch)."""
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+
+
+class SingleModel:
+    """Un modelo YOLO (objetos o pose) sobre el backend configurado (INFERENCE_BACKEND)."""
+
+    def __init__(self, kind, cfg):
+        self.kind = kind
+        self.cfg = cfg
+        self.backend = make_backend(kind, cfg)
+
+    def load(self):
+        self.backend.load()
+        return self
+
+    def predict(self, frames, imgsz=None):
+        """
+        Lista de sv.Detections (objetos) o de PoseResult (pose), una por frame.
+        'frames' es una lista de frames BGR o un PreprocessedBatch compartido entre modelos.
+        'imgsz' permite otro tamaño de entrada (recortes de pose).
+        """
+        conf = self.cfg.CONF_OBJ if self.kind == "objects" else self.cfg.CONF_POSE
+        return self.backend.predict(frames, conf, imgsz or self.cfg.MODEL_IMGSZ)
+
+
+def preprocess(cfg, frames):
+    """Letterbox una sola vez para todos los modelos (SHARED_PREPROCESS); si no, los frames tal cual."""
+    if not cfg.SHARED_PREPROCESS:
+        return frames
+    batch = PreprocessedBatch.from_frames(frames, cfg.MODEL_IMGSZ)
+    if cfg.INFERENCE_BACKEND == "torch":
+        batch.tensor(cfg.DEVICE)  # Se crea antes de repartir el lote entre hilos
+    return batch
+
+
+def subset(frames, indices):
+    """Sub-lote de una lista de frames o de un PreprocessedBatch (None = todos)."""
+    if indices is None:
+        return frames
+    if isinstance(frames, PreprocessedBatch):
+        return frames.subset(indices)
+    return [frames[i] for i in indices]
+
+
+def crop_rois(frames, rois):
+    """Recorta cada frame a su ROI del detector. Devuelve (recortes, desplazamientos) o (frames, None) sin ROI."""
+    if not rois or all(roi is None for roi in rois):
+        return frames, None
+    crops, offsets = [], []
+    for frame, roi in zip(frames, rois):
+        if roi is None:
+            crops.append(frame)
+            offsets.append((0, 0))
+        else:
+            x1, y1, x2, y2 = roi
+            crops.append(frame[y1:y2, x1:x2])
+            offsets.append((x1, y1))
+    return crops, offsets
+
+
+def shift_detections(det_obj, offset):
+    """Lleva las cajas del detector de coordenadas de la ROI a coordenadas del frame."""
+    x, y = offset
+    if (x or y) and len(det_obj):
+        det_obj.xyxy = det_obj.xyxy + np.array([x, y, x, y], dtype=det_obj.xyxy.dtype)
+    return det_obj
+
+
+# ============================================================
+# Ejecutores: cómo se reparten los dos modelos sobre el lote
+# ============================================================
+class SequentialExecutor:
+    """Objetos y luego pose en el mismo hilo (latencia = suma de ambos modelos)."""
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.models = {}
+
+    def start(self):
+        _set_thread_budget(self._thread_budget())
+        self.models = {kind: SingleModel(kind, self.cfg).load() for kind in MODEL_KINDS}
+        return self
+
+    def _thread_budget(self):
+        """Hilos intra-op del proceso: los modelos corren de a uno, basta el mayor de los dos."""
+        return max(self.cfg.INFERENCE_THREADS_OBJ, self.cfg.INFERENCE_THREADS_POSE)
+
+    def predict(self, frames, pose_needed=None, pose_regions=None, rois=None):
+        """
+        Devuelve (objetos, pose), una entrada por frame. Con 'pose_needed' (pose perezosa)
+        primero corre el detector y la pose solo sobre los frames para los que
+        pose_needed(objetos) devuelve True; el resto recibe un PoseResult vacío.
+        Con 'pose_regions' la pose corre sobre los recortes que pose_regions(objetos)
+        indique por frame (None = frame completo) y se une en coordenadas del frame.
+        'rois' (una caja xyxy o None por frame) limita el detector a esa región; sus cajas
+        se devuelven en coordenadas del frame.
+        """
+        obj_frames, offsets = crop_rois(frames, rois)
+        if offsets is None:
+            batch = self._prepare(frames)
+            if pose_needed is None and pose_regions is None:
+                return self._run_both(batch)
+            res_obj = self._run_model("objects", batch)
+        else:
+            # El detector ve solo su ROI; la pose sigue necesitando el frame completo (lote propio)
+            res_obj = self._run_model("objects", self._prepare(obj_frames, "objects"))
+            res_obj = [shift_detections(det_obj, offset) for det_obj, offset in zip(res_obj, offsets)]
+            batch = None
+        needed = pose_needed(res_obj) if pose_needed is not None else [True] * len(res_obj)
+        indices = [i for i, need in enumerate(needed) if need]
+        res_pose = [PoseResult.empty() for _ in res_obj]
+        if not indices:
+            return res_obj, res_pose
+
+        regions = pose_regions(res_obj) if pose_regions is not None else [None] * len(res_obj)
+        full = [i for i in indices if regions[i] is None]
+        if full:
+            if batch is None:
+                batch = self._prepare(frames, "pose")
+            for i, pose in zip(full, self._run_model("pose", batch, full)):
+                res_pose[i] = pose
+
+        # Recortes agrupados por tamaño de entrada (una pasada del modelo por grupo)
+        jobs = {}
+        for i in indices:
+            for box, imgsz in regions[i] or ():
+                jobs.setdefault(imgsz, []).append((i, box))
+        per_frame = {}
+        for imgsz, group in jobs.items():
+            crops = [frames[i][box[1]:box[3], box[0]:box[2]] for i, box in group]
+            for (i, box), pose in zip(group, self._run_crops(crops, imgsz)):
+                per_frame.setdefault(i, ([], []))
+                per_frame[i][0].append(box)
+                per_frame[i][1].append(pose)
+        for i in indices:
+            if regions[i] is not None:
+                boxes, poses = per_frame.get(i, ([], []))
+                res_pose[i] = merge_crop_poses(boxes, poses)
+        return res_obj, res_pose
+
+    def _prepare(self, frames, key="shared"):
+        return preprocess(self.cfg, frames)
+
+    def _run_model(self, kind, batch, indices=None):
+        return self.models[kind].predict(subset(batch, indices))
+
+    def _run_both(self, batch):
+        return self._run_model("objects", batch), self._run_model("pose", batch)
+
+    def _run_crops(self, crops, imgsz):
+        return self.models["pose"].predict(crops, imgsz=imgsz)
+
+    def stop(self):
+        self.models = {}
+
+
+class ThreadExecutor(SequentialExecutor):
+    """
+    Ambos modelos a la vez en un pool de dos hilos. torch libera el GIL dentro de los
+    operadores, así que la latencia se acerca a la del modelo más lento. El presupuesto
+    de hilos intra-op de torch es del proceso: se fija a la suma de ambos modelos.
+    Con pose perezosa o ROI del detector los modelos van en secuencia (la pose depende
+    del detector o usa otro lote).
+    """
+
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.pool = None
+
+    def _thread_budget(self):
+        return self.cfg.INFERENCE_THREADS_OBJ + self.cfg.INFERENCE_THREADS_POSE
+
+    def start(self):
+        super().start()
+        self.pool = ThreadPoolExecutor(max_workers=len(MODEL_KINDS), thread_name_prefix="inference")
+        return self
+
+    def _run_both(self, batch):
+        futures = {kind: self.pool.submit(self._run_model, kind, batch) for kind in MODEL_KINDS}
+        return futures["objects"].result(), futures["pose"].result()
+
+    def stop(self):
+        if self.pool:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        super().stop()
+
+
+def _model_process(kind, cfg, threads, conn):
+    """Proceso dedicado a un modelo: lee los frames del anillo compartido y devuelve sus resultados."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # El proceso principal coordina el apagado
+    cfg.apply_thread_settings()
+    _set_thread_budget(threads)
+    model = SingleModel(kind, cfg).load()
+    rings = {}
+    conn.send(("ready", kind))
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            if msg[0] == "attach":
+                _, key, spec = msg
+                if key in rings:
+                    rings[key].close()
+                rings[key] = SharedFrameRing.attach(spec)
+                continue
+            # ("run", anillo, seq, infos, indices): lote preprocesado en el anillo
+            # ("frames", frames, indices): frames serializados
+            # ("crops", recortes, imgsz): recortes de pose
+            imgsz = None
+            if msg[0] == "run":
+                _, key, seq, infos, indices = msg
+                frames = subset(PreprocessedBatch(rings[key].view(seq), infos), indices)
+            elif msg[0] == "crops":
+                _, frames, imgsz = msg
+            else:
+                _, frames, indices = msg
+                frames = subset(frames, indices)
+            try:
+                conn.send(("ok", model.predict(frames, imgsz=imgsz)))
+            except Exception as e:
+                conn.send(("error", repr(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for ring in rings.values():
+            ring.close()
+
+
+class ProcessExecutor(SequentialExecutor):
+    """
+    Cada modelo en su propio proceso con su propio presupuesto de hilos intra-op.
+    El lote se preprocesa (letterbox) una sola vez directamente en memoria compartida
+    que ambos procesos leen (con ROI del detector, un anillo por lote); solo viajan por las tuberías el número de secuencia, la
+    transformación de cada frame y los resultados.
+    """
+
+    worker = staticmethod(_model_process)   # Función de cada proceso de modelo
+
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.ctx = mp.get_context("spawn")
+        self.threads = {"objects": cfg.INFERENCE_THREADS_OBJ, "pose": cfg.INFERENCE_THREADS_POSE}
+        self.procs = {}
+        self.conns = {}
+        self.rings = {}
+        self.lock = threading.Lock()
+
+    def start(self):
+        for kind in MODEL_KINDS:
+            parent, child = self.ctx.Pipe()
+            proc = self.ctx.Process(target=self.worker, args=(kind, self.cfg, self.threads[kind], child),
+                                    name=f"model-{kind}", daemon=True)
+            proc.start()
+            child.close()  # Sin este extremo abierto en el padre, la muerte del hijo llega como EOFError
+            self.procs[kind], self.conns[kind] = proc, parent
+        for kind in MODEL_KINDS:
+            try:
+                self.conns[kind].recv()  # Espera a que el modelo esté cargado
+            except EOFError:
+                raise RuntimeError(f"El proceso del modelo {kind} terminó al cargar el modelo")
+        for key, ring in self.rings.items():
+            for conn in self.conns.values():
+                conn.send(("attach", key, ring.spec()))
+        logger.info(f"🟢 [Inferencia] Procesos de modelos iniciados (hilos: {self.threads})")
+        return self
+
+    def restart(self):
+        """Reinicia ambos procesos de modelos (tuberías nuevas: descarta respuestas pendientes del lote fallido)."""
+        self._stop_processes(timeout=2.0)
+        return self.start()
+
+    def _ensure_ring(self, key, shape):
+        ring = self.rings.get(key)
+        if ring is not None and ring.shape == shape:
+            return ring
+        if ring is not None:
+            ring.close()
+        ring = self.rings[key] = SharedFrameRing(1, shape)
+        for conn in self.conns.values():
+            conn.send(("attach", key, ring.spec()))
+        return ring
+
+    def predict(self, frames, pose_needed=None, pose_regions=None, rois=None):
+        """
+        Como SequentialExecutor.predict. Si un proceso de modelo murió (antes o durante el lote)
+        se reinician ambos y el lote se repite una vez.
+        """
+        with self.lock:  # Un lote a la vez por el anillo compartido
+            dead = [kind for kind, proc in self.procs.items() if not proc.is_alive()]
+            if dead:
+                logger.error(f"🔴 [Inferencia] Procesos de modelos caídos: {dead}. Reiniciando...")
+                self.restart()
+            try:
+                return super().predict(frames, pose_needed, pose_regions, rois)
+            except (EOFError, OSError) as e:
+                logger.error(f"🔴 [Inferencia] Se perdió la conexión con un proceso de modelo ({e!r}). Reiniciando...")
+                self.restart()
+                return super().predict(frames, pose_needed, pose_regions, rois)
+
+    def _prepare(self, frames, key="shared"):
+        """Mensaje base del lote: en el anillo 'key' si hay preprocesamiento compartido, si no serializado."""
+        if not self.cfg.SHARED_PREPROCESS:
+            return ("frames", frames)
+        ring = self._ensure_ring(key, PreprocessedBatch.batch_shape(frames, self.cfg.MODEL_IMGSZ))
+        seq, view = ring.slot_for_write()
+        batch = PreprocessedBatch.from_frames(frames, self.cfg.MODEL_IMGSZ, out=view)
+        ring.commit(seq, 0.0)
+        return ("run", key, seq, batch.infos)
+
+    def _send(self, kind, msg, indices):
+        self.conns[kind].send(msg + (indices,))
+
+    def _recv(self, kind):
+        status, payload = self.conns[kind].recv()
+        if status != "ok":
+            raise RuntimeError(f"Fallo en el proceso del modelo {kind}: {payload}")
+        return payload
+
+    def _run_model(self, kind, msg, indices=None):
+        self._send(kind, msg, indices)
+        return self._recv(kind)
+
+    def _run_both(self, msg):
+        for kind in MODEL_KINDS:
+            self._send(kind, msg, None)
+        return self._recv("objects"), self._recv("pose")
+
+    def _run_crops(self, crops, imgsz):
+        self.conns["pose"].send(("crops", crops, imgsz))
+        return self._recv("pose")
+
+    def _stop_processes(self, timeout=10.0):
+        for kind, conn in self.conns.items():
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for kind, proc in self.procs.items():
+            proc.join(timeout=timeout)
+            if proc.is_alive():
+                logger.error(f"🔴 [Inferencia] El proceso del modelo {kind} no terminó a tiempo.")
+                proc.terminate()
+                proc.join()
+        for conn in self.conns.values():
+            conn.close()
+        self.procs, self.conns = {}, {}
+
+    def stop(self):
+        self._stop_processes()
+        for ring in self.rings.values():
+            ring.close()
+        self.rings = {}
+
+
+EXECUTORS = {
+    "sequential": SequentialExecutor,
+    "thread": ThreadExecutor,
+    "process": ProcessExecutor,
+}
+
+
+def make_executor(cfg):
+    try:
+        return EXECUTORS[cfg.INFERENCE_EXECUTOR](cfg)
+    except KeyError:
+        raise ValueError(f"INFERENCE_EXECUTOR desconocido: {cfg.INFERENCE_EXECUTOR} (opciones: {list(EXECUTORS)})")
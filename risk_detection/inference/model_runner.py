@@ -0,0 +1,67 @@
+# risk_detection/inference/model_runner.py
+import time
+import sys
+import logging
+from inference.backends import to_detections
+from inference.executors import make_executor
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger()
+
+
+class ModelRunner:
+    """
+    Carga una única copia de los modelos de objetos y pose y ejecuta la inferencia
+    en lote sobre los frames de una o varias cámaras. El ejecutor (INFERENCE_EXECUTOR)
+    decide si ambos modelos corren en secuencia, en hilos o en procesos separados.
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.executor = None
+
+    @property
+    def loaded(self):
+        return self.executor is not None
+
+    def load(self):
+        start = time.time()
+        self.executor = make_executor(self.cfg).start()
+        logger.info(f"📦 Modelos YOLO cargados en {time.time() - start:.2f}s (backend: {self.cfg.INFERENCE_BACKEND}, ejecutor: {self.cfg.INFERENCE_EXECUTOR})")
+        return self
+
+    def run_batch(self, frames, pose_needed=None, pose_regions=None, rois=None, lazy_pose=None):
+        """
+        Ejecuta ambos modelos sobre un lote de frames (una pasada por modelo).
+        Devuelve una lista con un dict {"objects": sv.Detections, "pose": [PoseResult]} por frame.
+        pose_needed(objetos) -> [bool] por frame: con LAZY_POSE la pose solo corre donde alguna escena la pide.
+        pose_regions(objetos) -> [None | [(caja, imgsz)]] por frame: recortes de pose (POSE_CROP_MODE).
+        rois: [None | (x1, y1, x2, y2)] por frame: región donde corre el detector (DETECTOR_ROI).
+        lazy_pose: si se usa pose_needed (None = LAZY_POSE; el control de sobrecarga lo fuerza).
+        """
+        lazy_pose = self.cfg.LAZY_POSE if lazy_pose is None else lazy_pose
+        res_obj, res_pose = self.executor.predict(
+            frames,
+            pose_needed if lazy_pose else None,
+            pose_regions if self.cfg.POSE_CROP_MODE != "full" else None,
+            rois,
+        )
+        return [
+            {"objects": det_obj, "pose": [pose]}
+            for det_obj, pose in zip(res_obj, res_pose)
+        ]
+
+    def run(self, frame):
+        """Inferencia de un solo frame."""
+        return self.run_batch([frame])[0]
+
+    def stop(self):
+        if self.executor:
+            self.executor.stop()
+            self.executor = None
+
+    to_detections = staticmethod(to_detections)
@@ -0,0 +1,59 @@
+# risk_detection/inference/motion_gate.py
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Puerta de movimiento por cámara (MOTION_GATE_ENABLED). Compara, en gris y reducidas a
+    MOTION_GATE_WIDTH, las regiones vigiladas (MOTION_GATE_ROIS) del frame actual con las
+    del último frame que pasó por los modelos. Si la fracción de píxeles que cambiaron más
+    de MOTION_GATE_PIXEL_DIFF no supera MOTION_GATE_THRESHOLD, las detecciones anteriores
+    siguen siendo válidas. Cada MOTION_GATE_REFRESH_EVERY frames se infiere igualmente.
+    """
+
+    def __init__(self, cfg):
+        self.enabled = cfg.MOTION_GATE_ENABLED
+        self.rois = cfg.MOTION_GATE_ROIS
+        self.width = cfg.MOTION_GATE_WIDTH
+        self.pixel_diff = cfg.MOTION_GATE_PIXEL_DIFF
+        self.threshold = cfg.MOTION_GATE_THRESHOLD
+        self.refresh_every = cfg.MOTION_GATE_REFRESH_EVERY
+        self.reference = None
+        self.frames_since_refresh = 0
+        self.frames_checked = 0
+        self.frames_skipped = 0
+
+    def _thumbnails(self, frame):
+        thumbs = []
+        for x1, y1, x2, y2 in self.rois:
+            crop = frame[y1:y2, x1:x2]
+            scale = min(1.0, self.width / crop.shape[1])
+            size = (max(1, int(crop.shape[1] * scale)), max(1, int(crop.shape[0] * scale)))
+            small = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+            thumbs.append(cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (3, 3), 0))
+        return thumbs
+
+    def changed(self, frame):
+        """True si el frame debe pasar por los modelos (y pasa a ser la nueva referencia)."""
+        if not self.enabled:
+            return True
+        self.frames_checked += 1
+        thumbs = self._thumbnails(frame)
+        if self.reference is not None and self.frames_since_refresh + 1 < self.refresh_every:
+            changed = sum(int(np.count_nonzero(cv2.absdiff(a, b) > self.pixel_diff)) for a, b in zip(thumbs, self.reference))
+            total = sum(t.size for t in thumbs)
+            if changed <= self.threshold * total:
+                self.frames_since_refresh += 1
+                self.frames_skipped += 1
+                return False
+        self.reference = thumbs
+        self.frames_since_refresh = 0
+        return True
+
+    def stats(self):
+        return {
+            "frames_checked": self.frames_checked,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": round(self.frames_skipped / self.frames_checked, 3) if self.frames_checked else 0.0,
+        }
@@ -0,0 +1,131 @@
+# risk_detection/inference/pose_crops.py
+import numpy as np
+
+from inference.results import PoseResult
+from inference.preprocess import LETTERBOX_STRIDE
+
+POSE_CROP_MODES = ("full", "zones", "persons")
+
+
+def _ceil_stride(value, stride=LETTERBOX_STRIDE):
+    return int(np.ceil(value / stride) * stride)
+
+
+def _expand(box, margin_x, margin_y, frame_shape):
+    h, w = frame_shape[:2]
+    x1, y1, x2, y2 = box
+    return (max(0, int(x1 - margin_x)), max(0, int(y1 - margin_y)),
+            min(w, int(np.ceil(x2 + margin_x))), min(h, int(np.ceil(y2 + margin_y))))
+
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def merge_overlapping(boxes):
+    """Une las cajas que se solapan (para no correr la pose dos veces sobre la misma persona)."""
+    boxes = [tuple(b) for b in boxes]
+    merged = True
+    while merged:
+        merged = False
+        out = []
+        while boxes:
+            a = boxes.pop()
+            for i, b in enumerate(out):
+                if _overlaps(a, b):
+                    out[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    merged = True
+                    break
+            else:
+                out.append(a)
+        boxes = out
+    return boxes
+
+
+class PoseRegionPlanner:
+    """
+    Decide, por cámara, dónde correr la pose en cada frame (POSE_CROP_MODE):
+        full     Frame completo (comportamiento original).
+        zones    Un recorte con la unión de los polígonos de riesgo, las cajas del detector
+                 y un margen, a la misma densidad de píxeles que el frame completo.
+        persons  Un recorte por persona (cajas de POSE_PERSON_CLASS del detector o, si no
+                 hay, las personas de la pose anterior) a POSE_CROP_IMGSZ. Cada
+                 POSE_FULL_EVERY frames, o si no hay personas previas, frame completo para
+                 descubrir a quien acaba de entrar.
+    plan() devuelve None (frame completo) o una lista de (caja_xyxy, imgsz).
+    """
+
+    def __init__(self, cfg):
+        if cfg.POSE_CROP_MODE not in POSE_CROP_MODES:
+            raise ValueError(f"POSE_CROP_MODE desconocido: {cfg.POSE_CROP_MODE} (opciones: {POSE_CROP_MODES})")
+        self.cfg = cfg
+        self.mode = cfg.POSE_CROP_MODE
+        self.prev_person_boxes = np.zeros((0, 4), dtype=np.float32)
+        self.frames_since_full = 0
+        self._last_full = True
+        zones = np.concatenate([np.asarray(getattr(cfg, key), dtype=np.float32).reshape(-1, 2) for key in cfg.ZONE_KEYS])
+        self.zone_box = (*zones.min(axis=0), *zones.max(axis=0))
+
+    def plan(self, det_obj, frame_shape):
+        self._last_full = False
+        if self.mode == "zones":
+            return [self._zones_region(det_obj, frame_shape)]
+        if self.mode == "persons":
+            regions = self._person_regions(det_obj, frame_shape)
+            if regions is not None:
+                return regions
+        self._last_full = True
+        return None
+
+    def observe(self, pose):
+        """Recuerda las personas de la pose de este frame (vacía si no se corrió la pose)."""
+        self.prev_person_boxes = pose.boxes_xyxy if pose is not None else np.zeros((0, 4), dtype=np.float32)
+        self.frames_since_full = 0 if self._last_full else self.frames_since_full + 1
+
+    def _zones_region(self, det_obj, frame_shape):
+        h, w = frame_shape[:2]
+        x1, y1, x2, y2 = self.zone_box
+        if len(det_obj):
+            xyxy = det_obj.xyxy
+            x1, y1 = min(x1, xyxy[:, 0].min()), min(y1, xyxy[:, 1].min())
+            x2, y2 = max(x2, xyxy[:, 2].max()), max(y2, xyxy[:, 3].max())
+        margin = self.cfg.POSE_CROP_MARGIN_NORM * w
+        box = _expand((x1, y1, x2, y2), margin, margin, frame_shape)
+        # Misma densidad de píxeles que el frame completo: imgsz proporcional al recorte
+        scale = max((box[2] - box[0]) / w, (box[3] - box[1]) / h)
+        return box, min(self.cfg.MODEL_IMGSZ, _ceil_stride(self.cfg.MODEL_IMGSZ * scale))
+
+    def _person_regions(self, det_obj, frame_shape):
+        if self.frames_since_full >= self.cfg.POSE_FULL_EVERY:
+            return None
+        seeds = self.prev_person_boxes
+        if self.cfg.POSE_PERSON_CLASS and len(det_obj):
+            mask = det_obj.data["class_name"] == self.cfg.POSE_PERSON_CLASS
+            if mask.any():
+                seeds = det_obj.xyxy[mask]
+        if len(seeds) == 0:
+            return None
+        ratio = self.cfg.POSE_CROP_MARGIN_RATIO
+        boxes = [_expand(b, ratio * (b[2] - b[0]), ratio * (b[3] - b[1]), frame_shape) for b in seeds]
+        return [(box, self.cfg.POSE_CROP_IMGSZ) for box in merge_overlapping(boxes)]
+
+
+def merge_crop_poses(crop_boxes, crop_poses):
+    """Une las poses de los recortes de un frame, llevando keypoints y cajas a coordenadas del frame."""
+    if not crop_poses:
+        return PoseResult.empty()
+    kps, boxes, confs = [], [], []
+    for (x1, y1, _, _), pose in zip(crop_boxes, crop_poses):
+        if not len(pose):
+            continue
+        data = pose.keypoints.data.copy()
+        missing = (data[..., 0] == 0) & (data[..., 1] == 0)
+        data[..., 0] += x1
+        data[..., 1] += y1
+        data[..., :2][missing] = 0  # Keypoints ausentes siguen en (0, 0)
+        kps.append(data)
+        boxes.append(pose.boxes_xyxy + np.array([x1, y1, x1, y1], dtype=np.float32))
+        confs.append(pose.boxes_conf)
+    if not kps:
+        return PoseResult.empty()
+    return PoseResult(np.concatenate(kps), np.concatenate(boxes), np.concatenate(confs))
@@ -0,0 +1,99 @@
+# risk_detection/inference/preprocess.py
+import cv2
+import numpy as np
+
+LETTERBOX_STRIDE = 32
+LETTERBOX_FILL = 114   # Mismo gris de relleno que usa ultralytics
+
+
+class LetterboxInfo:
+    """Escala y relleno aplicados a un frame; convierte coordenadas del tensor al frame original."""
+
+    def __init__(self, ratio, pad, frame_shape):
+        self.ratio = ratio
+        self.pad = pad                    # (pad_x, pad_y) en píxeles del tensor
+        self.frame_shape = frame_shape    # (alto, ancho) del frame original
+
+    def boxes_to_frame(self, xyxy):
+        xyxy = np.asarray(xyxy, dtype=np.float32).copy()
+        if xyxy.size == 0:
+            return xyxy
+        pad_x, pad_y = self.pad
+        xyxy[:, [0, 2]] = np.clip((xyxy[:, [0, 2]] - pad_x) / self.ratio, 0, self.frame_shape[1])
+        xyxy[:, [1, 3]] = np.clip((xyxy[:, [1, 3]] - pad_y) / self.ratio, 0, self.frame_shape[0])
+        return xyxy
+
+    def points_to_frame(self, xy):
+        """Igual que boxes_to_frame para puntos [..., 2]; los (0, 0) (keypoint ausente) se conservan."""
+        xy = np.asarray(xy, dtype=np.float32).copy()
+        if xy.size == 0:
+            return xy
+        missing = (xy[..., 0] == 0) & (xy[..., 1] == 0)
+        xy[..., 0] = (xy[..., 0] - self.pad[0]) / self.ratio
+        xy[..., 1] = (xy[..., 1] - self.pad[1]) / self.ratio
+        xy[missing] = 0
+        return xy
+
+
+def letterbox_shape(frame_shape, imgsz, stride=LETTERBOX_STRIDE):
+    """(alto, ancho) mínimos múltiplos de 'stride' que contienen el frame escalado a 'imgsz'."""
+    h, w = frame_shape[:2]
+    r = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * r)), int(round(h * r))
+    return int(np.ceil(new_h / stride) * stride), int(np.ceil(new_w / stride) * stride)
+
+
+class PreprocessedBatch:
+    """
+    Lote de frames ya redimensionados con letterbox (RGB, uint8, [B, H, W, 3]) y la
+    transformación de cada uno. Se construye una sola vez por frame y lo consumen
+    todos los modelos; el tensor se crea una vez por dispositivo.
+    """
+
+    def __init__(self, images, infos):
+        self.images = images
+        self.infos = infos
+        self._tensors = {}
+
+    @classmethod
+    def from_frames(cls, frames, imgsz, out=None):
+        """Letterbox de todos los frames a una forma común. 'out' permite escribir en un búfer propio (p. ej. memoria compartida)."""
+        shape = cls.batch_shape(frames, imgsz)
+        height, width = shape[1:3]
+        if out is None or out.shape != shape:
+            out = np.empty(shape, dtype=np.uint8)
+        infos = []
+        for frame, dst in zip(frames, out):
+            h, w = frame.shape[:2]
+            r = min(height / h, width / w)
+            new_w, new_h = int(round(w * r)), int(round(h * r))
+            pad_x, pad_y = (width - new_w) / 2, (height - new_h) / 2
+            left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+            resized = frame if (new_w, new_h) == (w, h) else cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+            dst[:] = LETTERBOX_FILL
+            dst[top:top + new_h, left:left + new_w] = resized[..., ::-1]  # BGR → RGB en la misma copia
+            infos.append(LetterboxInfo(r, (left, top), (h, w)))
+        return cls(out, infos)
+
+    @staticmethod
+    def batch_shape(frames, imgsz):
+        shapes = [letterbox_shape(f.shape, imgsz) for f in frames]
+        return (len(frames), max(s[0] for s in shapes), max(s[1] for s in shapes), 3)
+
+    def tensor(self, device):
+        """Tensor BCHW float en [0, 1] en el dispositivo pedido (se crea una vez y se reutiliza)."""
+        key = str(device)
+        if key not in self._tensors:
+            import torch
+            t = torch.from_numpy(self.images).to(device).permute(0, 3, 1, 2).contiguous()
+            self._tensors[key] = t.float().div_(255.0)
+        return self._tensors[key]
+
+    def subset(self, indices):
+        """Sub-lote con los frames 'indices' (reutiliza los tensores ya creados)."""
+        sub = PreprocessedBatch(self.images[indices], [self.infos[i] for i in indices])
+        sub._tensors = {key: t[indices] for key, t in self._tensors.items()}
+        return sub
+
+    def __len__(self):
+        return len(self.infos)
@@ -0,0 +1,57 @@
+# risk_detection/inference/results.py
+import numpy as np
+
+
+class PoseKeypoints:
+    """
+    Subconjunto de ultralytics Keypoints respaldado por numpy.
+    data: [N, K, 3] con (x, y, conf) en coordenadas del frame.
+    """
+
+    def __init__(self, data):
+        data = np.asarray(data, dtype=np.float32)
+        self.data = data if data.size else np.zeros((0, 17, 3), dtype=np.float32)
+
+    @property
+    def xy(self):
+        return self.data[..., :2]
+
+    @property
+    def conf(self):
+        return self.data[..., 2]
+
+    def __len__(self):
+        return len(self.data)
+
+
+class PoseResult:
+    """
+    Resultado de pose serializable (sin tensores ni la imagen original), con la misma
+    forma de acceso que usan las escenas: res_pose[0].keypoints.xy.
+    """
+
+    def __init__(self, keypoints, boxes_xyxy=None, boxes_conf=None):
+        self.keypoints = keypoints if isinstance(keypoints, PoseKeypoints) else PoseKeypoints(keypoints)
+        n = len(self.keypoints)
+        self.boxes_xyxy = np.zeros((n, 4), dtype=np.float32) if boxes_xyxy is None else np.asarray(boxes_xyxy, dtype=np.float32)
+        self.boxes_conf = np.zeros((n,), dtype=np.float32) if boxes_conf is None else np.asarray(boxes_conf, dtype=np.float32)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 17, 3), dtype=np.float32))
+
+    @classmethod
+    def from_ultralytics(cls, result):
+        """Copia a numpy los keypoints y cajas de un Results de ultralytics (una sola vez por frame)."""
+        if getattr(result, "keypoints", None) is None or result.keypoints.data is None:
+            return cls.empty()
+        kps = result.keypoints.data.cpu().numpy()
+        if kps.ndim == 3 and kps.shape[-1] == 2:  # Modelos sin confianza por keypoint
+            kps = np.concatenate([kps, np.ones(kps.shape[:2] + (1,), dtype=kps.dtype)], axis=-1)
+        boxes = result.boxes
+        xyxy = boxes.xyxy.cpu().numpy() if boxes is not None else None
+        conf = boxes.conf.cpu().numpy() if boxes is not None else None
+        return cls(kps, xyxy, conf)
+
+    def __len__(self):
+        return len(self.keypoints)
@@ -0,0 +1,149 @@
+# risk_detection/inference/tracking.py
+"""
+Modo detectar-cada-N (DETECT_EVERY_N): los modelos corren solo en los keyframes y, entre
+ellos, las cajas y keypoints del último keyframe se extrapolan con la velocidad medida
+entre los dos últimos keyframes. Así las escenas siguen recibiendo sv.Detections y
+keypoints en todos los frames.
+"""
+import math
+import sys
+import logging
+
+import numpy as np
+
+from inference.results import PoseResult
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+TRACK_IOU = 0.3        # IoU mínimo para considerar el mismo objeto/persona entre keyframes
+INFER_EMA = 0.2        # Suavizado del tiempo de inferencia medido (modo "auto")
+
+
+def iou_matrix(a, b):
+    """IoU entre dos conjuntos de cajas xyxy: matriz [len(a), len(b)]."""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def greedy_match(ious, thres, same=None):
+    """Pares (i, j) emparejados de mayor a menor IoU (opcionalmente solo donde 'same' es True)."""
+    if same is not None:
+        ious = np.where(same, ious, 0.0)
+    pairs, used_i, used_j = [], set(), set()
+    for i, j in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+        if ious[i, j] < thres:
+            break
+        if i not in used_i and j not in used_j:
+            pairs.append((int(i), int(j)))
+            used_i.add(i)
+            used_j.add(j)
+    return pairs
+
+
+class FrameSkipController:
+    """
+    Decide qué frames pasan por los modelos. DETECT_EVERY_N es un entero fijo o "auto":
+    en automático N = ceil(tiempo_de_inferencia × FPS_de_la_fuente), acotado a
+    DETECT_EVERY_MAX, para que el costo medio por frame alcance el ritmo de la fuente.
+    """
+
+    def __init__(self, cfg):
+        mode = str(cfg.DETECT_EVERY_N).strip().lower()
+        self.adaptive = mode == "auto"
+        self.max_every = max(1, int(cfg.DETECT_EVERY_MAX))
+        self.every = 1 if self.adaptive else max(1, int(mode))
+        self.pending = 0
+        self.infer_sec = None
+
+    @property
+    def enabled(self):
+        return self.adaptive or self.every > 1
+
+    def keyframe(self):
+        """True si este frame debe pasar por los modelos."""
+        if self.pending <= 0:
+            self.pending = self.every - 1
+            return True
+        self.pending -= 1
+        return False
+
+    def observe(self, infer_sec, source_fps):
+        """Registra el tiempo de inferencia de un keyframe y, en automático, recalcula N."""
+        self.infer_sec = infer_sec if self.infer_sec is None else (1 - INFER_EMA) * self.infer_sec + INFER_EMA * infer_sec
+        if not self.adaptive or not source_fps:
+            return
+        every = min(self.max_every, max(1, math.ceil(self.infer_sec * source_fps)))
+        if every != self.every:
+            logger.info(f"⏩ [Inferencia] Detección cada {every} frames (inferencia {self.infer_sec * 1000:.0f}ms a {source_fps:.1f} FPS)")
+            self.every = every
+
+
+class MotionExtrapolator:
+    """
+    Por cámara: guarda las detecciones del último keyframe y la velocidad (px/frame) de cada
+    caja y keypoint, emparejando objetos de la misma clase y personas por IoU con el keyframe
+    anterior. predict() devuelve las detecciones extrapoladas al siguiente frame sin inferencia;
+    lo que no se emparejó se mantiene quieto.
+    """
+
+    def __init__(self, frame_size):
+        self.width, self.height = frame_size
+        self.det_obj = None
+        self.obj_velocity = None
+        self.pose = None
+        self.kps_velocity = None
+        self.pose_box_velocity = None
+        self.frames_since = 0
+
+    def update(self, detections):
+        """Keyframe: nuevas detecciones de los modelos."""
+        det_obj, pose = detections["objects"], detections["pose"][0]
+        gap = self.frames_since + 1
+        self.obj_velocity = np.zeros((len(det_obj), 4), dtype=np.float32)
+        if self.det_obj is not None and len(self.det_obj) and len(det_obj):
+            same = self.det_obj.data["class_name"][:, None] == det_obj.data["class_name"][None, :]
+            for i, j in greedy_match(iou_matrix(self.det_obj.xyxy, det_obj.xyxy), TRACK_IOU, same):
+                self.obj_velocity[j] = (det_obj.xyxy[j] - self.det_obj.xyxy[i]) / gap
+
+        self.kps_velocity = np.zeros(pose.keypoints.data.shape[:2] + (2,), dtype=np.float32)
+        self.pose_box_velocity = np.zeros((len(pose), 4), dtype=np.float32)
+        if self.pose is not None and len(self.pose) and len(pose):
+            for i, j in greedy_match(iou_matrix(self.pose.boxes_xyxy, pose.boxes_xyxy), TRACK_IOU):
+                prev, cur = self.pose.keypoints.xy[i], pose.keypoints.xy[j]
+                visible = (prev != 0).any(axis=1) & (cur != 0).any(axis=1)
+                self.kps_velocity[j][visible] = (cur[visible] - prev[visible]) / gap
+                self.pose_box_velocity[j] = (pose.boxes_xyxy[j] - self.pose.boxes_xyxy[i]) / gap
+
+        self.det_obj, self.pose = det_obj, pose
+        self.frames_since = 0
+
+    def predict(self):
+        """Frame sin inferencia: detecciones del último keyframe desplazadas por su velocidad."""
+        self.frames_since += 1
+        k = self.frames_since
+        limits = np.array([self.width, self.height, self.width, self.height], dtype=np.float32)
+
+        det_obj = self.det_obj[np.arange(len(self.det_obj))]  # Copia: las escenas no ven el keyframe
+        det_obj.xyxy = np.clip(self.det_obj.xyxy + self.obj_velocity * k, 0, limits)
+
+        data = self.pose.keypoints.data.copy()
+        missing = (data[..., 0] == 0) & (data[..., 1] == 0)
+        data[..., :2] += self.kps_velocity * k
+        data[..., 0] = np.clip(data[..., 0], 0, self.width)
+        data[..., 1] = np.clip(data[..., 1], 0, self.height)
+        data[..., :2][missing] = 0  # Keypoints ausentes siguen en (0, 0)
+        boxes = np.clip(self.pose.boxes_xyxy + self.pose_box_velocity * k, 0, limits)
+        return {"objects": det_obj, "pose": [PoseResult(data, boxes, self.pose.boxes_conf)]}
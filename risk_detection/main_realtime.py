@@ -5,17 +5,19 @@ import signal
 import sys
 import logging
 import pytz
-import numpy as np
-from collections import deque
 from datetime import datetime
-from ultralytics import YOLO
-from supervision import Detections, BoxAnnotator, LabelAnnotator, ColorLookup
 from config import Config
 from in_out.beacon_controller import BeaconController
 from in_out.db_logger import DBLogger
-from in_out.video_clip_writer import VideoClipWriter
-from utils.visualization import draw_hud
+from inference.model_runner import ModelRunner
+from inference.tracking import FrameSkipController
+from utils.activity_governor import ActivityGovernor
+from utils.overload_controller import OverloadController, SHED_VISUALIZATION, SHED_POSE_RATE, SHED_LOW_PRIORITY
+from engine.base_scene import PRIORITY_HIGH
+from engine.frame_context import FrameContext
+from camera_stream import CameraStream
 from risk_engine import RiskEngine
+from multiprocess_pipeline import MultiProcessPipeline
 
 import json
 import psutil
@@ -51,6 +53,9 @@ class PerformanceMonitor:
         self.fps_values = []
         self.start_time = datetime.now(pytz.timezone("America/Bogota"))
         self.frames_processed = 0
+        self.queue_latencies = []
+        self.capture_stats = {}
+        self.overload_stats = {}
 
         self.gpu_handle = None
         if GPU_AVAILABLE:
@@ -59,11 +64,13 @@ class PerformanceMonitor:
             except Exception:
                 self.gpu_handle = None
 
-    def update(self, fps):
+    def update(self, fps, queue_latency=None):
         """Llamado en cada frame procesado."""
         self.frames_processed += 1
         if fps:
             self.fps_values.append(fps)
+        if queue_latency is not None:
+            self.queue_latencies.append(queue_latency * 1000.0)  # en ms
         self.cpu_usage.append(psutil.cpu_percent(interval=None))
         self.memory_usage.append(psutil.virtual_memory().percent)
 
@@ -89,6 +96,9 @@ class PerformanceMonitor:
             "memory_mean_percent": round(statistics.mean(self.memory_usage), 2) if self.memory_usage else 0,
             "gpu_mean_percent": round(statistics.mean(self.gpu_usage), 2) if self.gpu_usage else None,
             "vram_mean_mib": round(statistics.mean(self.vram_usage), 2) if self.vram_usage else None,
+            "queue_latency_ms_mean": round(statistics.mean(self.queue_latencies), 2) if self.queue_latencies else None,
+            "capture": self.capture_stats,
+            "overload": self.overload_stats,
         }
 
         output_path = f"{output_dir}/performance_metrics_{self.start_time.strftime('%Y%m%d_%H%M%S')}.json"
@@ -106,15 +116,14 @@ class RiskDetectionApp:
         self.cfg = cfg
         self.keep_running = True
         self.bogota = pytz.timezone("America/Bogota")
-        self.db_logger = DBLogger()
-        self.previous_risk_states = {}
-        self.video_writer = None
-        self.cap = None
-        self.engine = RiskEngine(cfg)
-        self.clip_writer = None
+        self.db_logger = DBLogger(node_id=cfg.NODE_ID)
+        self.runner = ModelRunner(cfg)
+        self.cameras = []
         self.beacon = None
-        self.pre_roll_buffer = deque()
         self.fps_smoothed = None
+        self.frame_skip = None
+        self.governor = None
+        self.overload = None
         self.monitor = PerformanceMonitor() if getattr(cfg, "MONITOR_PERFORMANCE", False) else None
 
     # -------------------------
@@ -125,18 +134,18 @@ class RiskDetectionApp:
         self._load_models()
         self._setup_db_logger()
         self._setup_beacon()
-        self._setup_clip_writer()
-        self._setup_video_capture()
+        self._setup_cameras()
+        self.frame_skip = FrameSkipController(self.cfg)  # El primer frame tras (re)iniciar siempre es keyframe
+        self.governor = ActivityGovernor(self.cfg, [cam.reader for cam in self.cameras])
+        self.overload = OverloadController(self.cfg, max(cam.reader.fps for cam in self.cameras))
         logger.info("✅ Sistema completamente inicializado.")
 
     def _load_models(self):
-        start = time.time()
-        self.model_obj = YOLO(self.cfg.MODEL_OBJ)
-        self.model_pose = YOLO(self.cfg.MODEL_POSE)
-        logger.info(f"📦 Modelos YOLO cargados en {time.time() - start:.2f}s")
+        if not self.runner.loaded:
+            self.runner.load()
 
     def _setup_db_logger(self):
-        db_path = self.db_logger.start_logger(output_dir=self.cfg.LOG_DIR)
+        db_path = self.db_logger.start_logger(output_dir=self.cfg.LOG_DIR, db_file=self.cfg.RESULT_STORE_PATH)
         logger.info(f"🗄️ Logs de BBDD → {db_path}")
 
     def _setup_beacon(self):
@@ -145,27 +154,14 @@ class RiskDetectionApp:
             self.beacon.start_controller()
             logger.info("🚨 Baliza conectada")
 
-    def _setup_clip_writer(self):
-        if self.cfg.CLIP_ENABLED:
-            self.clip_writer = VideoClipWriter(self.cfg)
-            self.clip_writer.start_controller()
-
-    def _setup_video_capture(self):
-        logger.info(f"📹 Conectando a video fuente: {self.cfg.VIDEO_SOURCE}")
-        self.cap = cv2.VideoCapture(self.cfg.VIDEO_SOURCE)
-        if not self.cap.isOpened():
-            logger.error(f"❌ No se pudo abrir la fuente: {self.cfg.VIDEO_SOURCE}")
-            raise RuntimeError(f"No se pudo abrir fuente: {self.cfg.VIDEO_SOURCE}")
-
-        fps = self.cap.get(cv2.CAP_PROP_FPS) or 15.0
-        pre_roll_size = int(fps * self.cfg.CLIP_PREROLL_SEC)
-        self.pre_roll_buffer = deque(maxlen=pre_roll_size)
-        logger.info(f"📹 FPS: {fps:.2f} | Buffer pre-roll: {pre_roll_size} frames")
-
-        if self.cfg.WRITE_OUTPUT:
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            self.video_writer = cv2.VideoWriter(self.cfg.OUTPUT_PATH, fourcc, fps, self.cfg.RESIZE)
-            logger.info(f"💾 Grabación activada → {self.cfg.OUTPUT_PATH}")
+    def _setup_cameras(self):
+        if not self.cameras:
+            # Se crean una sola vez para conservar el estado de las escenas entre reinicios
+            self.cameras = [CameraStream(cam_cfg, multi_camera=self.cfg.MULTI_CAMERA) for cam_cfg in self.cfg.load_cameras()]
+        for cam in self.cameras:
+            cam.setup()
+        if self.cfg.MULTI_CAMERA:
+            logger.info(f"🎥 Modo multi-cámara: {len(self.cameras)} cámaras → {[c.camera_id for c in self.cameras]}")
 
     # -------------------------
     # Horarios y señales
@@ -191,20 +187,21 @@ class RiskDetectionApp:
         signal.signal(signal.SIGTERM, self.graceful_shutdown)
 
         fps_timer = time.time()
+        stats_timer = time.time()
         while self.keep_running:
             if not self.is_within_schedule():
                 logger.info(f"⏸️ Pausa por {self.cfg.MINUTES_PAUSE} minutos...")
                 time.sleep(60 * self.cfg.MINUTES_PAUSE)
                 break
 
-            ok, frame = self.cap.read()
-            if not ok:
-                logger.warning("⚠️ No se pudo leer frame.")
+            # Último frame de cada cámara → un solo lote para los modelos
+            slots = self._read_frames()
+            if slots is None:
                 break
+            t_frame = time.perf_counter()
 
-            frame = cv2.resize(frame, self.cfg.RESIZE)
-            frame_copy = frame.copy()
-            self._process_frame(frame, frame_copy)
+            batch_detections = self._run_inference([slot.array for slot in slots])
+            frames = self._process_frames(slots, batch_detections)
 
             now = time.time()
             inst_fps = 1.0 / max(now - fps_timer, 1e-6)
@@ -212,111 +209,137 @@ class RiskDetectionApp:
             self.fps_smoothed = inst_fps if self.fps_smoothed is None else (self.fps_smoothed * 0.9 + inst_fps * 0.1)
 
             if self.monitor:
-                self.monitor.update(self.fps_smoothed)
+                queue_latency = max(cam.reader.queue_latencies[-1] for cam in self.cameras)
+                self.monitor.update(self.fps_smoothed, queue_latency)
+
+            if now - stats_timer >= self.cfg.CAPTURE_STATS_EVERY_SEC:
+                stats_timer = now
+                for cam in self.cameras:
+                    st = cam.reader.stats()
+                    pool = cam.frame_pool.stats()
+                    gate = cam.motion_gate.stats()
+                    logger.info(f"📹 [{cam.camera_id}] Captura → consumidos: {st['frames_consumed']} | descartados: {st['frames_dropped']} | sin decodificar: {st['frames_skipped']} | "
+                                f"latencia cola: {st['queue_latency_ms_mean']:.1f}ms (p95 {st['queue_latency_ms_p95']:.1f}ms) | "
+                                f"pool: {pool['in_use']}/{pool['size']} en uso, {pool['misses']} fallos | "
+                                f"puerta de movimiento: {gate['frames_skipped']}/{gate['frames_checked']} reutilizados ({gate['skip_ratio']:.0%})")
+                if self.overload.enabled:
+                    ov = self.overload.stats()
+                    logger.info(f"🔥 [Sobrecarga] Nivel {ov['level']}/{len(self.overload.steps)} {ov['active']} | latencia: {ov['latency_ms']}ms "
+                                f"(presupuesto {ov['budget_ms']}ms) | recortes: {ov['shed_count']}")
 
             if self.cfg.VISUALIZE:
-                cv2.imshow("RiskEngine", frame)
+                if not self.overload.shedding(SHED_VISUALIZATION):
+                    for cam, frame in zip(self.cameras, frames):
+                        cv2.imshow(cam.window_name, frame)
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     logger.info("👤 Cierre manual (tecla 'q')")
+                    self._release_slots(slots)
                     break
 
+            self.overload.observe(time.perf_counter() - t_frame)
+            self._release_slots(slots)
+
         self.cleanup()
 
+    def _read_frames(self):
+        """
+        Lee el último frame de cada cámara dentro de un slot de su pool.
+        Devuelve None si alguna fuente falla.
+        """
+        slots = []
+        for cam in self.cameras:
+            ok, frame, ts = cam.reader.read(timeout=self.cfg.CAPTURE_READ_TIMEOUT)
+            if not ok:
+                logger.warning(f"⚠️ [{cam.camera_id}] No se pudo leer frame.")
+                self._release_slots(slots)
+                return None
+            slots.append(cam.load_frame(frame, ts))
+        return slots
+
+    @staticmethod
+    def _release_slots(slots):
+        """Libera la referencia del bucle principal sobre los slots del frame actual."""
+        for slot in slots:
+            slot.release()
+        slots.clear()
+
     # -------------------------
     # Procesamiento por frame
     # -------------------------
-    def _process_frame(self, frame, frame_copy):
-        if self.cfg.CLIP_ENABLED:
-            self.pre_roll_buffer.append(frame_copy)
-            self.clip_writer.put_frame(frame_copy)
-
-        detections = self._run_inference(frame)
-        results = self.engine.process(detections["objects"], detections["pose"], frame if self.cfg.VISUALIZE else None)
-        self._handle_risks(results)
-        self._visualize(frame, detections, results)
-
-        if self.video_writer:
-            self.video_writer.write(frame)
-
-    def _run_inference(self, frame):
-        res_obj = self.model_obj(frame, device=self.cfg.DEVICE, conf=self.cfg.CONF_OBJ, verbose=False)
-        det_obj = Detections.from_ultralytics(res_obj[0])
-        names = res_obj[0].names
-        det_obj.data["class_name"] = np.array([names[i] for i in det_obj.class_id.astype(int)])
-        res_pose = self.model_pose(frame, device=self.cfg.DEVICE, conf=self.cfg.CONF_POSE, verbose=False)
-        return {"objects": det_obj, "pose": res_pose}
-
-    def _handle_risks(self, results):
-        any_risk = False # Bandera para la Baliza
-        for scene, data in results.items():
-            current = data["risk"]
-            prev = self.previous_risk_states.get(scene, False)
-
-            video_file_name = None
-
-            # Lógica para el Grabador de Clips
-            if self.cfg.CLIP_ENABLED:
-                # video_file_name = None
-
-                # Transición: De NO RIESGO a RIESGO
-                if current and not prev:
-                    ts_str = data["time"].replace(":", "-").replace(".", "_")
-                    video_file_name = f"{scene}_{ts_str}.mp4"
-                    logger.info(f"🎬 [Clip] Comando START enviado para: {scene}")
-                    self.clip_writer.start_clip(scene, list(self.pre_roll_buffer), video_file_name)
-                # Transición: De RIESGO a NO RIESGO
-                elif not current and prev:
-                    logger.info(f"🎬 [Clip] Comando STOP enviado para: {scene}")
-                    self.clip_writer.stop_clip(scene)
-
-            # Actualizar el estado anterior
-            self.previous_risk_states[scene] = current
-            if current:
-                any_risk = True
-                self.db_logger.log_event(
-                    scene_name=scene,
-                    ts=data["time"],
-                    scene_active=data["scene"],
-                    risk_active=data["risk"],
-                    video_file=video_file_name
-                )
+    def _run_inference(self, frames):
+        """
+        Detecciones del lote: de los modelos en los keyframes, extrapoladas en el resto (DETECT_EVERY_N).
+        En los keyframes solo pasan por los modelos las cámaras con movimiento en sus zonas
+        (MOTION_GATE_ENABLED); las demás reutilizan sus últimas detecciones.
+        """
+        if not self.governor.idle and not self.frame_skip.keyframe():
+            return [cam.motion.predict() for cam in self.cameras]
+        run = [i for i, (cam, frame) in enumerate(zip(self.cameras, frames)) if cam.needs_inference(frame)]
+        if run:
+            cams = [self.cameras[i] for i in run]
+            shed_pose = self.overload.shedding(SHED_POSE_RATE)
+            t0 = time.perf_counter()
+            results = self.runner.run_batch(
+                [frames[i] for i in run],
+                pose_needed=lambda objs: self._pose_needed(cams, objs),
+                pose_regions=lambda objs: self._pose_regions(cams, objs),
+                rois=[cam.cfg.DETECTOR_ROI for cam in cams],
+                lazy_pose=self.cfg.LAZY_POSE or shed_pose,
+            )
+            self.frame_skip.observe(time.perf_counter() - t0, max(cam.reader.fps for cam in cams))
+            for cam, detections in zip(cams, results):
+                if shed_pose and cam.pose_reused:
+                    detections["pose"] = cam.last_detections["pose"]
+                else:
+                    cam.pose_planner.observe(detections["pose"][0])
+                cam.last_detections = detections
+        if self.frame_skip.enabled:
+            # Solo detecciones nuevas: las reutilizadas por la puerta de movimiento anularían la velocidad
+            for i in run:
+                self.cameras[i].motion.update(self.cameras[i].last_detections)
+        return [cam.last_detections for cam in self.cameras]
+
+    def _pose_needed(self, cams, batch_objects):
+        """
+        Por cámara: ¿alguna escena usará keypoints con estas detecciones? (LAZY_POSE)
+        En modo ocioso la pose corre siempre: una persona que entra debe despertar al sistema.
+        Con la tasa de pose recortada (sobrecarga) una de cada dos veces la cámara recibe la
+        pose anterior, salvo que la pida una escena de prioridad alta.
+        """
+        shed_pose = self.overload.shedding(SHED_POSE_RATE)
+        needed = []
+        for cam, det_obj in zip(cams, batch_objects):
+            ctx = FrameContext(det_obj)
+            need = self.governor.idle or not self.cfg.LAZY_POSE or cam.engine.needs_pose(ctx)
+            cam.pose_reused = (need and shed_pose and not cam.pose_reused and cam.pose_ran
+                               and cam.last_detections is not None and not cam.engine.needs_pose(ctx, PRIORITY_HIGH))
+            cam.pose_ran = need
+            needed.append(need and not cam.pose_reused)
+        return needed
+
+    def _pose_regions(self, cams, batch_objects):
+        """Por cámara: recortes donde correr la pose (POSE_CROP_MODE) o None para el frame completo."""
+        return [cam.pose_planner.plan(det_obj, cam.frame_pool.shape) for cam, det_obj in zip(cams, batch_objects)]
+
+    def _process_frames(self, slots, batch_detections):
+        any_risk = False
+        frames = []
+        shed = self.overload.active
+        # Escenas de todas las cámaras con un solo paso de histéresis vectorizado (engine/hysteresis_bank.py)
+        begun = [cam.begin(slot, detections, shed) for cam, slot, detections in zip(self.cameras, slots, batch_detections)]
+        batch_results = RiskEngine.evaluate_many([cam.engine for cam in self.cameras], [ctx for ctx, _ in begun],
+                                                 [frame for _, frame in begun], throttle_low=SHED_LOW_PRIORITY in shed,
+                                                 timestamps=[slot.ts for slot in slots])
+        for cam, results in zip(self.cameras, batch_results):
+            cam_risk, frame = cam.finish(results, self.db_logger, self.fps_smoothed, shed)
+            any_risk |= cam_risk
+            frames.append(frame)
+        self.governor.update([cam.engine.has_activity(cam.context, self.cfg.POSE_PERSON_CLASS) for cam in self.cameras])
+
         # --- Activar Baliza (no bloqueante) ---
         if self.cfg.BEACON_ENABLED and any_risk:
             self.beacon.trigger_alarm()
-
-    # -------------------------
-    # Visualización
-    # -------------------------
-    def _visualize(self, frame, detections, results):
-        if not self.cfg.VISUALIZE:
-            return
-
-        box_annot = BoxAnnotator(thickness=1, color_lookup=ColorLookup.INDEX)
-        lab_annot = LabelAnnotator(color_lookup=ColorLookup.INDEX, text_padding=3, text_scale=0.35, text_thickness=0, smart_position=True)
-        labels = [detections["objects"].data["class_name"][i] for i in range(len(detections["objects"].data["class_name"]))]
-
-        frame = box_annot.annotate(scene=frame, detections=detections["objects"])
-        frame = lab_annot.annotate(scene=frame, detections=detections["objects"], labels=labels)
-
-        risk_dict = {
-            "extraccion_stickout": "Pie dentro del Radio de Giro",
-            "acople_pintubular": "Persona entre la llaveTM120 y Tubular",
-            "cabron_abierto": "Persona cerca al Cabron Abierto",
-            "pickup_tubular": "Manos en el Elevador/Brazotaladro",
-            "tubular_pendulando": "Golpe por Tubular Pendulado",
-            "zona_riesgo_pickup_tubular": "Golpe por Pickup Tubular",
-            "acople_pintubular_mano_safata": "Atrapamiento por mano en la safata"
-        }
-        
-
-        lines = [
-            f"Escena {k}: {'SI' if v['scene'] else 'NO'} | Riesgo: {risk_dict[k] if v['risk'] else 'NO'}"
-            for k, v in results.items()
-        ]
-
-        # print(lines)
-        draw_hud(frame, self.fps_smoothed, lines, detections)
-
+        return frames
 
     # -------------------------
     # Limpieza
@@ -324,22 +347,32 @@ class RiskDetectionApp:
     def cleanup(self):
         logger.info("🔻 Finalizando y liberando recursos...")
         if self.beacon: self.beacon.stop_controller()
-        if self.clip_writer: self.clip_writer.stop()
+        if self.monitor and self.cameras:
+            self.monitor.capture_stats = {cam.camera_id: cam.reader.stats() for cam in self.cameras if cam.reader}
+            self.monitor.overload_stats = self.overload.stats() if self.overload else {}
+        for cam in self.cameras:
+            cam.cleanup()
         self.db_logger.stop_logger()
-        if self.cap: self.cap.release()
-        if self.video_writer: self.video_writer.release()
         cv2.destroyAllWindows()
         if self.monitor:
             self.monitor.finalize(output_dir=self.cfg.LOG_DIR)
         logger.info("✅ Sesión finalizada correctamente.")
 
+    def release_scenes(self):
+        """Libera las filas de las escenas de las cámaras en el banco del proceso (la app ya no se reinicia)."""
+        for cam in self.cameras:
+            cam.engine.release()
+        self.cameras = []
+
 
 # =============================
 # Punto de entrada
 # =============================
 if __name__ == "__main__":
     cfg = Config()
-    app = RiskDetectionApp(cfg)
+    cfg.apply_thread_settings()
+    # "multiprocess": captura, inferencia, motor e I/O en procesos separados
+    app = MultiProcessPipeline(cfg) if cfg.PIPELINE_MODE == "multiprocess" else RiskDetectionApp(cfg)
     while app.keep_running:
         try:
             app.setup()
@@ -350,4 +383,6 @@ if __name__ == "__main__":
             time.sleep(15)
         if not app.keep_running:
             break
+    if isinstance(app, RiskDetectionApp):
+        app.runner.stop()  # Con INFERENCE_EXECUTOR=process detiene los procesos de los modelos
     sys.exit(0)
@@ -0,0 +1,516 @@
+# risk_detection/multiprocess_pipeline.py
+import cv2
+import copy
+import time
+import queue
+import signal
+import sys
+import logging
+import numpy as np
+import multiprocessing as mp
+from datetime import datetime
+import pytz
+
+from camera_stream import CameraStream
+from in_out.frame_reader import FrameReader
+from in_out.shm_ring import SharedFrameRing
+from utils.frame_pool import FrameSlot
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+STAGES = ("capture", "inference", "engine", "io")
+
+
+# ============================================================
+# Contadores compartidos por etapa (para reportar contrapresión)
+# ============================================================
+class StageCounters:
+    """Contadores en memoria compartida: frames procesados, descartados y segundos ocupados."""
+
+    def __init__(self, ctx):
+        self._values = ctx.Array("d", 3)
+
+    def add(self, processed=0, dropped=0, busy=0.0):
+        with self._values.get_lock():
+            self._values[0] += processed
+            self._values[1] += dropped
+            self._values[2] += busy
+
+    def snapshot(self):
+        with self._values.get_lock():
+            return {"processed": int(self._values[0]), "dropped": int(self._values[1]), "busy_sec": self._values[2]}
+
+
+# ============================================================
+# Proxies del proceso del motor hacia el proceso de I/O
+# ============================================================
+class ClipCommandProxy:
+    """Reemplaza al VideoClipWriter en el proceso del motor: reenvía START/STOP al proceso de I/O."""
+
+    def __init__(self, io_q, cam_idx):
+        self.io_q = io_q
+        self.cam_idx = cam_idx
+
+    def put_frame(self, slot):
+        pass  # Los frames de los clips llegan al proceso de I/O directamente desde la captura
+
+    def start_clip(self, scene_name, pre_roll_frames, video_file_name):
+        self.io_q.put(("start_clip", self.cam_idx, scene_name, video_file_name))
+
+    def stop_clip(self, scene_name):
+        self.io_q.put(("stop_clip", self.cam_idx, scene_name))
+
+    def stop(self):
+        pass
+
+
+class DBLoggerProxy:
+    """Reemplaza al DBLogger en el proceso del motor: reenvía los eventos al proceso de I/O."""
+
+    def __init__(self, io_q):
+        self.io_q = io_q
+
+    def log_event(self, **event):
+        self.io_q.put(("event", event))
+
+
+def _ignore_sigint():
+    # El supervisor coordina el apagado con stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+
+def _get(q, stop_event, timeout=0.5):
+    """get() que despierta periódicamente para revisar stop_event. Devuelve None si se detuvo."""
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=timeout)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _put(q, item, stop_event, timeout=0.5):
+    """put() bloqueante (contrapresión) que respeta stop_event. Devuelve el tiempo bloqueado."""
+    t0 = time.monotonic()
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=timeout)
+            break
+        except queue.Full:
+            continue
+    return time.monotonic() - t0
+
+
+# ============================================================
+# Etapas (cada una corre en su propio proceso)
+# ============================================================
+def capture_stage(cam_idx, cfg, ring_spec, infer_q, io_q, stop_event, counters):
+    """Decodifica la cámara y escribe cada frame, ya en la resolución de trabajo, en su anillo."""
+    _ignore_sigint()
+    cfg.apply_thread_settings()
+    ring = SharedFrameRing.attach(ring_spec)
+    reader = FrameReader(cfg.VIDEO_SOURCE, threaded=cfg.CAPTURE_THREADED, clock=cfg.FRAME_CLOCK)
+    height, width = ring.shape[:2]
+    try:
+        reader.open()
+        reader.start_controller()
+        while not stop_event.is_set():
+            ok, frame, ts = reader.read(timeout=cfg.CAPTURE_READ_TIMEOUT)
+            if not ok:
+                logger.warning(f"⚠️ [Pipeline/captura {cfg.CAMERA_ID}] No se pudo leer frame.")
+                break
+            t0 = time.monotonic()
+            seq, view = ring.slot_for_write()
+            if frame.shape == view.shape:
+                np.copyto(view, frame)
+            else:
+                cv2.resize(frame, (width, height), dst=view)
+            ring.commit(seq, ts)
+
+            dropped = 0
+            try:
+                infer_q.put_nowait((cam_idx, seq, ts))
+            except queue.Full:
+                dropped += 1  # Inferencia saturada: se descarta el frame para ella
+            if cfg.CLIP_ENABLED:
+                try:
+                    io_q.put_nowait(("frame", cam_idx, seq))
+                except queue.Full:
+                    dropped += 1
+            counters.add(processed=1, dropped=dropped, busy=time.monotonic() - t0)
+    finally:
+        reader.stop_controller()
+        ring.close()
+
+
+def inference_stage(cfg, cam_cfgs, ring_specs, scenes_active, infer_q, engine_q, stop_event, counters):
+    """
+    Ejecuta ambos modelos sobre un lote con el último frame disponible de cada cámara.
+    Con LAZY_POSE el estado de las escenas vive en el proceso del motor: aquí se corre la
+    pose si están las clases de alguna escena o si el motor reporta escenas activas.
+    """
+    _ignore_sigint()
+    cfg.apply_thread_settings()
+    from inference.model_runner import ModelRunner  # Solo este proceso carga los modelos
+    from risk_engine import RiskEngine
+    from inference.pose_crops import PoseRegionPlanner
+
+    rings = [SharedFrameRing.attach(spec) for spec in ring_specs]
+    runner = ModelRunner(cfg).load()
+    engines = [RiskEngine(cam_cfg) for cam_cfg in cam_cfgs]  # Solo para las entradas declaradas
+    planners = [PoseRegionPlanner(cam_cfg) for cam_cfg in cam_cfgs]
+    try:
+        while not stop_event.is_set():
+            item = _get(infer_q, stop_event)
+            if item is None:
+                break
+            # Drenar la cola quedándose con el frame más reciente de cada cámara
+            latest, dropped = {item[0]: item}, 0
+            while True:
+                try:
+                    more = infer_q.get_nowait()
+                except queue.Empty:
+                    break
+                dropped += more[0] in latest
+                latest[more[0]] = more
+
+            t0 = time.monotonic()
+            batch, frames = [], []
+            for cam_idx, seq, ts in latest.values():
+                view = rings[cam_idx].view(seq)
+                if view is None:
+                    dropped += 1  # La captura dio la vuelta al anillo antes de inferir
+                    continue
+                batch.append((cam_idx, seq, ts))
+                frames.append(view)
+            if not frames:
+                counters.add(dropped=dropped)
+                continue
+
+            cams = [cam_idx for cam_idx, _, _ in batch]
+            pose_needed = lambda objs: [
+                bool(scenes_active[c]) or engines[c].may_need_pose(det_obj) for c, det_obj in zip(cams, objs)
+            ]
+            pose_regions = lambda objs: [
+                planners[c].plan(det_obj, rings[c].shape) for c, det_obj in zip(cams, objs)
+            ]
+            rois = [cam_cfgs[c].DETECTOR_ROI for c in cams]
+            detections = runner.run_batch(frames, pose_needed=pose_needed, pose_regions=pose_regions, rois=rois)
+            for c, det in zip(cams, detections):
+                planners[c].observe(det["pose"][0])
+            busy = time.monotonic() - t0
+            for (cam_idx, seq, ts), det in zip(batch, detections):
+                if not rings[cam_idx].is_valid(seq):
+                    dropped += 1  # Slot sobrescrito durante la inferencia
+                    continue
+                _put(engine_q, (cam_idx, seq, ts, det), stop_event)
+            counters.add(processed=len(batch), dropped=dropped, busy=busy)
+    finally:
+        runner.stop()
+        for ring in rings:
+            ring.close()
+
+
+def engine_stage(cam_cfgs, ring_specs, fps_list, scenes_active, engine_q, io_q, stop_event, counters):
+    """Evalúa las escenas por cámara y envía eventos, comandos de clip y baliza al proceso de I/O."""
+    _ignore_sigint()
+    rings = [SharedFrameRing.attach(spec) for spec in ring_specs]
+    multi = len(cam_cfgs) > 1
+    cams = []
+    for cam_idx, (cam_cfg, fps) in enumerate(zip(cam_cfgs, fps_list)):
+        cam = CameraStream(cam_cfg, multi_camera=multi)
+        cam.clip_writer = ClipCommandProxy(io_q, cam_idx)
+        cam.setup_buffers(fps, pre_roll=False)
+        cams.append(cam)
+    # Copia propia del frame para el video de salida: la captura puede sobrescribir el slot del anillo antes de escribirlo
+    copies = [np.empty(ring.shape, dtype=np.uint8) if cam.video_writer else None for ring, cam in zip(rings, cams)]
+    db_proxy = DBLoggerProxy(io_q)
+    fps_smoothed, fps_timer = None, time.time()
+    beacons_dropped = 0
+    try:
+        while not stop_event.is_set():
+            item = _get(engine_q, stop_event)
+            if item is None:
+                break
+            cam_idx, seq, ts, detections = item
+            cam = cams[cam_idx]
+            t0 = time.monotonic()
+
+            view = rings[cam_idx].view(seq)
+            if view is not None and copies[cam_idx] is not None:
+                np.copyto(copies[cam_idx], view)
+                view = copies[cam_idx] if rings[cam_idx].is_valid(seq) else None  # Sobrescrito durante la copia
+            if view is None:
+                view = np.zeros(rings[cam_idx].shape, dtype=np.uint8)  # Solo afecta la visualización
+            any_risk, frame = cam.process(FrameSlot(None, view, ts), detections, db_proxy, fps_smoothed)
+            scenes_active[cam_idx] = cam.engine.any_scene_active
+            if cam.cfg.BEACON_ENABLED and any_risk:
+                try:
+                    io_q.put_nowait(("beacon",))  # Sin bloquear el motor si el I/O está atrasado
+                except queue.Full:
+                    beacons_dropped += 1
+                    counters.add(dropped=1)
+
+            now = time.time()
+            inst_fps = 1.0 / max(now - fps_timer, 1e-6)
+            fps_timer = now
+            fps_smoothed = inst_fps if fps_smoothed is None else (fps_smoothed * 0.9 + inst_fps * 0.1)
+
+            if cam.cfg.VISUALIZE:
+                cv2.imshow(cam.window_name, frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    logger.info("👤 Cierre manual (tecla 'q')")
+                    stop_event.set()
+            counters.add(processed=1, busy=time.monotonic() - t0)
+    finally:
+        if beacons_dropped:
+            logger.warning(f"⚠️ [Pipeline/engine] Activaciones de baliza descartadas por I/O saturado: {beacons_dropped}")
+        for cam in cams:
+            if cam.video_writer:
+                cam.video_writer.release()
+        cv2.destroyAllWindows()
+        for ring in rings:
+            ring.close()
+
+
+def io_stage(cfg, cam_cfgs, ring_specs, fps_list, io_q, stop_event, counters):
+    """Dueño de la BBDD, la baliza y los grabadores de clips (con su propio pre-roll por cámara)."""
+    _ignore_sigint()
+    from in_out.db_logger import DBLogger
+    from in_out.beacon_controller import BeaconController
+
+    rings = [SharedFrameRing.attach(spec) for spec in ring_specs]
+    db_logger = DBLogger(node_id=cfg.NODE_ID)
+    db_logger.start_logger(output_dir=cfg.LOG_DIR, db_file=cfg.RESULT_STORE_PATH)
+    beacon = None
+    if cfg.BEACON_ENABLED:
+        beacon = BeaconController(cfg)
+        beacon.start_controller()
+
+    multi = len(cam_cfgs) > 1
+    cams = []
+    for cam_cfg, fps in zip(cam_cfgs, fps_list):
+        io_cfg = copy.copy(cam_cfg)
+        io_cfg.VISUALIZE = False     # El lienzo y la salida de video son del proceso del motor
+        io_cfg.WRITE_OUTPUT = False
+        cam = CameraStream(io_cfg, multi_camera=multi)
+        cam._setup_clip_writer()
+        cam.setup_buffers(fps)
+        cams.append(cam)
+
+    try:
+        # Al detenerse se drena lo pendiente para no perder eventos
+        while True:
+            try:
+                msg = io_q.get(timeout=0.5)
+            except queue.Empty:
+                if stop_event.is_set():
+                    break
+                continue
+            t0 = time.monotonic()
+            kind = msg[0]
+            if kind == "frame":
+                _, cam_idx, seq = msg
+                cam = cams[cam_idx]
+                slot = cam.frame_pool.acquire()
+                if rings[cam_idx].copy_to(seq, slot.array):
+                    cam._push_pre_roll(slot)
+                    cam.clip_writer.put_frame(slot)
+                    counters.add(processed=1, busy=time.monotonic() - t0)
+                else:
+                    counters.add(dropped=1)  # El I/O se atrasó más que el tamaño del anillo
+                slot.release()
+            elif kind == "start_clip":
+                _, cam_idx, scene, video_file_name = msg
+                cam = cams[cam_idx]
+                cam.clip_writer.start_clip(scene, list(cam.pre_roll_buffer), video_file_name)
+            elif kind == "stop_clip":
+                _, cam_idx, scene = msg
+                cams[cam_idx].clip_writer.stop_clip(scene)
+            elif kind == "event":
+                db_logger.log_event(**msg[1])
+            elif kind == "beacon" and beacon:
+                beacon.trigger_alarm()
+    finally:
+        for cam in cams:
+            cam.cleanup()
+        if beacon:
+            beacon.stop_controller()
+        db_logger.stop_logger()
+        for ring in rings:
+            ring.close()
+
+
+# ============================================================
+# Supervisor
+# ============================================================
+class MultiProcessPipeline:
+    """
+    Topología multi-proceso: captura (un proceso por cámara), inferencia, motor de
+    escenas e I/O (BBDD, baliza, clips) en procesos separados, para usar varios
+    núcleos y evitar que los hilos de I/O compitan por el GIL con la inferencia.
+
+    Los frames viajan por un SharedFrameRing por cámara; por las colas solo viajan
+    números de secuencia, detecciones y eventos. Cada etapa reporta procesados,
+    descartados, ocupación y profundidad de su cola de entrada.
+
+    Misma interfaz que RiskDetectionApp (setup/run/keep_running) para el punto de entrada.
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.keep_running = True
+        self.bogota = pytz.timezone("America/Bogota")
+        self.ctx = mp.get_context("spawn")
+        self.rings = []
+        self.processes = {}
+        self.counters = {}
+        self.queues = {}
+        self.stop_event = None
+
+    # -------------------------
+    # Inicialización
+    # -------------------------
+    def setup(self):
+        logger.info("🚀 Iniciando Risk Detection Service (pipeline multi-proceso)...")
+        cam_cfgs = self.cfg.load_cameras()
+        fps_list = [self._probe_source(cam_cfg) for cam_cfg in cam_cfgs]
+        self.rings = [
+            SharedFrameRing(self.cfg.SHM_RING_SLOTS, (cam_cfg.RESIZE[1], cam_cfg.RESIZE[0], 3))
+            for cam_cfg in cam_cfgs
+        ]
+        ring_specs = [ring.spec() for ring in self.rings]
+        n_cams = len(cam_cfgs)
+
+        self.stop_event = self.ctx.Event()
+        self.queues = {
+            "inference": self.ctx.Queue(maxsize=self.cfg.PIPELINE_QUEUE_SIZE * n_cams),
+            "engine": self.ctx.Queue(maxsize=self.cfg.PIPELINE_QUEUE_SIZE * n_cams),
+            "io": self.ctx.Queue(maxsize=self.cfg.IO_QUEUE_SIZE),
+        }
+        self.counters = {stage: StageCounters(self.ctx) for stage in STAGES}
+        scenes_active = self.ctx.Array("b", n_cams)  # Motor → inferencia: cámaras con escenas activas (pose perezosa)
+
+        q, ev, cnt = self.queues, self.stop_event, self.counters
+        self.processes = {}
+        for cam_idx, (cam_cfg, spec) in enumerate(zip(cam_cfgs, ring_specs)):
+            self.processes[f"capture:{cam_cfg.CAMERA_ID}"] = self.ctx.Process(
+                target=capture_stage, args=(cam_idx, cam_cfg, spec, q["inference"], q["io"], ev, cnt["capture"]),
+                name=f"capture-{cam_cfg.CAMERA_ID}", daemon=True)
+        self.processes["inference"] = self.ctx.Process(
+            target=inference_stage, args=(self.cfg, cam_cfgs, ring_specs, scenes_active, q["inference"], q["engine"], ev, cnt["inference"]),
+            name="inference", daemon=True)
+        self.processes["engine"] = self.ctx.Process(
+            target=engine_stage, args=(cam_cfgs, ring_specs, fps_list, scenes_active, q["engine"], q["io"], ev, cnt["engine"]),
+            name="engine", daemon=True)
+        self.processes["io"] = self.ctx.Process(
+            target=io_stage, args=(self.cfg, cam_cfgs, ring_specs, fps_list, q["io"], ev, cnt["io"]),
+            name="io", daemon=True)
+
+        # Primero los consumidores, al final la captura
+        for name in ["io", "engine", "inference"] + [n for n in self.processes if n.startswith("capture:")]:
+            self.processes[name].start()
+        logger.info(f"✅ Pipeline iniciado: {list(self.processes)}")
+
+    def _probe_source(self, cam_cfg):
+        """Obtiene FPS y, con resolución nativa, el tamaño de la fuente para dimensionar el anillo."""
+        reader = FrameReader(cam_cfg.VIDEO_SOURCE, threaded=False)
+        try:
+            reader.open()
+        except RuntimeError:
+            logger.error(f"❌ [{cam_cfg.CAMERA_ID}] No se pudo abrir la fuente: {cam_cfg.VIDEO_SOURCE}")
+            raise
+        fps, frame_size = reader.fps, reader.frame_size
+        reader.stop_controller()
+        if cam_cfg.NATIVE_RESOLUTION and all(frame_size):
+            cam_cfg.apply_resolution(*frame_size)
+        return fps
+
+    # -------------------------
+    # Horarios y señales
+    # -------------------------
+    def is_within_schedule(self):
+        now = datetime.now(self.bogota)
+        if now.hour in self.cfg.HOURS_PAUSE and now.minute < self.cfg.MINUTES_PAUSE:
+            return False
+        return True
+
+    def graceful_shutdown(self, signum, frame):
+        logger.warning("🛑 Señal de apagado recibida. Deteniendo pipeline...")
+        self.keep_running = False
+
+    # -------------------------
+    # Supervisión
+    # -------------------------
+    def run(self):
+        signal.signal(signal.SIGINT, self.graceful_shutdown)
+        signal.signal(signal.SIGTERM, self.graceful_shutdown)
+
+        stats_timer = time.monotonic()
+        last = {stage: self.counters[stage].snapshot() for stage in STAGES}
+        while self.keep_running and not self.stop_event.is_set():
+            if not self.is_within_schedule():
+                logger.info(f"⏸️ Pausa por {self.cfg.MINUTES_PAUSE} minutos...")
+                self.cleanup()
+                time.sleep(60 * self.cfg.MINUTES_PAUSE)
+                return
+
+            dead = [name for name, p in self.processes.items() if not p.is_alive()]
+            if dead:
+                logger.warning(f"⚠️ Etapas terminadas: {dead}. Reiniciando pipeline...")
+                break
+
+            time.sleep(0.5)
+            now = time.monotonic()
+            if now - stats_timer >= self.cfg.CAPTURE_STATS_EVERY_SEC:
+                last = self._log_stats(last, now - stats_timer)
+                stats_timer = now
+
+        self.cleanup()
+
+    def _log_stats(self, last, elapsed):
+        """Registra por etapa: frames/s, descartados, ocupación y profundidad de la cola de entrada."""
+        input_queue = {"inference": "inference", "engine": "engine", "io": "io"}
+        current = {}
+        for stage in STAGES:
+            snap = self.counters[stage].snapshot()
+            current[stage] = snap
+            rate = (snap["processed"] - last[stage]["processed"]) / max(elapsed, 1e-6)
+            dropped = snap["dropped"] - last[stage]["dropped"]
+            busy = (snap["busy_sec"] - last[stage]["busy_sec"]) / max(elapsed, 1e-6)
+            depth = ""
+            if stage in input_queue:
+                q = self.queues[input_queue[stage]]
+                try:
+                    depth = f" | cola: {q.qsize()}"
+                except NotImplementedError:  # macOS no implementa qsize()
+                    depth = ""
+            flag = " ⚠️ contrapresión" if dropped > 0 else ""
+            logger.info(f"🧵 [Pipeline/{stage}] {rate:.1f} fps | descartados: {dropped} | ocupación: {100 * busy:.0f}%{depth}{flag}")
+        return current
+
+    # -------------------------
+    # Limpieza
+    # -------------------------
+    def cleanup(self):
+        if not self.processes:
+            return
+        logger.info("🔻 Deteniendo etapas del pipeline...")
+        self.stop_event.set()
+        for name, p in self.processes.items():
+            p.join(timeout=10.0)
+            if p.is_alive():
+                logger.error(f"🔴 La etapa {name} no terminó a tiempo. Forzando cierre.")
+                p.terminate()
+                p.join(timeout=2.0)
+        self.processes = {}
+        for ring in self.rings:
+            ring.close()
+        self.rings = []
+        logger.info("✅ Pipeline detenido.")
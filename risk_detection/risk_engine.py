@@ -6,22 +6,156 @@ from engine.pickup_tubular import PickupTubular
 from engine.tubular_pendulando import TubularPendulando
 from engine.zona_riesgo_pickup_tubular import zona_riesgo_pickup_tubular
 from engine.mano_safata import AcoplePintubularManoSafata
+import time
+import numpy as np
+from engine.base_scene import PRIORITY_LOW
+from engine.hysteresis_bank import HysteresisBank
+from utils.frame_clock import frame_stamp
+from engine.rules import RulePlan
+from engine.frame_context import FrameContext
+from utils.zone_index import ZoneIndex
+
+
+def as_context(det_obj, res_pose=None):
+    """FrameContext de las detecciones (o el mismo, si ya lo es)."""
+    return det_obj if isinstance(det_obj, FrameContext) else FrameContext(det_obj, res_pose)
+
 
 class RiskEngine:
-    def __init__(self, cfg):
+    """
+    Escenas de una cámara. Su estado de persistencia vive en filas del HysteresisBank del proceso
+    (compartido con las demás cámaras): evaluate_many() avanza las escenas de varias cámaras con
+    un solo paso vectorizado de histéresis.
+    """
+
+    def __init__(self, cfg, bank=None):
         self.cfg = cfg
-        self.scenes = [
-            ExtraccionStickout(cfg),
-            CabronAbierto(cfg),
-            PickupTubular(cfg),
-            TubularPendulando(cfg),
-            AcoplePintubular(cfg),
-            zona_riesgo_pickup_tubular(cfg),
-            AcoplePintubularManoSafata(cfg)
-        ]
-
-    def process(self, det_obj, res_pose, frame=None):
-        results = {}
-        for s in self.scenes:
-            results[s.name] = s.evaluate(det_obj, res_pose, frame) # Evaluamos cada unas de escenas de riesgos inicializadas arriba con sus respectivios riesgos
-        return results
+        self.bank = bank or HysteresisBank.shared()
+        if cfg.SCENE_RULES_FILE:
+            # Escenas declarativas (config_data/scene_rules.json) compiladas en un solo plan
+            self.scenes = RulePlan.from_file(cfg.SCENE_RULES_FILE, cfg, self.bank).scenes
+        else:
+            self.scenes = [scene(cfg, self.bank) for scene in (
+                ExtraccionStickout,
+                CabronAbierto,
+                PickupTubular,
+                TubularPendulando,
+                AcoplePintubular,
+                zona_riesgo_pickup_tubular,
+                AcoplePintubularManoSafata
+            )]
+        self.rows = np.array([s.row for s in self.scenes], dtype=np.int64)
+        self.labels = {s.name: s.label for s in self.scenes if s.label}
+        self.last_results = {}
+        self.frames_processed = 0
+        self._zones = None
+
+    def release(self):
+        """Libera las filas de las escenas en el banco (el motor no se vuelve a usar)."""
+        self.bank.release(self.rows)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.scenes = []
+
+    @property
+    def zones(self):
+        """ZoneIndex de las zonas de la cámara; se rearma solo si cambia la resolución de trabajo."""
+        if self._zones is None or self._zones.frame_size != tuple(self.cfg.RESIZE):
+            self._zones = ZoneIndex.from_config(self.cfg)
+        return self._zones
+
+    def needs_pose(self, det_obj, priority=None):
+        """True si alguna escena (solo las de 'priority', si se indica) usará keypoints en este frame (pose perezosa)."""
+        ctx = as_context(det_obj)
+        return any(s.needs_pose(ctx) for s in self.scenes if priority is None or s.priority == priority)
+
+    def may_need_pose(self, det_obj):
+        """Como needs_pose pero sin el estado de las escenas (solo clases presentes)."""
+        ctx = as_context(det_obj)
+        return any(s.may_need_pose(ctx) for s in self.scenes)
+
+    @property
+    def any_scene_active(self):
+        return bool(self.bank.scene_active[self.rows].any())
+
+    def has_activity(self, ctx, person_class=None):
+        """
+        True si hay actividad en la cámara (FrameContext del frame): alguna escena activa, alguna
+        con sus clases presentes o alguna persona (en la pose o como 'person_class' del detector).
+        """
+        if self.any_scene_active or len(ctx.keypoints_data):
+            return True
+        if person_class and person_class in ctx.classes:
+            return True
+        return any(s.preconditions_met(ctx) for s in self.scenes)
+
+    def process(self, det_obj, res_pose, frame=None, throttle_low=False, ts=None):
+        """
+        Evalúa las escenas con las detecciones de un frame. 'ts' es el timestamp del frame en
+        segundos (el de captura en vivo, el del video al reprocesar una grabación; None = ahora):
+        las ventanas de las escenas y la hora de los resultados siguen a ese reloj, no al de pared.
+        """
+        return self.evaluate(FrameContext(det_obj, res_pose, self.zones), frame, throttle_low, ts)
+
+    def evaluate(self, ctx, frame=None, throttle_low=False, ts=None):
+        """
+        Evalúa todas las escenas sobre el FrameContext del frame.
+        Con 'throttle_low' (sobrecarga) las escenas de prioridad baja se evalúan uno de cada
+        dos frames; en los demás repiten su último estado con la hora del frame.
+        """
+        return self.evaluate_many([self], [ctx], [frame], throttle_low, None if ts is None else [ts])[0]
+
+    @staticmethod
+    def evaluate_many(engines, ctxs, frames, throttle_low=False, timestamps=None):
+        """
+        Evalúa las escenas de varias cámaras (un FrameContext, un frame y un timestamp por motor)
+        en tres fases: condiciones de escena de todas, un paso de histéresis vectorizado por banco,
+        condiciones de riesgo de las que quedaron activas y otro paso vectorizado. Mismo resultado
+        que evaluar cada escena por separado. Devuelve los resultados {escena: ...} de cada motor.
+        """
+        if timestamps is None:
+            timestamps = [time.time()] * len(engines)
+        timestamps = [time.time() if ts is None else ts for ts in timestamps]
+        pending = []   # (motor, ctx, frame, escena, ts) a evaluar en este frame
+        for engine, ctx, frame, ts in zip(engines, ctxs, frames, timestamps):
+            engine.frames_processed += 1
+            ctx.zones = ctx.zones or engine.zones
+            for s in engine.scenes:
+                prev = engine.last_results.get(s.name)
+                if throttle_low and s.priority == PRIORITY_LOW and prev is not None and engine.frames_processed % 2:
+                    continue
+                pending.append((engine, ctx, frame, s, ts))
+
+        by_bank = {}
+        for item in pending:
+            by_bank.setdefault(id(item[3].bank), []).append(item)
+        for items in by_bank.values():
+            bank = items[0][3].bank
+            rows = np.array([s.row for _, _, _, s, _ in items], dtype=np.int64)
+            scenes = [s.scene_condition(ctx) for _, ctx, _, s, _ in items]
+            now = [ts for *_, ts in items]
+            evaluate_risk = bank.step_scene(rows, [bool(c) for c in scenes], [c is not None for c in scenes], now)
+
+            active = [item for item, flag in zip(items, evaluate_risk) if flag]
+            risks = [bool(s.risk_condition(ctx)) for _, ctx, _, s, _ in active]
+            bank.step_risk(rows[evaluate_risk], risks)
+            for (engine, ctx, frame, s, ts), risk in zip(active, risks):
+                if frame is not None and engine.cfg.VISUALIZE:
+                    s.draw(ctx, frame, risk)
+
+        all_results = []
+        for engine, ts in zip(engines, timestamps):
+            stamp = frame_stamp(ts)   # Una sola hora formateada por frame para todas las escenas
+            results = {}
+            scene_active = engine.bank.scene_active[engine.rows].tolist()
+            risk_active = engine.bank.risk_active[engine.rows].tolist()
+            for s, scene, risk in zip(engine.scenes, scene_active, risk_active):
+                prev = engine.last_results.get(s.name)
+                if throttle_low and s.priority == PRIORITY_LOW and prev is not None and engine.frames_processed % 2:
+                    results[s.name] = s.make_result(prev["scene"], prev["risk"], stamp=stamp)
+                    continue
+                if scene and risk:
+                    s.log_state()
+                results[s.name] = s.make_result(scene, risk, stamp=stamp)
+            engine.last_results = results
+            all_results.append(results)
+        return all_results
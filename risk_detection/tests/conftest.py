@@ -0,0 +1,56 @@
+# risk_detection/tests/conftest.py
+# Las pruebas importan los módulos igual que la aplicación: relativos a risk_detection/.
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCENE_RULES = os.path.join(REPO_ROOT, "config_data", "scene_rules.json")
+SCENE_CLASSES = ("stickout", "brazotaladro", "tubular", "pintubular", "cabron", "safata")
+
+
+@pytest.fixture
+def cfg():
+    pytest.importorskip("torch")  # config.py elige el dispositivo con torch
+    from config import Config
+    return Config()
+
+
+def scene_frames(cfg, seed=0, n_frames=2000, fps=15.0):
+    """
+    Secuencia sintética (ts, sv.Detections, [PoseResult]) con las clases de las escenas moviéndose
+    en la zona de trabajo (varias instancias por clase, saltos de altura del stickout) y personas
+    con keypoints al azar: activa escenas y riesgos de todos los tipos de forma reproducible.
+    """
+    import supervision as sv
+    from inference.results import PoseResult
+
+    rng = np.random.default_rng(seed)
+    width, height = cfg.RESIZE
+    low, high = [width * 0.25, height * 0.25], [width * 0.55, height * 0.55]
+    state = {c: np.array([*rng.uniform(low, high), *rng.uniform(40, 200, 2)]) for c in SCENE_CLASSES}
+    kps = rng.uniform([width * 0.2, height * 0.2], [width * 0.7, height * 0.8], (3, 17, 2))
+    for f in range(n_frames):
+        boxes, names = [], []
+        for c in SCENE_CLASSES:
+            state[c][:2] = np.clip(state[c][:2] + rng.normal(0, 8, 2), low, high)
+            state[c][2:] = np.clip(state[c][2:] * rng.normal(1, 0.04, 2), 20, 400)
+            if c == "stickout" and rng.random() < 0.03:
+                state[c][3] *= 1.6
+            if rng.random() < 0.8:
+                for k in range(rng.integers(1, 3)):
+                    x, y, w, h = state[c] + (0 if k == 0 else rng.normal(0, 30, 4))
+                    boxes.append([x, y, x + abs(w), y + abs(h)])
+                    names.append(c)
+        xyxy = np.array(boxes, dtype=np.float32).reshape(-1, 4)
+        det = sv.Detections(xyxy=xyxy, class_id=np.zeros(len(xyxy), dtype=int), data={"class_name": np.array(names)})
+        kps += rng.normal(0, 10, kps.shape)
+        people = rng.integers(0, 4)
+        pose = PoseResult(np.concatenate([kps[:people], np.ones((people, 17, 1))], axis=-1).astype(np.float32))
+        if rng.random() < 0.02:
+            kps = rng.uniform([width * 0.2, height * 0.2], [width * 0.7, height * 0.8], (3, 17, 2))
+        yield 1.7e9 + f / fps, det, [pose]
@@ -0,0 +1,31 @@
+# risk_detection/tests/test_backend_parity.py
+"""
+Paridad ONNX Runtime vs. PyTorch (tools/backend_parity.py) como prueba. Necesita los pesos,
+ultralytics y onnxruntime, y un video real en BACKEND_PARITY_SOURCE (en frames sintéticos sin
+objetos la paridad sería trivial):
+    BACKEND_PARITY_SOURCE=videos/escena.mp4 python -m pytest tests/test_backend_parity.py
+"""
+import os
+
+import pytest
+
+from inference.executors import MODEL_KINDS
+
+SOURCE = os.environ.get("BACKEND_PARITY_SOURCE")
+FRAMES = int(os.environ.get("BACKEND_PARITY_FRAMES", 50))
+MIN_MATCH = 0.97
+
+
+@pytest.mark.skipif(not SOURCE, reason="BACKEND_PARITY_SOURCE no definido")
+def test_onnx_matches_torch(cfg):
+    pytest.importorskip("ultralytics")
+    pytest.importorskip("onnxruntime")
+    from inference.backends import model_weights
+    from tools.backend_parity import read_frames, run_parity
+
+    missing = [model_weights(kind, cfg) for kind in MODEL_KINDS if not os.path.exists(model_weights(kind, cfg))]
+    if missing:
+        pytest.skip(f"Pesos no disponibles: {missing}")
+    parity, _ = run_parity(cfg, read_frames(SOURCE, FRAMES, cfg.RESIZE), warmup=2)
+    for kind, stats in parity.items():
+        assert stats["match_rate"] >= MIN_MATCH, (kind, stats)
@@ -0,0 +1,29 @@
+# risk_detection/tests/test_backends.py
+import os
+
+from inference.backends import INT8_SOURCE_KEY, file_sha256, int8_is_current
+
+
+def test_int8_tracks_fp32_hash(tmp_path):
+    fp32 = tmp_path / "model.onnx"
+    int8 = tmp_path / "model.int8.onnx"
+    fp32.write_bytes(b"pesos v1")
+    int8.write_bytes(b"int8")
+    meta = {INT8_SOURCE_KEY: file_sha256(fp32)}
+    assert int8_is_current(str(fp32), str(int8), meta)
+
+    fp32.write_bytes(b"pesos v2")  # Reexportado después de cuantizar
+    assert not int8_is_current(str(fp32), str(int8), meta)
+
+
+def test_int8_without_hash_falls_back_to_mtime(tmp_path):
+    fp32 = tmp_path / "model.onnx"
+    int8 = tmp_path / "model.int8.onnx"
+    fp32.write_bytes(b"pesos")
+    int8.write_bytes(b"int8")
+    os.utime(fp32, (1000, 1000))
+    os.utime(int8, (2000, 2000))
+    assert int8_is_current(str(fp32), str(int8), {})
+
+    os.utime(fp32, (3000, 3000))
+    assert not int8_is_current(str(fp32), str(int8), {})
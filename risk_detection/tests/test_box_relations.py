@@ -0,0 +1,51 @@
+# risk_detection/tests/test_box_relations.py
+import numpy as np
+from shapely.geometry import Point, box as shapely_box
+
+from utils.box_relations import BoxRelations, point_box_distance, points_in_boxes
+
+
+def random_boxes(rng, n, size=200):
+    xy = rng.integers(0, size, (n, 2)).astype(np.float64)
+    wh = rng.integers(1, size // 2, (n, 2)).astype(np.float64)
+    return np.hstack([xy, xy + wh])
+
+
+def test_pairwise_geometry_matches_shapely():
+    """Lo que las escenas calculaban par a par con shapely (intersección, overlap_min, distancia, alineación)."""
+    rng = np.random.default_rng(0)
+    a, b = random_boxes(rng, 40), random_boxes(rng, 30)
+    rel = BoxRelations(a, b)
+    assert rel.shape == (40, 30)
+    for i, box_a in enumerate(a):
+        pa = shapely_box(*box_a)
+        for j, box_b in enumerate(b):
+            pb = shapely_box(*box_b)
+            inter = pa.intersection(pb).area
+            assert np.isclose(rel.intersection[i, j], inter)
+            assert np.isclose(rel.overlap_min[i, j], inter / max(min(pa.area, pb.area), 1.0))
+            assert np.isclose(rel.iou[i, j], inter / pa.union(pb).area)
+            assert np.isclose(rel.distance[i, j], pa.distance(pb))
+            assert np.isclose(rel.center_dx[i, j], abs(pa.centroid.x - pb.centroid.x))
+            w_avg = ((pa.bounds[2] - pa.bounds[0]) + (pb.bounds[2] - pb.bounds[0])) / 2.0
+            assert np.isclose(rel.width_avg[i, j], w_avg)
+
+
+def test_empty_classes_give_empty_matrices():
+    rel = BoxRelations(np.empty((0, 4)), random_boxes(np.random.default_rng(1), 3))
+    assert rel.shape == (0, 3)
+    assert not (rel.overlap_min > 0).any()
+
+
+def test_points_match_shapely():
+    rng = np.random.default_rng(2)
+    boxes = random_boxes(rng, 8)
+    points = np.concatenate([rng.uniform(-20, 320, (500, 2)),
+                             boxes[:, :2], boxes[:, 2:], (boxes[:, :2] + boxes[:, 2:]) / 2])  # Esquinas y centros
+    inside, dist = points_in_boxes(points, boxes), point_box_distance(points, boxes)
+    for p, point in enumerate(points):
+        pt = Point(*point)
+        for k, box in enumerate(boxes):
+            poly = shapely_box(*box)
+            assert inside[p, k] == pt.within(poly)
+            assert np.isclose(dist[p, k], pt.distance(poly))
@@ -0,0 +1,27 @@
+# risk_detection/tests/test_camera_stream.py
+from camera_stream import RISK_DICT, hud_lines
+
+
+def test_hud_shows_no_for_labelled_scene_without_risk():
+    """Con SCENE_RULES_FILE todas las escenas tienen etiqueta: sin riesgo el HUD debe decir NO."""
+    labels = {"extraccion_stickout": "Pie en el radio de giro (regla)"}
+    results = {
+        "extraccion_stickout": {"scene": True, "risk": False},
+        "cabron_abierto": {"scene": False, "risk": False},
+    }
+    assert hud_lines(results, labels) == [
+        "Escena extraccion_stickout: SI | Riesgo: NO",
+        "Escena cabron_abierto: NO | Riesgo: NO",
+    ]
+
+
+def test_hud_risk_text_prefers_rule_label():
+    results = {
+        "extraccion_stickout": {"scene": True, "risk": True},
+        "cabron_abierto": {"scene": True, "risk": True},
+    }
+    lines = hud_lines(results, {"extraccion_stickout": "Etiqueta de la regla"})
+    assert lines == [
+        "Escena extraccion_stickout: SI | Riesgo: Etiqueta de la regla",
+        f"Escena cabron_abierto: SI | Riesgo: {RISK_DICT['cabron_abierto']}",
+    ]
@@ -0,0 +1,62 @@
+# risk_detection/tests/test_executors.py
+import os
+import types
+
+import pytest
+
+from inference.executors import ProcessExecutor
+
+
+def _echo_worker(kind, cfg, threads, conn):
+    """Proceso de modelo falso: responde a cada lote con una etiqueta por frame (sin modelos reales)."""
+    conn.send(("ready", kind))
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        if msg[0] == "attach":
+            continue
+        if kind == "pose" and cfg.DIE_FILE and os.path.exists(cfg.DIE_FILE):
+            os.remove(cfg.DIE_FILE)
+            os._exit(1)  # Muere a mitad del lote, sin responder
+        conn.send(("ok", [f"{kind}:{frame}" for frame in msg[1]]))
+
+
+class EchoExecutor(ProcessExecutor):
+    worker = staticmethod(_echo_worker)
+
+
+def make_cfg(die_file=None):
+    return types.SimpleNamespace(INFERENCE_THREADS_OBJ=0, INFERENCE_THREADS_POSE=0,
+                                 SHARED_PREPROCESS=False, DIE_FILE=die_file)
+
+
+@pytest.fixture
+def executor():
+    executor = EchoExecutor(make_cfg()).start()
+    yield executor
+    executor.stop()
+
+
+def test_respawns_killed_model_process(executor):
+    assert executor.predict(["a", "b"]) == (["objects:a", "objects:b"], ["pose:a", "pose:b"])
+    killed = executor.procs["pose"]
+    killed.kill()
+    killed.join()
+
+    assert executor.predict(["c"]) == (["objects:c"], ["pose:c"])
+    assert executor.procs["pose"].pid != killed.pid
+    assert all(proc.is_alive() for proc in executor.procs.values())
+
+
+def test_retries_batch_when_model_dies_mid_batch(tmp_path):
+    die_file = tmp_path / "die"
+    executor = EchoExecutor(make_cfg(str(die_file))).start()
+    try:
+        first = executor.procs["pose"]
+        die_file.touch()
+        assert executor.predict(["a"]) == (["objects:a"], ["pose:a"])
+        assert not first.is_alive()
+        assert executor.predict(["b"]) == (["objects:b"], ["pose:b"])  # Sin respuestas desfasadas del lote fallido
+    finally:
+        executor.stop()
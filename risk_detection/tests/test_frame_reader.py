@@ -0,0 +1,53 @@
+# risk_detection/tests/test_frame_reader.py
+import time
+
+import numpy as np
+import pytest
+
+from in_out.frame_reader import FrameReader
+from utils.frame_clock import CLOCK_CAPTURE, CLOCK_VIDEO
+
+SOURCE = "synthetic://?fps=15&width=64&height=48&realtime=0"
+
+
+def read_frames(reader, n):
+    frames = []
+    for _ in range(n):
+        ok, frame, ts = reader.read()
+        assert ok
+        frames.append((frame, ts))
+    return frames
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_capture_clock(threaded):
+    reader = FrameReader(SOURCE, threaded=threaded, latest_only=False, clock=CLOCK_CAPTURE)
+    reader.start_controller()
+    try:
+        before = time.time()
+        frames = read_frames(reader, 5)
+    finally:
+        reader.stop_controller()
+    assert all(frame.shape == (48, 64, 3) for frame, _ in frames)
+    stamps = [ts for _, ts in frames]
+    assert stamps == sorted(stamps)
+    assert before - 1.0 <= stamps[0] and stamps[-1] <= time.time()
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_video_clock(threaded):
+    base = 1_700_000_000.0
+    reader = FrameReader(SOURCE, threaded=threaded, latest_only=False, clock=CLOCK_VIDEO, clock_base=base)
+    reader.start_controller()
+    try:
+        frames = read_frames(reader, 5)
+    finally:
+        reader.stop_controller()
+    stamps = np.array([ts for _, ts in frames])
+    assert np.allclose(np.diff(stamps), 1 / 15.0)  # Un frame de video entre timestamps, sin importar el reloj de pared
+    assert base <= stamps[0] < base + 1.0
+
+
+def test_unknown_clock():
+    with pytest.raises(ValueError):
+        FrameReader(SOURCE, clock="wall")
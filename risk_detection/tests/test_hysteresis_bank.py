@@ -0,0 +1,157 @@
+# risk_detection/tests/test_hysteresis_bank.py
+import numpy as np
+
+from conftest import scene_frames
+from engine.frame_context import FrameContext
+from engine.hysteresis_bank import HysteresisBank
+from risk_engine import RiskEngine
+
+
+class ReferenceScene:
+    """Persistencia de una escena como la implementaban las clases una a una (antes del banco)."""
+
+    def __init__(self, scene_on, scene_off, risk_on, risk_off, window_sec=None):
+        self.scene_on, self.scene_off, self.risk_on, self.risk_off = scene_on, scene_off, risk_on, risk_off
+        self.window_sec = window_sec
+        self.deactivate_scene()
+
+    def deactivate_scene(self):
+        self.scene_active, self.scene_pos, self.scene_neg = False, 0, 0
+        self.risk_active, self.risk_pos, self.risk_neg = False, 0, 0
+        self.t0 = None
+
+    def remaining(self, now):
+        if not self.scene_active or self.t0 is None:
+            return 0.0
+        return max(0.0, self.window_sec - (now - self.t0))
+
+    def step(self, condition, valid, risk_condition, now):
+        if valid:
+            self.scene_pos, self.scene_neg = (self.scene_pos + 1, 0) if condition else (0, self.scene_neg + 1)
+        if self.window_sec is None:
+            if self.scene_pos >= self.scene_on:
+                self.scene_active = True
+            elif self.scene_neg >= self.scene_off:
+                self.deactivate_scene()
+            evaluated = self.scene_active
+        else:
+            if valid and not self.scene_active and self.scene_pos >= self.scene_on:
+                self.scene_active, self.t0 = True, now
+            evaluated = self.scene_active and self.remaining(now) > 0
+            if self.scene_active and not evaluated:
+                self.deactivate_scene()
+        if evaluated:
+            self.risk_pos, self.risk_neg = (self.risk_pos + 1, 0) if risk_condition else (0, self.risk_neg + 1)
+            if self.risk_pos >= self.risk_on:
+                self.risk_active = True
+            elif self.risk_neg >= self.risk_off:
+                self.risk_active = False
+        return evaluated
+
+
+def streaky(rng, n_rows, n_frames, p_flip):
+    """Condiciones bool [frames, filas] con rachas (cambian con probabilidad p_flip por frame)."""
+    flips = rng.random((n_frames, n_rows)) < p_flip
+    return (np.cumsum(flips, axis=0) + rng.integers(0, 2, n_rows)) % 2 == 1
+
+
+def test_vectorized_steps_match_reference():
+    rng = np.random.default_rng(0)
+    n_rows, n_frames = 24, 4000
+    bank = HysteresisBank(rows=4)  # Crece al registrar las filas
+    rows = bank.add(n_rows)
+    refs = []
+    for row in rows:
+        on, off, risk_on, risk_off = rng.integers(1, 8, 4)
+        window = float(rng.uniform(0.5, 4.0)) if row % 3 == 0 else None
+        bank.configure(row, on, off, risk_on, risk_off, window_sec=window)
+        refs.append(ReferenceScene(on, off, risk_on, risk_off, window))
+
+    scene = streaky(rng, n_rows, n_frames, 0.15)
+    risk = streaky(rng, n_rows, n_frames, 0.2)
+    valid = rng.random((n_frames, n_rows)) > 0.1
+    now = 100.0 + np.arange(n_frames)[:, None] / 15.0 + rng.uniform(0, 0.01, (1, n_rows))  # Un reloj por cámara
+    activity = np.zeros((2, n_rows), dtype=np.int64)
+    for f in range(n_frames):
+        evaluated = bank.step_scene(rows, scene[f], valid[f], now[f])
+        bank.step_risk(rows[evaluated], risk[f][evaluated])
+        expected = [ref.step(scene[f, i], valid[f, i], risk[f, i], now[f, i]) for i, ref in enumerate(refs)]
+        assert np.array_equal(evaluated, expected), f
+        assert np.array_equal(bank.scene_active[rows], [ref.scene_active for ref in refs]), f
+        assert np.array_equal(bank.risk_active[rows], [ref.risk_active for ref in refs]), f
+        activity += [bank.scene_active[rows], bank.risk_active[rows]]
+    assert (activity > 0).all()  # Todas las filas activaron escena y riesgo alguna vez
+
+
+def test_window_runs_on_frame_time():
+    bank = HysteresisBank()
+    rows = bank.add(1)
+    bank.configure(rows[0], 1, 1, 1, 1, window_sec=2.0)
+    opened = []
+    for f in range(60):  # 4 s de frames a 15 fps, evaluados sin esperar
+        bank.step_scene(rows, [True], [True], 1000.0 + f / 15.0)
+        opened.append(round(bank.t0[rows[0]] - 1000.0, 3))
+    # Se cierra a los 2 s de video (t0 vacío en ese frame) y se reabre en el siguiente
+    assert opened[:30] == [0.0] * 30
+    assert np.isnan(opened[30])
+    assert opened[31:] == [2.067] * 29
+    assert np.isclose(bank.last_ts[rows[0]], 1000.0 + 59 / 15.0)
+
+
+def test_heights_ring_buffer():
+    bank = HysteresisBank()
+    rows = bank.add(2)
+    bank.configure_heights(rows[0], 4)
+    bank.configure_heights(rows[1], 8)
+    for h in range(1, 11):
+        bank.push_heights(rows, [h, 10 * h])
+    assert bank.heights_of(rows[0]) == [7.0, 8.0, 9.0, 10.0]
+    assert bank.heights_of(rows[1]) == [10.0 * h for h in range(3, 11)]
+    # Sin las 3 más recientes; con menos de 6 alturas se usa el valor de respaldo
+    assert np.allclose(bank.trailing_mean(rows, [-1.0, -1.0]), [-1.0, np.mean([30, 40, 50, 60, 70])])
+
+
+def test_shared_bank_matches_separate_banks(cfg):
+    """evaluate_many sobre un banco compartido por varias cámaras = cada cámara con su propio banco."""
+    cfg.VISUALIZE = False
+    shared = HysteresisBank()
+    engines = [RiskEngine(cfg, shared) for _ in range(3)]
+    solo = [RiskEngine(cfg, HysteresisBank()) for _ in range(3)]
+    streams = [scene_frames(cfg, seed=seed, n_frames=1000) for seed in (1, 2, 3)]
+    for frames in zip(*streams):
+        ctxs = [FrameContext(det, pose) for _, det, pose in frames]
+        batched = RiskEngine.evaluate_many(engines, ctxs, [None] * len(ctxs), timestamps=[ts for ts, _, _ in frames])
+        for results, engine, (ts, det, pose) in zip(batched, solo, frames):
+            assert results == engine.process(det, pose, ts=ts)
+
+
+def test_released_rows_are_reused_clean():
+    bank = HysteresisBank()
+    first = bank.add(7)
+    bank.configure(first[0], 1, 1, 1, 1, window_sec=2.0)
+    bank.configure_heights(first[0], 4)
+    bank.step_scene(first, [True] * 7, [True] * 7, 10.0)
+    bank.push_heights(first, np.ones(7))
+    size = bank.size
+
+    bank.release(first)
+    assert bank.in_use == 0
+    again = bank.add(7)
+    assert bank.size == size and sorted(again) == sorted(first)
+    assert not bank.scene_active[again].any()
+    assert np.isnan(bank.window[again]).all() and np.isnan(bank.last_ts[again]).all()
+    assert (bank.heights_cap[again] == 0).all() and (bank.scene_on[again] == 0).all()
+
+
+def test_engine_rebuilds_keep_bank_size(cfg):
+    """Como el worker del clúster en cada reasignación: armar y descartar motores no hace crecer el banco."""
+    bank = HysteresisBank()
+    engines = [RiskEngine(cfg, bank) for _ in range(2)]
+    size = bank.size
+    for _ in range(5):
+        for engine in engines:
+            engine.release()
+        engines = [RiskEngine(cfg, bank) for _ in range(2)]
+        assert bank.size == size and bank.in_use == size
+    for ts, det, pose in scene_frames(cfg, seed=4, n_frames=50):
+        engines[0].process(det, pose, ts=ts)
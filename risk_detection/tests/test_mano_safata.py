@@ -0,0 +1,45 @@
+# risk_detection/tests/test_mano_safata.py
+import numpy as np
+import supervision as sv
+
+from engine.frame_context import FrameContext
+from engine.hysteresis_bank import HysteresisBank
+from engine.mano_safata import AcoplePintubularManoSafata
+from inference.results import PoseResult
+
+STICKOUT = [300.0, 200.0, 400.0, 300.0]
+
+
+def context(safata, foot=(350.0, 310.0)):
+    """Stickout y safata (sin solaparse) y una persona con ambos pies en 'foot'."""
+    det = sv.Detections(xyxy=np.array([STICKOUT, safata], dtype=np.float32), class_id=np.zeros(2, dtype=int),
+                        data={"class_name": np.array(["stickout", "safata"])})
+    kps = np.zeros((1, 17, 3), dtype=np.float32)
+    kps[0, :, :2] = foot
+    kps[0, :, 2] = 1.0
+    return FrameContext(det, [PoseResult(kps)])
+
+
+def test_scene_activates_on_distance_without_overlap(cfg):
+    """
+    Cajas cercanas (a menos de MANO_DIST_PX) sin solaparse y el pie junto al stickout activan la
+    escena. Antes de la vectorización esa rama leía 'self.sfg' y fallaba: solo activaba el solapamiento.
+    """
+    scene = AcoplePintubularManoSafata(cfg, HysteresisBank())
+    gap = cfg.MANO_DIST_PX / 2
+    ctx = context([400.0 + gap, 200.0, 500.0, 300.0])
+    assert ctx.relation("stickout", "safata").overlap_min.max() == 0.0
+    assert scene.scene_condition(ctx)
+
+    for f in range(cfg.MANO_SCENE_ON):
+        scene.evaluate(context([400.0 + gap, 200.0, 500.0, 300.0]), None, ts=100.0 + f / 15.0)
+    assert scene.scene_active
+
+
+def test_scene_needs_distance_or_overlap_and_foot(cfg):
+    scene = AcoplePintubularManoSafata(cfg, HysteresisBank())
+    far = 400.0 + 2 * cfg.MANO_DIST_PX + 1.0
+    assert not scene.scene_condition(context([far, 200.0, far + 100.0, 300.0]))
+    near = 400.0 + cfg.MANO_DIST_PX / 2
+    away = (350.0, 300.0 + cfg.MANO_PIE_PROX_PX + 50.0)
+    assert not scene.scene_condition(context([near, 200.0, near + 100.0, 300.0], foot=away))
@@ -0,0 +1,39 @@
+# risk_detection/tests/test_replay.py
+import sqlite3
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")  # tools.replay importa config.py
+from tools.replay import compare_live, live_risk_times, replay_risk_times
+from utils.frame_clock import frame_stamp
+
+BASE = 1_700_000_000.0
+FPS = 15.0
+
+
+def write_live_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE riesgos (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, scene_name TEXT, "
+                 "scene_active BOOLEAN, risk_active BOOLEAN, video_file TEXT, camera_id TEXT, node_id TEXT)")
+    conn.executemany("INSERT INTO riesgos (timestamp, scene_name, scene_active, risk_active, camera_id) VALUES (?, ?, 1, 1, ?)",
+                     [(frame_stamp(ts), scene, camera) for ts, scene, camera in rows])
+    conn.commit()
+    conn.close()
+
+
+def test_compare_against_live_rows(tmp_path):
+    db = str(tmp_path / "riesgos.db")
+    # En vivo: el acople en riesgo 2 s desde t=10 s (con 0.2 s de desfase), y otra cámara al mismo tiempo
+    write_live_db(db, [(BASE + 10 + i / FPS + 0.2, "acople_pintubular", "cam01") for i in range(30)]
+                  + [(BASE + 10, "cabron_abierto", "cam02")])
+    frames = [(BASE + i / FPS, None) for i in range(600)]
+    results = [{"acople_pintubular": {"risk": 150 <= i < 180}, "cabron_abierto": {"risk": i == 500}} for i in range(600)]
+
+    live = live_risk_times(db, "cam01", frames[0][0], frames[-1][0])
+    report = compare_live(replay_risk_times(frames, results), live, tolerance=1.0)
+    assert report["acople_pintubular"] == {"replay_frames": 30, "live_rows": 30, "replay_matched": 1.0, "live_matched": 1.0}
+    assert report["cabron_abierto"]["live_rows"] == 0 and report["cabron_abierto"]["replay_matched"] == 0.0
+
+    shifted = compare_live(replay_risk_times(frames, results), {k: v + 5.0 for k, v in live.items()}, tolerance=1.0)
+    assert np.isclose(shifted["acople_pintubular"]["live_matched"], 0.0)
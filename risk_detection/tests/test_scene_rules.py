@@ -0,0 +1,27 @@
+# risk_detection/tests/test_scene_rules.py
+import copy
+
+from conftest import SCENE_RULES, scene_frames
+from engine.hysteresis_bank import HysteresisBank
+from risk_engine import RiskEngine
+
+
+def test_rules_match_scene_classes(cfg):
+    """Las reglas de config_data/scene_rules.json reproducen frame a frame las clases de engine/."""
+    cfg.VISUALIZE = False
+    cfg.SCENE_RULES_FILE = None
+    cfg_rules = copy.copy(cfg)
+    cfg_rules.SCENE_RULES_FILE = SCENE_RULES
+    classes = RiskEngine(cfg, HysteresisBank())
+    rules = RiskEngine(cfg_rules, HysteresisBank())
+
+    active = {}
+    for ts, det, pose in scene_frames(cfg, seed=0, n_frames=3000):
+        expected = classes.process(det, pose, ts=ts)
+        got = rules.process(det, pose, ts=ts)
+        assert got.keys() == expected.keys()
+        for scene, result in expected.items():
+            assert (got[scene]["scene"], got[scene]["risk"]) == (result["scene"], result["risk"]), (scene, ts)
+            active[scene] = active.get(scene, 0) + result["risk"]
+    assert sum(count > 0 for count in active.values()) >= 3  # La secuencia ejercita los riesgos de varias escenas
+
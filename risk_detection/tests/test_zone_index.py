@@ -0,0 +1,49 @@
+# risk_detection/tests/test_zone_index.py
+import numpy as np
+from shapely.geometry import Polygon
+
+from utils.zone_index import ZoneIndex
+from utils.geometry_utils import point_in_or_touch_poly
+
+FRAME_SIZE = (320, 180)
+ZONES = {
+    "convexa": np.array([[40, 30], [150, 20], [170, 120], [60, 150]], dtype=np.int32),
+    "concava": np.array([[180, 20], [300, 20], [300, 160], [240, 90], [180, 160]], dtype=np.int32),
+    "borde_frame": np.array([[0, 0], [60, 0], [0, 90]], dtype=np.int32),
+}
+
+
+def reference(points):
+    """Resultado de point_in_or_touch_poly (within o touches) punto a punto, como antes del índice."""
+    polys = [Polygon(ZONES[name]) for name in ZONES]
+    return np.array([[point_in_or_touch_poly(p, poly) for poly in polys] for p in points], dtype=bool)
+
+
+def test_matches_shapely_on_random_points():
+    rng = np.random.default_rng(0)
+    width, height = FRAME_SIZE
+    points = np.concatenate([
+        rng.uniform([-20, -20], [width + 20, height + 20], (20000, 2)),  # Incluye puntos fuera del frame
+        rng.integers(0, [width, height], (5000, 2)).astype(np.float64),   # Coordenadas enteras (keypoints redondeados)
+    ])
+    assert np.array_equal(ZoneIndex(ZONES, FRAME_SIZE).query(points), reference(points))
+
+
+def test_matches_shapely_on_vertices_and_edges():
+    points = []
+    for poly in ZONES.values():
+        for a, b in zip(poly, np.roll(poly, -1, axis=0)):
+            for t in np.linspace(0.0, 1.0, 9):
+                p = a + t * (b - a)
+                points.extend([p, p + 0.5, p - 0.5, p + [0.01, -0.01]])
+    points = np.array(points)
+    assert np.array_equal(ZoneIndex(ZONES, FRAME_SIZE).query(points), reference(points))
+
+
+def test_query_keeps_leading_shape():
+    index = ZoneIndex(ZONES, FRAME_SIZE)
+    points = np.random.default_rng(1).uniform(0, 180, (3, 17, 2))
+    hits = index.query(points)
+    assert hits.shape == (3, 17, len(ZONES))
+    assert np.array_equal(hits.reshape(-1, len(ZONES)), reference(points.reshape(-1, 2)))
+    assert index.query(np.empty((0, 2))).shape == (0, len(ZONES))
@@ -0,0 +1,200 @@
+# risk_detection/tools/autotune.py
+"""
+Autoajuste de la inferencia para el equipo actual.
+
+Mide sobre un clip grabado (resize + ambos modelos por frame, el peor caso) distintas
+combinaciones de backend, hilos intra-op e inter-op de torch, hilos de OpenCV y tamaño
+de entrada de los modelos, y escribe el perfil del equipo (HOST_PROFILE) que Config
+carga al arrancar. Cada prueba corre en un proceso nuevo porque los hilos de torch solo
+se pueden fijar una vez por proceso.
+
+La búsqueda es por etapas (cada etapa conserva lo mejor de la anterior): backend → hilos
+intra-op → hilos inter-op → hilos de OpenCV → resolución de trabajo (si se piden) → imgsz.
+Para imgsz se elige el mayor tamaño que alcanza --target-fps (o el más rápido si ninguno).
+
+Uso (desde risk_detection/):
+    python -m tools.autotune --source videos/escena.mp4
+    python -m tools.autotune --source videos/escena.mp4 --imgsz 480 640 800 --resolutions 960x540 1152x648
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import logging
+import statistics
+import subprocess
+from datetime import datetime
+
+import cv2
+import pytz
+
+from config import Config, _parse_resolution
+
+logger = logging.getLogger(__name__)
+
+RESULT_PREFIX = "AUTOTUNE_RESULT "
+
+
+# -------------------------
+# Prueba (proceso hijo)
+# -------------------------
+def run_trial(settings, source, n_frames, warmup):
+    """Aplica 'settings', carga los modelos y mide resize + inferencia por frame."""
+    from inference.model_runner import ModelRunner
+
+    cfg = Config()
+    for key, value in settings.items():
+        setattr(cfg, key, _parse_resolution(value) if key == "RESIZE" else value)
+    cfg.LAZY_POSE = False          # Ambos modelos en todos los frames
+    cfg.POSE_CROP_MODE = "full"
+    cfg.apply_thread_settings()
+    runner = ModelRunner(cfg).load()
+
+    cap = cv2.VideoCapture(source)
+    times = []
+    try:
+        while len(times) < warmup + n_frames:
+            ok, frame = cap.read()
+            if not ok:
+                cap.release()
+                cap = cv2.VideoCapture(source)  # Clip corto: se repite
+                ok, frame = cap.read()
+                if not ok:
+                    raise RuntimeError(f"No se pudieron leer frames de {source}")
+            t0 = time.perf_counter()
+            size = cfg.RESIZE or (frame.shape[1], frame.shape[0])
+            runner.run(frame if (frame.shape[1], frame.shape[0]) == size else cv2.resize(frame, size))
+            times.append((time.perf_counter() - t0) * 1000.0)
+    finally:
+        cap.release()
+        runner.stop()
+
+    times = sorted(times[warmup:])
+    pct = lambda q: round(times[min(len(times) - 1, int(q * len(times)))], 2)
+    mean = statistics.mean(times)
+    return {"fps": round(1000.0 / mean, 2), "mean_ms": round(mean, 2), "p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+# -------------------------
+# Búsqueda (proceso principal)
+# -------------------------
+class AutoTuner:
+    def __init__(self, args):
+        self.args = args
+        self.trials = []
+
+    def measure(self, settings):
+        """Corre una prueba en un proceso nuevo; None si falla (p. ej. backend no instalado)."""
+        cmd = [sys.executable, "-m", "tools.autotune", "--source", self.args.source, "--frames", str(self.args.frames),
+               "--warmup", str(self.args.warmup), "--trial", json.dumps(settings)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+        if proc.returncode != 0 or not lines:
+            logger.warning(f"⚠️ [Autotune] Prueba fallida {settings}: {proc.stderr.strip().splitlines()[-1:]}")
+            self.trials.append({"settings": settings, "result": None})
+            return None
+        result = json.loads(lines[-1][len(RESULT_PREFIX):])
+        logger.info(f"⏱️ [Autotune] {settings} → {result['fps']} FPS (p95 {result['p95_ms']}ms)")
+        self.trials.append({"settings": settings, "result": result})
+        return result
+
+    def stage(self, name, best, key_values):
+        """Prueba cada variante sobre 'best' y se queda con la de más FPS."""
+        logger.info(f"🔧 [Autotune] Etapa: {name}")
+        scored = []
+        for values in key_values:
+            settings = {**best[0], **values}
+            result = self.measure(settings)
+            if result is not None:
+                scored.append((settings, result))
+        if not scored:
+            return best
+        return max(scored + ([best] if best[1] else []), key=lambda sr: (sr[1]["fps"], -sr[1]["p95_ms"]))
+
+    def run(self, cfg):
+        cpu = os.cpu_count() or 1
+        threads = sorted({max(1, cpu // 4), max(1, cpu // 2), cpu})
+        settings = {
+            "INFERENCE_BACKEND": cfg.INFERENCE_BACKEND,
+            "INFERENCE_THREADS_OBJ": 0,
+            "INFERENCE_THREADS_POSE": 0,
+            "TORCH_INTEROP_THREADS": 0,
+            "CV2_THREADS": -1,
+            "MODEL_IMGSZ": cfg.MODEL_IMGSZ,
+        }
+        best = (settings, None)
+        best = self.stage("backend", best, [{"INFERENCE_BACKEND": b} for b in self.args.backends])
+        best = self.stage("hilos intra-op", best, [{"INFERENCE_THREADS_OBJ": t, "INFERENCE_THREADS_POSE": t} for t in threads])
+        best = self.stage("hilos inter-op", best, [{"TORCH_INTEROP_THREADS": t} for t in sorted({1, 2, max(1, cpu // 4)})])
+        best = self.stage("hilos OpenCV", best, [{"CV2_THREADS": t} for t in sorted({0, 2, max(2, cpu // 2)})])
+        if self.args.resolutions:
+            best = self.stage("resolución", best, [{"RESIZE": r} for r in self.args.resolutions])
+        return self.pick_imgsz(best)
+
+    def pick_imgsz(self, best):
+        """Mayor imgsz que alcanza el FPS objetivo; si ninguno lo alcanza, el más rápido."""
+        logger.info(f"🔧 [Autotune] Etapa: imgsz (objetivo {self.args.target_fps} FPS)")
+        scored = []
+        for imgsz in sorted(set(self.args.imgsz)):
+            settings = {**best[0], "MODEL_IMGSZ": imgsz}
+            result = best[1] if settings == best[0] else self.measure(settings)
+            if result is not None:
+                scored.append((settings, result))
+        if not scored:
+            return best
+        fast_enough = [sr for sr in scored if sr[1]["fps"] >= self.args.target_fps]
+        if fast_enough:
+            return max(fast_enough, key=lambda sr: sr[0]["MODEL_IMGSZ"])
+        logger.warning(f"⚠️ [Autotune] Ningún imgsz alcanza {self.args.target_fps} FPS; se elige el más rápido.")
+        return max(scored, key=lambda sr: sr[1]["fps"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autoajuste de la inferencia y perfil del equipo.")
+    parser.add_argument("--source", required=True, help="Clip grabado de la cámara.")
+    parser.add_argument("--frames", type=int, default=100, help="Frames medidos por prueba.")
+    parser.add_argument("--warmup", type=int, default=10, help="Frames de calentamiento por prueba.")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"], help="Backends candidatos.")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[480, 640, 800], help="Tamaños de entrada candidatos.")
+    parser.add_argument("--resolutions", nargs="*", default=[], help="Resoluciones de trabajo candidatas (p. ej. 960x540).")
+    parser.add_argument("--target-fps", type=float, default=None,
+                        help="FPS que debe sostener el equipo (por defecto DEFAULT_CAMERA_FPS × cámaras).")
+    parser.add_argument("--output", default=None, help="Ruta del perfil (por defecto HOST_PROFILE).")
+    parser.add_argument("--trial", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.trial is not None:
+        print(RESULT_PREFIX + json.dumps(run_trial(json.loads(args.trial), args.source, args.frames, args.warmup)), flush=True)
+        return 0
+
+    cfg = Config()
+    if args.target_fps is None:
+        args.target_fps = cfg.DEFAULT_CAMERA_FPS * len(cfg.load_cameras())
+    tuner = AutoTuner(args)
+    settings, result = tuner.run(cfg)
+    if result is None:
+        logger.error("🔴 [Autotune] Ninguna prueba terminó correctamente; no se escribe el perfil.")
+        return 1
+
+    profile = {
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "device": cfg.DEVICE,
+        "created": datetime.now(pytz.timezone("America/Bogota")).isoformat(),
+        "source": args.source,
+        "target_fps": args.target_fps,
+        "settings": settings,
+        "benchmark": result,
+        "trials": tuner.trials,
+    }
+    output = args.output or cfg.HOST_PROFILE
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=4, ensure_ascii=False)
+    logger.info(f"🟢 [Autotune] Perfil guardado en {output}: {settings} → {result['fps']} FPS (p95 {result['p95_ms']}ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
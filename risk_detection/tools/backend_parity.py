@@ -0,0 +1,189 @@
+# risk_detection/tools/backend_parity.py
+"""
+Paridad y latencia del backend ONNX Runtime frente a la ruta PyTorch.
+
+Corre ambos backends sobre los mismos frames de un video (mismo letterbox), empareja
+detecciones y personas por IoU y mide la latencia de cada modelo. Guarda un reporte
+JSON en LOG_DIR y termina con código 1 si la paridad queda bajo --min-match.
+
+Uso (desde risk_detection/):
+    python -m tools.backend_parity --source videos/escena.mp4 --frames 200
+    INFERENCE_THREADS_OBJ=4 INFERENCE_THREADS_POSE=4 python -m tools.backend_parity --source videos/escena.mp4
+"""
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import logging
+import statistics
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytz
+
+from config import Config
+from inference.executors import MODEL_KINDS, SingleModel
+from inference.preprocess import PreprocessedBatch
+from inference.tracking import greedy_match, iou_matrix
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx")
+
+
+def read_frames(source, n_frames, resize):
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < n_frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.resize(frame, resize) if resize else frame)
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"No se pudieron leer frames de {source}")
+    return frames
+
+
+class ParityStats:
+    def __init__(self):
+        self.ref = 0
+        self.test = 0
+        self.matched = 0
+        self.conf_diff = []
+        self.point_err = []
+
+    def add(self, n_ref, n_test, pairs, conf_diff, point_err):
+        self.ref += n_ref
+        self.test += n_test
+        self.matched += len(pairs)
+        self.conf_diff.extend(conf_diff)
+        self.point_err.extend(point_err)
+
+    def summary(self):
+        return {
+            "reference": self.ref,
+            "candidate": self.test,
+            "matched": self.matched,
+            "match_rate": round(self.matched / max(self.ref, self.test), 4) if max(self.ref, self.test) else 1.0,
+            "conf_abs_diff_mean": round(float(np.mean(self.conf_diff)), 4) if self.conf_diff else 0.0,
+            "point_err_px_mean": round(float(np.mean(self.point_err)), 3) if self.point_err else 0.0,
+            "point_err_px_max": round(float(np.max(self.point_err)), 3) if self.point_err else 0.0,
+        }
+
+
+def compare_objects(ref, test, iou_thres, stats):
+    same = ref.data["class_name"][:, None] == test.data["class_name"][None, :]
+    pairs = greedy_match(iou_matrix(ref.xyxy, test.xyxy), iou_thres, same)
+    conf = [abs(float(ref.confidence[i] - test.confidence[j])) for i, j in pairs]
+    err = [float(np.abs(ref.xyxy[i] - test.xyxy[j]).max()) for i, j in pairs]
+    stats.add(len(ref), len(test), pairs, conf, err)
+
+
+def compare_pose(ref, test, iou_thres, stats):
+    pairs = greedy_match(iou_matrix(ref.boxes_xyxy, test.boxes_xyxy), iou_thres)
+    conf = [abs(float(ref.boxes_conf[i] - test.boxes_conf[j])) for i, j in pairs]
+    err = []
+    for i, j in pairs:
+        a, b = ref.keypoints.xy[i], test.keypoints.xy[j]
+        visible = (a != 0).any(axis=1) & (b != 0).any(axis=1)
+        err.extend(np.linalg.norm(a[visible] - b[visible], axis=1).tolist())
+    stats.add(len(ref), len(test), pairs, conf, err)
+
+
+def latency_summary(times_ms):
+    ordered = sorted(times_ms)
+    return {
+        "mean_ms": round(statistics.mean(ordered), 2),
+        "p50_ms": round(ordered[len(ordered) // 2], 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2),
+    }
+
+
+def run_parity(cfg, frames, warmup=5, iou_thres=0.9):
+    """
+    Corre ambos backends sobre los mismos frames (mismo letterbox) y devuelve
+    (paridad {modelo: resumen}, latencia {backend: {modelo: resumen}}), con PyTorch como referencia.
+    """
+    batches = [PreprocessedBatch.from_frames([f], cfg.MODEL_IMGSZ) for f in frames]
+
+    models = {}
+    for backend in BACKENDS:
+        backend_cfg = copy.copy(cfg)
+        backend_cfg.INFERENCE_BACKEND = backend
+        if backend == "onnx":
+            backend_cfg.DEVICE = "cpu"
+        else:
+            backend_cfg.MODEL_PRECISION = "fp32"  # PyTorch es la referencia
+        models[backend] = {kind: SingleModel(kind, backend_cfg).load() for kind in MODEL_KINDS}
+    if cfg.DEVICE != "cpu":
+        logger.warning(f"⚠️ [Paridad] PyTorch corre en {cfg.DEVICE}: la latencia no es comparable con ONNX en CPU.")
+
+    outputs = {backend: {kind: [] for kind in MODEL_KINDS} for backend in BACKENDS}
+    times = {backend: {kind: [] for kind in MODEL_KINDS} for backend in BACKENDS}
+    for backend in BACKENDS:
+        for kind, model in models[backend].items():
+            for batch in batches[:warmup]:
+                model.predict(batch)
+            for batch in batches:
+                batch = PreprocessedBatch(batch.images, batch.infos)  # Sin tensores en caché de otra pasada
+                t0 = time.perf_counter()
+                outputs[backend][kind].append(model.predict(batch)[0])
+                times[backend][kind].append((time.perf_counter() - t0) * 1000.0)
+            logger.info(f"⏱️ [Paridad] {backend}/{kind}: {latency_summary(times[backend][kind])}")
+
+    parity = {"objects": ParityStats(), "pose": ParityStats()}
+    for ref, test in zip(outputs["torch"]["objects"], outputs["onnx"]["objects"]):
+        compare_objects(ref, test, iou_thres, parity["objects"])
+    for ref, test in zip(outputs["torch"]["pose"], outputs["onnx"]["pose"]):
+        compare_pose(ref, test, iou_thres, parity["pose"])
+
+    latency = {backend: {kind: latency_summary(times[backend][kind]) for kind in MODEL_KINDS} for backend in BACKENDS}
+    return {kind: stats.summary() for kind, stats in parity.items()}, latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridad y latencia ONNX Runtime vs. PyTorch.")
+    parser.add_argument("--source", required=True, help="Video de prueba (archivo o RTSP).")
+    parser.add_argument("--frames", type=int, default=200, help="Frames a comparar.")
+    parser.add_argument("--warmup", type=int, default=5, help="Inferencias de calentamiento por modelo.")
+    parser.add_argument("--iou", type=float, default=0.9, help="IoU mínimo para emparejar detecciones.")
+    parser.add_argument("--min-match", type=float, default=0.97, help="Tasa de emparejamiento mínima exigida.")
+    parser.add_argument("--output-dir", default=None, help="Carpeta del reporte (por defecto LOG_DIR).")
+    args = parser.parse_args()
+
+    cfg = Config()
+    frames = read_frames(args.source, args.frames, cfg.RESIZE)
+    parity, latency = run_parity(cfg, frames, args.warmup, args.iou)
+    report = {
+        "started": datetime.now(pytz.timezone("America/Bogota")).isoformat(),
+        "source": args.source,
+        "frames": len(frames),
+        "imgsz": cfg.MODEL_IMGSZ,
+        "threads": {"objects": cfg.INFERENCE_THREADS_OBJ, "pose": cfg.INFERENCE_THREADS_POSE},
+        "parity": parity,
+        "latency": latency,
+        "speedup": {kind: round(latency["torch"][kind]["mean_ms"] / latency["onnx"][kind]["mean_ms"], 2)
+                    for kind in MODEL_KINDS},
+    }
+    output_dir = args.output_dir or cfg.LOG_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, f"backend_parity_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    logger.info(f"📊 [Paridad] Reporte guardado en {report_path}")
+    logger.info(json.dumps({k: report[k] for k in ("parity", "speedup")}, indent=4, ensure_ascii=False))
+
+    failed = [kind for kind, stats in report["parity"].items() if stats["match_rate"] < args.min_match]
+    if failed:
+        logger.error(f"🔴 [Paridad] Paridad insuficiente en: {failed}")
+        return 1
+    logger.info("🟢 [Paridad] ONNX Runtime coincide con PyTorch.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
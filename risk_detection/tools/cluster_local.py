@@ -0,0 +1,131 @@
+# risk_detection/tools/cluster_local.py
+"""
+Prueba local del clúster: un coordinador y varios workers en procesos separados,
+con cámaras sintéticas y un almacén SQLite compartido en una carpeta temporal.
+
+Tras --kill-after segundos se detiene el primer worker y se verifica que sus cámaras
+se reasignan al resto. Al final se imprime el estado del coordinador y el conteo de
+eventos por nodo y cámara en el almacén consolidado.
+
+Uso (desde risk_detection/):
+    python -m tools.cluster_local --workers 3 --cameras 4 --duration 120 --kill-after 40
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+
+from config import Config
+from cluster.coordinator import Coordinator, serve
+
+logger = logging.getLogger(__name__)
+
+
+def _write_cameras_file(path, n_cameras, fps):
+    cameras = [
+        {"camera_id": f"sim{i:02d}", "source": f"synthetic://?fps={fps:g}&width=1152&height=648&seed={i}", "fps": fps}
+        for i in range(n_cameras)
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"cameras": cameras}, f, indent=4)
+
+
+def _start_worker(node_id, port, cameras_file, store_path, log_dir, capacity):
+    env = dict(os.environ,
+               NODE_ID=node_id,
+               COORDINATOR_URL=f"http://127.0.0.1:{port}",
+               CAMERAS_FILE=cameras_file,
+               RESULT_STORE_PATH=store_path,
+               LOG_DIR=log_dir,
+               NODE_CAPACITY_FPS=str(capacity),
+               VISUALIZE="False",
+               CLIP_ENABLED="False",
+               BEACON_ENABLED="False")
+    return subprocess.Popen([sys.executable, "-m", "cluster.worker"], env=env)
+
+
+def _store_counts(store_path):
+    if not os.path.exists(store_path):
+        return {}
+    conn = sqlite3.connect(store_path, timeout=30.0)
+    try:
+        rows = conn.execute("SELECT node_id, camera_id, COUNT(*) FROM riesgos GROUP BY node_id, camera_id").fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+    return {f"{node}/{cam}": n for node, cam, n in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coordinador + varios workers locales con cámaras sintéticas.")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--camera-fps", type=float, default=10.0)
+    parser.add_argument("--capacity", type=float, default=30.0, help="NODE_CAPACITY_FPS de cada worker.")
+    parser.add_argument("--duration", type=float, default=120.0, help="Segundos totales de la prueba.")
+    parser.add_argument("--kill-after", type=float, default=40.0, help="Segundos hasta detener el primer worker (0 = nunca).")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    cfg = Config()
+    workdir = tempfile.mkdtemp(prefix="cluster_local_")
+    cameras_file = os.path.join(workdir, "cameras.json")
+    store_path = os.path.join(workdir, "store", "registros_riesgos.db")
+    _write_cameras_file(cameras_file, args.cameras, args.camera_fps)
+    with open(cameras_file, "r", encoding="utf-8") as f:
+        cameras = json.load(f)["cameras"]
+
+    coordinator = Coordinator(cameras, node_timeout_sec=cfg.NODE_TIMEOUT_SEC, default_camera_fps=args.camera_fps)
+    server = serve(coordinator, "127.0.0.1", args.port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"🧪 [Cluster] Carpeta de trabajo: {workdir}")
+
+    workers = {
+        f"node{i}": _start_worker(f"node{i}", args.port, cameras_file, store_path, os.path.join(workdir, f"logs_node{i}"), args.capacity)
+        for i in range(args.workers)
+    }
+    t_start = time.monotonic()
+    killed = None
+    try:
+        while time.monotonic() - t_start < args.duration:
+            time.sleep(5.0)
+            if args.kill_after and killed is None and time.monotonic() - t_start >= args.kill_after:
+                killed = "node0"
+                logger.warning(f"💥 [Cluster] Deteniendo {killed} para forzar la reasignación")
+                workers[killed].terminate()
+            status = coordinator.status()
+            logger.info(f"📊 [Cluster] { {n: s['cameras'] for n, s in status['nodes'].items()} } | sin asignar: {status['unassigned']}")
+    finally:
+        for proc in workers.values():
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in workers.values():
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        server.shutdown()
+
+    status = coordinator.status()
+    report = {
+        "workdir": workdir,
+        "killed": killed,
+        "final_status": status,
+        "events_by_node_camera": _store_counts(store_path),
+    }
+    print(json.dumps(report, indent=4, ensure_ascii=False))
+    if killed and killed in status["nodes"]:
+        logger.error(f"🔴 [Cluster] {killed} sigue registrado tras detenerse")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
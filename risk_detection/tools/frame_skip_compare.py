@@ -0,0 +1,173 @@
+# risk_detection/tools/frame_skip_compare.py
+"""
+Validación offline del modo detectar-cada-N (DETECT_EVERY_N) contra la ejecución completa.
+
+Corre los modelos una sola vez sobre todos los frames de un video (referencia a tasa
+completa) y, para cada N pedido, reevalúa las escenas usando solo los keyframes y la
+extrapolación de inference/tracking.py en el resto. Compara las transiciones de escena y
+de riesgo (activación/desactivación) de cada escena: emparejadas, perdidas, espurias y su
+retraso en frames, además de la concordancia frame a frame del estado de riesgo.
+
+Uso (desde risk_detection/):
+    python -m tools.frame_skip_compare --source videos/escena.mp4 --every 2 3 4
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+import statistics
+from datetime import datetime
+
+import cv2
+import pytz
+
+from config import Config
+from inference.model_runner import ModelRunner
+from inference.tracking import MotionExtrapolator
+from risk_engine import RiskEngine
+from utils.frame_clock import VideoClock
+
+logger = logging.getLogger(__name__)
+
+FLAGS = ("scene", "risk")
+
+
+def run_models(cfg, source, max_frames):
+    """
+    Detecciones de todos los frames del video (pose en todos para no depender del estado) y el
+    timestamp de video de cada uno (s desde el inicio), para que las ventanas de las escenas
+    no dependan de la velocidad de la evaluación.
+    """
+    runner = ModelRunner(cfg).load()
+    cap = cv2.VideoCapture(source)
+    clock = VideoClock(cap, base=0.0)
+    detections, timestamps = [], []
+    try:
+        while max_frames is None or len(detections) < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            timestamps.append(clock(len(detections)))
+            frame = cv2.resize(frame, cfg.RESIZE)
+            detections.append(runner.run(frame))
+            if len(detections) % 500 == 0:
+                logger.info(f"🎞️ [Comparación] {len(detections)} frames inferidos...")
+    finally:
+        cap.release()
+        runner.stop()
+    if not detections:
+        raise RuntimeError(f"No se pudieron leer frames de {source}")
+    return detections, timestamps
+
+
+def scene_states(cfg, per_frame, timestamps):
+    """Estados {escena: {"scene": [...], "risk": [...]}} frame a frame con un motor nuevo."""
+    engine = RiskEngine(cfg)
+    states = {}
+    for detections, ts in zip(per_frame, timestamps):
+        for scene, data in engine.process(detections["objects"], detections["pose"], ts=ts).items():
+            st = states.setdefault(scene, {flag: [] for flag in FLAGS})
+            for flag in FLAGS:
+                st[flag].append(bool(data[flag]))
+    return states
+
+
+def skipped_detections(reference, every, frame_size):
+    """Lo que vería el motor con detección cada 'every' frames: keyframes reales y extrapolación entre medias."""
+    motion = MotionExtrapolator(frame_size)
+    for i, detections in enumerate(reference):
+        if i % every == 0:
+            motion.update(detections)
+            yield detections
+        else:
+            yield motion.predict()
+
+
+def transitions(values):
+    """[(frame, "on" | "off")] de una serie de booleanos."""
+    out, prev = [], False
+    for i, value in enumerate(values):
+        if value != prev:
+            out.append((i, "on" if value else "off"))
+        prev = value
+    return out
+
+
+def compare_transitions(ref, cand, tolerance):
+    """Empareja cada transición de referencia con la más cercana del mismo tipo dentro de la tolerancia."""
+    used, delays = set(), []
+    for frame, kind in ref:
+        options = [(abs(f - frame), idx, f) for idx, (f, k) in enumerate(cand)
+                   if k == kind and idx not in used and abs(f - frame) <= tolerance]
+        if options:
+            _, idx, f = min(options)
+            used.add(idx)
+            delays.append(f - frame)
+    return {
+        "reference": len(ref),
+        "candidate": len(cand),
+        "matched": len(delays),
+        "missed": len(ref) - len(delays),
+        "spurious": len(cand) - len(delays),
+        "delay_frames_mean": round(statistics.mean(delays), 2) if delays else None,
+        "delay_frames_max": max(delays, key=abs) if delays else None,
+    }
+
+
+def compare_states(ref_states, cand_states, tolerance):
+    report = {}
+    for scene, ref in ref_states.items():
+        cand = cand_states[scene]
+        report[scene] = {flag: compare_transitions(transitions(ref[flag]), transitions(cand[flag]), tolerance)
+                         for flag in FLAGS}
+        agree = sum(a == b for a, b in zip(ref["risk"], cand["risk"]))
+        report[scene]["risk_frame_agreement"] = round(agree / len(ref["risk"]), 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transiciones de escena/riesgo con detección cada N vs. tasa completa.")
+    parser.add_argument("--source", required=True, help="Video grabado de la cámara.")
+    parser.add_argument("--every", type=int, nargs="+", default=[2, 3, 4], help="Valores de N a evaluar.")
+    parser.add_argument("--max-frames", type=int, default=None, help="Limitar el número de frames.")
+    parser.add_argument("--tolerance", type=int, default=None,
+                        help="Frames de tolerancia para emparejar transiciones (por defecto N).")
+    parser.add_argument("--output-dir", default=None, help="Carpeta del reporte (por defecto LOG_DIR).")
+    args = parser.parse_args()
+
+    cfg = Config()
+    cfg.LAZY_POSE = False          # Pose en todos los frames: las detecciones no dependen del estado de las escenas
+    cfg.POSE_CROP_MODE = "full"
+    reference, timestamps = run_models(cfg, args.source, args.max_frames)
+    ref_states = scene_states(cfg, reference, timestamps)
+    logger.info(f"🟢 [Comparación] Referencia: {len(reference)} frames a tasa completa")
+
+    results = {}
+    for every in args.every:
+        cand_states = scene_states(cfg, skipped_detections(reference, every, cfg.RESIZE), timestamps)
+        results[str(every)] = compare_states(ref_states, cand_states, args.tolerance if args.tolerance is not None else every)
+        missed = sum(r[f]["missed"] for r in results[str(every)].values() for f in FLAGS)
+        spurious = sum(r[f]["spurious"] for r in results[str(every)].values() for f in FLAGS)
+        logger.info(f"📊 [Comparación] N={every}: {missed} transiciones perdidas, {spurious} espurias")
+
+    started = datetime.now(pytz.timezone("America/Bogota"))
+    report = {
+        "started": started.isoformat(),
+        "source": args.source,
+        "frames": len(reference),
+        "reference_transitions": {scene: {flag: transitions(st[flag]) for flag in FLAGS} for scene, st in ref_states.items()},
+        "results": results,
+    }
+    output_dir = args.output_dir or cfg.LOG_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, f"frame_skip_compare_{started.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    logger.info(f"📊 [Comparación] Reporte guardado en {report_path}")
+    logger.info(json.dumps(results, indent=4, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
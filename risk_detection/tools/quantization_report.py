@@ -0,0 +1,148 @@
+# risk_detection/tools/quantization_report.py
+"""
+Reporte de precisión/latencia de los modelos INT8 frente a los FP32 (backend ONNX).
+
+Sobre frames de un video de prueba mide, por modelo:
+  - Concordancia de detecciones por clase (emparejadas por IoU y clase) y diferencia de confianza.
+  - Error de keypoints en píxeles entre personas emparejadas.
+  - Latencia (media, p50, p95), tamaño en disco y memoria residente de cada sesión.
+Guarda un reporte JSON en LOG_DIR; termina con código 1 si alguna clase queda bajo --min-match.
+
+Uso (desde risk_detection/):
+    python -m tools.quantization_report --source videos/escena.mp4 --frames 300
+"""
+import os
+import gc
+import sys
+import copy
+import json
+import time
+import argparse
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import psutil
+import pytz
+
+from config import Config
+from inference.backends import export_onnx, int8_path, model_weights
+from inference.executors import MODEL_KINDS, SingleModel
+from inference.preprocess import PreprocessedBatch
+from inference.tracking import greedy_match, iou_matrix
+from tools.backend_parity import ParityStats, compare_pose, latency_summary, read_frames
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "int8")
+
+
+def load_measured(kind, cfg):
+    """Carga el modelo y devuelve (modelo, MB de memoria residente que añadió)."""
+    process = psutil.Process(os.getpid())
+    gc.collect()
+    rss = process.memory_info().rss
+    model = SingleModel(kind, cfg).load()
+    return model, (process.memory_info().rss - rss) / 2**20
+
+
+def compare_objects_per_class(ref, test, iou_thres, per_class):
+    """Concordancia por clase: cada clase se empareja solo consigo misma."""
+    for name in set(ref.data["class_name"]) | set(test.data["class_name"]):
+        r, t = ref.data["class_name"] == name, test.data["class_name"] == name
+        pairs = greedy_match(iou_matrix(ref.xyxy[r], test.xyxy[t]), iou_thres)
+        conf = [abs(float(ref.confidence[r][i] - test.confidence[t][j])) for i, j in pairs]
+        err = [float(np.abs(ref.xyxy[r][i] - test.xyxy[t][j]).max()) for i, j in pairs]
+        per_class[name].add(int(r.sum()), int(t.sum()), pairs, conf, err)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precisión y latencia INT8 vs. FP32 (ONNX Runtime).")
+    parser.add_argument("--source", required=True, help="Video de prueba (distinto de los de calibración).")
+    parser.add_argument("--frames", type=int, default=300, help="Frames a comparar.")
+    parser.add_argument("--warmup", type=int, default=5, help="Inferencias de calentamiento por modelo.")
+    parser.add_argument("--iou", type=float, default=0.7, help="IoU mínimo para emparejar detecciones.")
+    parser.add_argument("--min-match", type=float, default=0.9, help="Concordancia mínima por clase.")
+    parser.add_argument("--output-dir", default=None, help="Carpeta del reporte (por defecto LOG_DIR).")
+    args = parser.parse_args()
+
+    cfg = Config()
+    cfg.INFERENCE_BACKEND = "onnx"
+    frames = read_frames(args.source, args.frames, cfg.RESIZE)
+    batches = [PreprocessedBatch.from_frames([f], cfg.MODEL_IMGSZ) for f in frames]
+
+    outputs = {p: {} for p in PRECISIONS}
+    models = {}
+    for kind in MODEL_KINDS:
+        fp32_path = export_onnx(model_weights(kind, cfg), cfg)
+        models[kind] = {"fp32": {"size_mb": os.path.getsize(fp32_path) / 2**20},
+                        "int8": {"size_mb": os.path.getsize(int8_path(fp32_path)) / 2**20}}
+        for precision in PRECISIONS:
+            precision_cfg = copy.copy(cfg)
+            precision_cfg.MODEL_PRECISION = precision
+            model, rss_mb = load_measured(kind, precision_cfg)
+            for batch in batches[:args.warmup]:
+                model.predict(batch)
+            times, results = [], []
+            for batch in batches:
+                t0 = time.perf_counter()
+                results.append(model.predict(batch)[0])
+                times.append((time.perf_counter() - t0) * 1000.0)
+            outputs[precision][kind] = results
+            models[kind][precision].update({"rss_mb": round(rss_mb, 1), "latency": latency_summary(times)})
+            models[kind][precision]["size_mb"] = round(models[kind][precision]["size_mb"], 1)
+            logger.info(f"⏱️ [INT8] {kind}/{precision}: {models[kind][precision]}")
+            del model
+            gc.collect()
+
+    per_class = defaultdict(ParityStats)
+    for ref, test in zip(outputs["fp32"]["objects"], outputs["int8"]["objects"]):
+        compare_objects_per_class(ref, test, args.iou, per_class)
+    pose = ParityStats()
+    for ref, test in zip(outputs["fp32"]["pose"], outputs["int8"]["pose"]):
+        compare_pose(ref, test, args.iou, pose)
+
+    accuracy = {
+        "objects_per_class": {name: stats.summary() for name, stats in sorted(per_class.items())},
+        "pose": pose.summary(),
+    }
+    gain = {
+        kind: {
+            "speedup": round(m["fp32"]["latency"]["mean_ms"] / m["int8"]["latency"]["mean_ms"], 2),
+            "size_ratio": round(m["int8"]["size_mb"] / m["fp32"]["size_mb"], 3),
+            "rss_saved_mb": round(m["fp32"]["rss_mb"] - m["int8"]["rss_mb"], 1),
+        }
+        for kind, m in models.items()
+    }
+    started = datetime.now(pytz.timezone("America/Bogota"))
+    report = {
+        "started": started.isoformat(),
+        "source": args.source,
+        "frames": len(frames),
+        "imgsz": cfg.MODEL_IMGSZ,
+        "threads": {"objects": cfg.INFERENCE_THREADS_OBJ, "pose": cfg.INFERENCE_THREADS_POSE},
+        "accuracy": accuracy,
+        "models": models,
+        "gain": gain,
+    }
+    output_dir = args.output_dir or cfg.LOG_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, f"quantization_report_{started.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    logger.info(f"📊 [INT8] Reporte guardado en {report_path}")
+    logger.info(json.dumps({"accuracy": accuracy, "gain": gain}, indent=4, ensure_ascii=False))
+
+    rates = {name: s["match_rate"] for name, s in accuracy["objects_per_class"].items()}
+    rates["pose"] = accuracy["pose"]["match_rate"]
+    failed = [name for name, rate in rates.items() if rate < args.min_match]
+    if failed:
+        logger.error(f"🔴 [INT8] Concordancia bajo {args.min_match} en: {failed}")
+        return 1
+    logger.info("🟢 [INT8] Los modelos INT8 concuerdan con FP32 en todas las clases.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
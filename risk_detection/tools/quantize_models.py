@@ -0,0 +1,135 @@
+# risk_detection/tools/quantize_models.py
+"""
+Cuantización INT8 estática de los modelos de objetos y pose (backend ONNX).
+
+Exporta (o reutiliza) los .onnx FP32 de la caché, toma frames de calibración
+repartidos uniformemente por los videos grabados, con el mismo letterbox que usa el
+sistema, y genera <modelo>.int8.onnx junto a cada uno. El cabezal de decodificación
+(cajas, DFL, keypoints) se deja en FP32 para no perder precisión en las coordenadas.
+Después, revise tools/quantization_report.py antes de activar MODEL_PRECISION=int8.
+
+Uso (desde risk_detection/):
+    python -m tools.quantize_models --videos videos/turno1.mp4 videos/turno2.mp4 --samples 300
+"""
+import os
+import re
+import sys
+import argparse
+import logging
+import tempfile
+
+import cv2
+import numpy as np
+
+from config import Config
+from inference.backends import INT8_SOURCE_KEY, export_onnx, file_sha256, int8_path, model_weights
+from inference.executors import MODEL_KINDS
+from inference.preprocess import PreprocessedBatch
+
+logger = logging.getLogger(__name__)
+
+
+def sample_frames(videos, n_samples, resize):
+    """Frames repartidos uniformemente por todos los videos, a la resolución de trabajo."""
+    per_video = max(1, n_samples // len(videos))
+    frames = []
+    for video in videos:
+        cap = cv2.VideoCapture(video)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or per_video
+        for idx in np.linspace(0, total - 1, per_video).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+            ok, frame = cap.read()
+            if ok:
+                frames.append(cv2.resize(frame, resize) if resize else frame)
+        cap.release()
+        logger.info(f"🎞️ [Cuantización] {video}: {len(frames)} frames de calibración acumulados")
+    if not frames:
+        raise RuntimeError("No se obtuvo ningún frame de calibración")
+    return frames
+
+
+class FrameCalibrationReader:
+    """CalibrationDataReader de onnxruntime: un frame con letterbox por lectura."""
+
+    def __init__(self, input_name, frames, imgsz):
+        self.input_name = input_name
+        self.frames = frames
+        self.imgsz = imgsz
+        self.index = 0
+
+    def get_next(self):
+        if self.index >= len(self.frames):
+            return None
+        batch = PreprocessedBatch.from_frames([self.frames[self.index]], self.imgsz)
+        self.index += 1
+        x = batch.images.transpose(0, 3, 1, 2).astype(np.float32)
+        return {self.input_name: x / 255.0}
+
+    def rewind(self):
+        self.index = 0
+
+
+def head_nodes(model):
+    """Nodos del último módulo (cabezal Detect/Pose) que no son convoluciones: decodificación en FP32."""
+    pattern = re.compile(r"^/model\.(\d+)/")
+    indices = [int(m.group(1)) for node in model.graph.node if (m := pattern.match(node.name))]
+    if not indices:
+        return []
+    prefix = f"/model.{max(indices)}/"
+    return [node.name for node in model.graph.node if node.name.startswith(prefix) and node.op_type != "Conv"]
+
+
+def quantize(fp32_path, frames, imgsz, per_channel=True):
+    import onnx
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    out_path = int8_path(fp32_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        prepared = os.path.join(tmp, "prepared.onnx")
+        quant_pre_process(fp32_path, prepared)
+        model = onnx.load(prepared)
+        reader = FrameCalibrationReader(model.graph.input[0].name, frames, imgsz)
+        quantize_static(
+            prepared, out_path, reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            calibrate_method=CalibrationMethod.Percentile,
+            nodes_to_exclude=head_nodes(model),
+        )
+
+    # Los metadatos (clases, forma de keypoints) los necesita el backend al cargar; el hash del
+    # FP32 le permite detectar un INT8 cuantizado de pesos que ya se reexportaron
+    source = onnx.load(fp32_path, load_external_data=False)
+    quantized = onnx.load(out_path)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    quantized.metadata_props.add(key=INT8_SOURCE_KEY, value=file_sha256(fp32_path))
+    onnx.save(quantized, out_path)
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera las variantes INT8 de los modelos ONNX.")
+    parser.add_argument("--videos", nargs="+", required=True, help="Videos grabados de los que tomar la calibración.")
+    parser.add_argument("--samples", type=int, default=300, help="Frames de calibración en total.")
+    parser.add_argument("--models", nargs="+", choices=MODEL_KINDS, default=list(MODEL_KINDS))
+    parser.add_argument("--per-tensor", action="store_true", help="Escala por tensor en lugar de por canal.")
+    args = parser.parse_args()
+
+    cfg = Config()
+    frames = sample_frames(args.videos, args.samples, cfg.RESIZE)
+    for kind in args.models:
+        fp32_path = export_onnx(model_weights(kind, cfg), cfg)
+        logger.info(f"⚙️ [Cuantización] {kind}: calibrando {fp32_path} con {len(frames)} frames...")
+        out_path = quantize(fp32_path, frames, cfg.MODEL_IMGSZ, per_channel=not args.per_tensor)
+        size_fp32, size_int8 = os.path.getsize(fp32_path), os.path.getsize(out_path)
+        logger.info(f"🟢 [Cuantización] {kind}: {out_path} ({size_fp32 / 2**20:.1f} MB → {size_int8 / 2**20:.1f} MB)")
+    logger.info("📊 Compare la precisión con 'python -m tools.quantization_report' antes de activar MODEL_PRECISION=int8.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# risk_detection/tools/replay.py
+"""
+Reprocesa una grabación a velocidad de CPU con el reloj del video (FRAME_CLOCK=video).
+
+Cada frame lleva el timestamp inicio + PTS, así que las ventanas de las escenas (p. ej. los
+ACOPLE_WINDOW_SEC del acople) y la hora de los eventos siguen el tiempo del video, sin esperar
+el tiempo real. Reporta las transiciones de riesgo por escena y la aceleración lograda.
+Con --compare-db contrasta los frames en riesgo del replay con las filas de la tabla 'riesgos'
+que registró la ejecución en vivo de esa cámara durante la grabación: por escena, qué fracción
+de cada lado tiene un frame en riesgo del otro a menos de --tolerance segundos.
+
+Uso (desde risk_detection/):
+    python -m tools.replay --source videos/turno.mp4 --start 2026-10-17T06:00:00
+    python -m tools.replay --source videos/turno.mp4 --start 2026-10-17T06:00:00 \
+        --compare-db logs/registros_riesgos.db --camera-id cam01
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import logging
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytz
+
+from config import Config
+from inference.model_runner import ModelRunner
+from in_out.frame_reader import FrameReader
+from engine.hysteresis_bank import HysteresisBank
+from risk_engine import RiskEngine
+from utils.frame_clock import CLOCK_VIDEO, BOGOTA
+
+logger = logging.getLogger(__name__)
+
+
+def recording_start(source, start=None):
+    """Época (s) del primer frame: --start (hora de Bogotá) o, sin él, la fecha de modificación menos la duración."""
+    if start:
+        moment = datetime.fromisoformat(start)
+        return (moment if moment.tzinfo else BOGOTA.localize(moment)).timestamp()
+    cap = cv2.VideoCapture(source)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 15.0
+        duration = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+    finally:
+        cap.release()
+    return os.path.getmtime(source) - duration
+
+
+def run_models(cfg, source, base, max_frames):
+    """Detecciones y timestamp de video de cada frame."""
+    runner = ModelRunner(cfg).load()
+    reader = FrameReader(source, threaded=False, latest_only=False, clock=CLOCK_VIDEO, clock_base=base).open()
+    frames = []
+    try:
+        while max_frames is None or len(frames) < max_frames:
+            ok, frame, ts = reader.read()
+            if not ok:
+                break
+            frame = cv2.resize(frame, cfg.RESIZE)
+            frames.append((ts, runner.run(frame)))
+            if len(frames) % 500 == 0:
+                logger.info(f"🎞️ [Replay] {len(frames)} frames inferidos...")
+    finally:
+        reader.stop_controller()
+        runner.stop()
+    if not frames:
+        raise RuntimeError(f"No se pudieron leer frames de {source}")
+    return frames
+
+
+def evaluate(cfg, frames):
+    """Resultados del motor frame a frame (motor y banco de estado nuevos)."""
+    engine = RiskEngine(cfg, HysteresisBank())
+    return [engine.process(det["objects"], det["pose"], ts=ts) for ts, det in frames]
+
+
+def risk_events(results):
+    """Cada cambio de riesgo de una escena (inicio/fin, como los clips), con su hora de frame."""
+    events, prev = [], {}
+    for frame_idx, per_scene in enumerate(results):
+        for scene, data in per_scene.items():
+            if data["risk"] != prev.get(scene, False):
+                events.append({"frame": frame_idx, "scene_name": scene, "timestamp": data["time"],
+                               "scene_active": data["scene"], "risk_active": data["risk"]})
+            prev[scene] = data["risk"]
+    return events
+
+
+def replay_risk_times(frames, results):
+    """{escena: timestamps (s) ordenados de los frames del replay con riesgo activo}."""
+    times = {}
+    for (ts, _), per_scene in zip(frames, results):
+        for scene, data in per_scene.items():
+            if data["risk"]:
+                times.setdefault(scene, []).append(ts)
+    return {scene: np.array(ts) for scene, ts in times.items()}
+
+
+def live_risk_times(db_path, camera_id, start, end):
+    """{escena: timestamps (s) ordenados} de las filas en riesgo de la tabla 'riesgos' entre start y end."""
+    query = "SELECT scene_name, timestamp FROM riesgos WHERE risk_active"
+    params = ()
+    if camera_id:
+        query += " AND camera_id = ?"
+        params = (camera_id,)
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+    times = {}
+    for scene, stamp in rows:
+        ts = datetime.fromisoformat(stamp).timestamp()
+        if start <= ts <= end:
+            times.setdefault(scene, []).append(ts)
+    return {scene: np.sort(ts) for scene, ts in times.items()}
+
+
+def matched_fraction(times, reference, tolerance):
+    """Fracción de 'times' con algún timestamp de 'reference' a menos de 'tolerance' s (1.0 si no hay)."""
+    if not len(times):
+        return 1.0
+    if not len(reference):
+        return 0.0
+    idx = np.clip(np.searchsorted(reference, times), 1, len(reference) - 1)
+    nearest = np.minimum(np.abs(times - reference[idx - 1]), np.abs(times - reference[idx]))
+    return float(np.mean(nearest <= tolerance))
+
+
+def compare_live(replay, live, tolerance):
+    """Por escena: frames en riesgo de cada lado y la fracción de cada uno que el otro confirma."""
+    report, empty = {}, np.empty(0)
+    for scene in sorted(set(replay) | set(live)):
+        ours, theirs = replay.get(scene, empty), live.get(scene, empty)
+        report[scene] = {
+            "replay_frames": len(ours),
+            "live_rows": len(theirs),
+            "replay_matched": round(matched_fraction(ours, theirs, tolerance), 4),
+            "live_matched": round(matched_fraction(theirs, ours, tolerance), 4),
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprocesa una grabación con el reloj del video.")
+    parser.add_argument("--source", required=True, help="Video grabado de la cámara.")
+    parser.add_argument("--start", default=None, help="Hora del primer frame (ISO, hora de Bogotá si no tiene zona).")
+    parser.add_argument("--max-frames", type=int, default=None, help="Limitar el número de frames.")
+    parser.add_argument("--compare-db", default=None, help="BBDD de la ejecución en vivo (tabla 'riesgos') a contrastar.")
+    parser.add_argument("--camera-id", default=None, help="Cámara de la grabación en la BBDD (por defecto todas).")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="Segundos de tolerancia al emparejar frames en riesgo.")
+    parser.add_argument("--min-match", type=float, default=0.9, help="Fracción mínima emparejada por escena y lado.")
+    parser.add_argument("--output-dir", default=None, help="Carpeta del reporte (por defecto LOG_DIR).")
+    args = parser.parse_args()
+
+    cfg = Config()
+    cfg.LAZY_POSE = False          # Pose en todos los frames: las detecciones no dependen del estado de las escenas
+    cfg.POSE_CROP_MODE = "full"
+    base = recording_start(args.source, args.start)
+
+    t0 = time.perf_counter()
+    frames = run_models(cfg, args.source, base, args.max_frames)
+    t_models = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    results = evaluate(cfg, frames)
+    t_engine = time.perf_counter() - t0
+
+    live, failed = None, []
+    if args.compare_db:
+        replay_times = replay_risk_times(frames, results)
+        live_times = live_risk_times(args.compare_db, args.camera_id, frames[0][0] - args.tolerance,
+                                     frames[-1][0] + args.tolerance)
+        live = compare_live(replay_times, live_times, args.tolerance)
+        failed = [scene for scene, r in live.items() if min(r["replay_matched"], r["live_matched"]) < args.min_match]
+        logger.info(f"{'🔴' if failed else '🟢'} [Replay] Contraste con la ejecución en vivo: "
+                    f"{len(live)} escenas, bajo {args.min_match}: {failed or 'ninguna'}")
+
+    video_sec = frames[-1][0] - frames[0][0]
+    wall_sec = t_models + t_engine
+    started = datetime.now(pytz.timezone("America/Bogota"))
+    events = risk_events(results)
+    report = {
+        "started": started.isoformat(),
+        "source": args.source,
+        "recording_start": datetime.fromtimestamp(base, BOGOTA).isoformat(),
+        "frames": len(frames),
+        "video_sec": round(video_sec, 3),
+        "models_sec": round(t_models, 3),
+        "engine_sec": round(t_engine, 3),
+        "speedup": round(video_sec / wall_sec, 2) if wall_sec else None,
+        "live_comparison": live,
+        "events": events,
+    }
+    output_dir = args.output_dir or cfg.LOG_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, f"replay_{started.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    logger.info(f"📊 [Replay] {len(frames)} frames ({video_sec:.1f}s de video) en {wall_sec:.1f}s "
+                f"(x{report['speedup']}), {len(events)} eventos. Reporte en {report_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# risk_detection/tools/rules_parity.py
+"""
+Validación de las escenas declarativas (SCENE_RULES_FILE, engine/rules.py) contra las clases de engine/.
+
+Corre los modelos una sola vez sobre los frames de un video y evalúa con ambos motores las
+mismas detecciones, frame a frame. Reporta por escena los frames en que difiere el estado de
+escena o de riesgo (deben ser 0 si las reglas expresan exactamente las clases) y el tiempo
+medio de evaluación de cada motor.
+
+Uso (desde risk_detection/):
+    python -m tools.rules_parity --source videos/escena.mp4 --rules ../config_data/scene_rules.json
+"""
+import os
+import sys
+import json
+import time
+import copy
+import argparse
+import logging
+from datetime import datetime
+
+import pytz
+
+from config import Config
+from risk_engine import RiskEngine
+from tools.frame_skip_compare import run_models, FLAGS
+
+logger = logging.getLogger(__name__)
+
+
+def timed_states(cfg, per_frame, timestamps):
+    """Estados {escena: {"scene": [...], "risk": [...]}} y ms medios de evaluación por frame."""
+    engine = RiskEngine(cfg)
+    states, elapsed = {}, 0.0
+    for detections, ts in zip(per_frame, timestamps):
+        t0 = time.perf_counter()
+        results = engine.process(detections["objects"], detections["pose"], ts=ts)
+        elapsed += time.perf_counter() - t0
+        for scene, data in results.items():
+            st = states.setdefault(scene, {flag: [] for flag in FLAGS})
+            for flag in FLAGS:
+                st[flag].append(bool(data[flag]))
+    return states, 1000.0 * elapsed / max(len(per_frame), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escenas declarativas vs. clases de engine/ sobre un video.")
+    parser.add_argument("--source", required=True, help="Video grabado de la cámara.")
+    parser.add_argument("--rules", default=None, help="JSON de reglas (por defecto SCENE_RULES_FILE).")
+    parser.add_argument("--max-frames", type=int, default=None, help="Limitar el número de frames.")
+    parser.add_argument("--output-dir", default=None, help="Carpeta del reporte (por defecto LOG_DIR).")
+    args = parser.parse_args()
+
+    cfg = Config()
+    cfg.LAZY_POSE = False          # Pose en todos los frames: las detecciones no dependen del estado de las escenas
+    cfg.POSE_CROP_MODE = "full"
+    rules = args.rules or cfg.SCENE_RULES_FILE
+    if not rules:
+        logger.error("❌ [Reglas] Indique --rules o SCENE_RULES_FILE")
+        return 2
+
+    detections, timestamps = run_models(cfg, args.source, args.max_frames)
+    cfg_classes = copy.copy(cfg)
+    cfg_classes.SCENE_RULES_FILE = None
+    cfg_rules = copy.copy(cfg)
+    cfg_rules.SCENE_RULES_FILE = rules
+    ref_states, ref_ms = timed_states(cfg_classes, detections, timestamps)
+    rule_states, rule_ms = timed_states(cfg_rules, detections, timestamps)
+
+    scenes = {}
+    for scene, ref in ref_states.items():
+        cand = rule_states.get(scene)
+        if cand is None:
+            scenes[scene] = {"missing_rule": True}
+            continue
+        scenes[scene] = {f"{flag}_mismatch_frames": [i for i, (a, b) in enumerate(zip(ref[flag], cand[flag])) if a != b]
+                         for flag in FLAGS}
+    mismatches = sum(len(v) for r in scenes.values() for k, v in r.items() if k.endswith("_mismatch_frames"))
+    missing = [scene for scene, r in scenes.items() if r.get("missing_rule")]
+
+    started = datetime.now(pytz.timezone("America/Bogota"))
+    report = {
+        "started": started.isoformat(),
+        "source": args.source,
+        "rules": rules,
+        "frames": len(detections),
+        "engine_ms": {"classes": round(ref_ms, 3), "rules": round(rule_ms, 3)},
+        "extra_rules": sorted(set(rule_states) - set(ref_states)),
+        "scenes": scenes,
+    }
+    output_dir = args.output_dir or cfg.LOG_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, f"rules_parity_{started.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    logger.info(f"📊 [Reglas] Reporte guardado en {report_path}")
+    logger.info(f"📊 [Reglas] {len(detections)} frames: {mismatches} diferencias, escenas sin regla: {missing or 'ninguna'}, "
+                f"motor {ref_ms:.2f} ms (clases) vs {rule_ms:.2f} ms (reglas)")
+    return 0 if not mismatches and not missing else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+# risk_detection/tools/soak.py
+"""
+Prueba de resistencia (soak test) del RiskDetectionApp completo contra una fuente sintética.
+
+Ejecuta el sistema durante horas y registra periódicamente FPS, frames descartados,
+memoria residente (RSS) y profundidad de las colas de los workers de BBDD, clips y
+baliza. Al final guarda un reporte JSON en LOG_DIR con la deriva de FPS y el
+crecimiento de memoria.
+
+Uso (desde risk_detection/):
+    python -m tools.soak --hours 4 --source "synthetic://?fps=15&width=1920&height=1080"
+    python -m tools.soak --hours 1 --source "synthetic://videos/escena.mp4?stall_every=600&stall_sec=5"
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import threading
+import statistics
+from datetime import datetime
+
+import psutil
+import pytz
+
+from config import Config
+from in_out import db_logger as db_logger_module
+from main_realtime import RiskDetectionApp
+
+logger = logging.getLogger(__name__)
+
+
+class SoakSampler:
+    """Hilo que muestrea métricas del app en ejecución y lo detiene al cumplir la duración."""
+
+    def __init__(self, app, duration_sec, every_sec):
+        self.app = app
+        self.duration_sec = duration_sec
+        self.every_sec = every_sec
+        self.samples = []
+        self.restarts = 0
+        self.process = psutil.Process(os.getpid())
+        self.t_start = time.monotonic()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def _run(self):
+        while self.app.keep_running:
+            time.sleep(self.every_sec)
+            self.samples.append(self._sample())
+            if time.monotonic() - self.t_start >= self.duration_sec:
+                logger.info("⏱️ [Soak] Duración cumplida. Deteniendo aplicación...")
+                self.app.keep_running = False
+
+    def _sample(self):
+        cams = {}
+        for cam in self.app.cameras:
+            reader = cam.reader.stats() if cam.reader else {}
+            cams[cam.camera_id] = {
+                "frames_consumed": reader.get("frames_consumed", 0),
+                "frames_dropped": reader.get("frames_dropped", 0),
+                "queue_latency_ms_mean": reader.get("queue_latency_ms_mean", 0.0),
+                "clip_frame_queue": cam.clip_writer.frame_queue.qsize() if cam.clip_writer else 0,
+                "clip_command_queue": cam.clip_writer.command_queue.qsize() if cam.clip_writer else 0,
+                "frame_pool_in_use": cam.frame_pool.stats()["in_use"] if cam.frame_pool else 0,
+            }
+        return {
+            "t_sec": round(time.monotonic() - self.t_start, 1),
+            "fps": round(self.app.fps_smoothed or 0.0, 2),
+            "rss_mb": round(self.process.memory_info().rss / (1024 ** 2), 1),
+            "db_queue": db_logger_module.data_queue.qsize(),
+            "beacon_queue": self.app.beacon.queue.qsize() if self.app.beacon else 0,
+            "restarts": self.restarts,
+            "cameras": cams,
+        }
+
+
+def _slope_per_hour(xs_sec, ys):
+    """Pendiente por mínimos cuadrados, expresada por hora."""
+    if len(xs_sec) < 2:
+        return 0.0
+    mx, my = statistics.mean(xs_sec), statistics.mean(ys)
+    den = sum((x - mx) ** 2 for x in xs_sec)
+    if den == 0:
+        return 0.0
+    return 3600.0 * sum((x - mx) * (y - my) for x, y in zip(xs_sec, ys)) / den
+
+
+def summarize(samples, restarts):
+    """Resumen: deriva de FPS (primer vs. último 10%), crecimiento de RSS y colas máximas."""
+    if not samples:
+        return {}
+    n = max(1, len(samples) // 10)
+    fps_first = statistics.mean(s["fps"] for s in samples[:n])
+    fps_last = statistics.mean(s["fps"] for s in samples[-n:])
+    ts = [s["t_sec"] for s in samples]
+    rss = [s["rss_mb"] for s in samples]
+    last_cams = samples[-1]["cameras"]
+    return {
+        "duration_sec": ts[-1],
+        "fps_first_window": round(fps_first, 2),
+        "fps_last_window": round(fps_last, 2),
+        "fps_drift_percent": round(100.0 * (fps_last - fps_first) / fps_first, 2) if fps_first else None,
+        "rss_start_mb": rss[0],
+        "rss_end_mb": rss[-1],
+        "rss_growth_mb": round(rss[-1] - rss[0], 1),
+        "rss_slope_mb_per_hour": round(_slope_per_hour(ts, rss), 2),
+        "frames_consumed": {cid: c["frames_consumed"] for cid, c in last_cams.items()},
+        "frames_dropped": {cid: c["frames_dropped"] for cid, c in last_cams.items()},
+        "max_db_queue": max(s["db_queue"] for s in samples),
+        "max_beacon_queue": max(s["beacon_queue"] for s in samples),
+        "max_clip_frame_queue": max(c["clip_frame_queue"] for s in samples for c in s["cameras"].values()),
+        "max_frame_pool_in_use": max(c["frame_pool_in_use"] for s in samples for c in s["cameras"].values()),
+        "restarts": restarts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test del RiskDetectionApp con fuente sintética.")
+    parser.add_argument("--hours", type=float, default=1.0, help="Duración de la prueba en horas.")
+    parser.add_argument("--source", default="synthetic://?fps=15&width=1920&height=1080",
+                        help="Fuente de video (synthetic://..., archivo o RTSP).")
+    parser.add_argument("--sample-every", type=float, default=10.0, help="Segundos entre muestras.")
+    parser.add_argument("--output-dir", default=None, help="Carpeta del reporte (por defecto LOG_DIR).")
+    args = parser.parse_args()
+
+    cfg = Config()
+    cfg.VIDEO_SOURCE = args.source
+    cfg.CAMERAS_FILE = None
+    cfg.VISUALIZE = False
+    cfg.HOURS_PAUSE = []  # Sin pausas programadas durante la prueba
+    output_dir = args.output_dir or cfg.LOG_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    app = RiskDetectionApp(cfg)
+    sampler = SoakSampler(app, duration_sec=args.hours * 3600.0, every_sec=args.sample_every)
+    started = datetime.now(pytz.timezone("America/Bogota"))
+    logger.info(f"🧪 [Soak] Iniciando prueba de {args.hours:.2f}h contra {args.source}")
+    sampler.start()
+
+    # Mismo ciclo de reinicio que el punto de entrada de producción (las desconexiones reinician el app)
+    while app.keep_running:
+        try:
+            app.setup()
+            app.run()
+        except Exception as e:
+            logger.exception(f"❌ [Soak] Error en ejecución: {e}")
+            time.sleep(1.0)
+        if app.keep_running:
+            sampler.restarts += 1
+            logger.warning(f"♻️ [Soak] Reinicio #{sampler.restarts}")
+
+    report = {
+        "started": started.isoformat(),
+        "source": args.source,
+        "hours": args.hours,
+        "summary": summarize(sampler.samples, sampler.restarts),
+        "samples": sampler.samples,
+    }
+    report_path = os.path.join(output_dir, f"soak_report_{started.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    logger.info(f"📊 [Soak] Reporte guardado en {report_path}")
+    logger.info(json.dumps(report["summary"], indent=4, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# risk_detection/utils/activity_governor.py
+import sys
+import time
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+
+class ActivityGovernor:
+    """
+    Baja la tasa de procesamiento cuando no hay actividad en ninguna cámara (ninguna escena
+    activa, ninguna con sus clases presentes y ninguna persona) durante IDLE_AFTER_SEC: los
+    lectores pasan a decodificar solo ~IDLE_FPS frames por segundo (el resto se descarta con
+    grab(), sin decodificar). Con el primer frame con actividad vuelven a la tasa completa.
+    La decisión es común a todas las cámaras porque comparten el bucle y el lote de inferencia.
+    """
+
+    def __init__(self, cfg, readers):
+        self.enabled = cfg.IDLE_GOVERNOR_ENABLED
+        self.idle_fps = cfg.IDLE_FPS
+        self.idle_after = cfg.IDLE_AFTER_SEC
+        self.readers = readers
+        self.idle = False
+        self.last_activity = time.monotonic()
+
+    def update(self, activity):
+        """'activity': una bandera por cámara con la actividad del frame recién procesado."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if any(activity):
+            self.last_activity = now
+            if self.idle:
+                self._set_idle(False)
+        elif not self.idle and now - self.last_activity >= self.idle_after:
+            self._set_idle(True)
+
+    def _set_idle(self, idle):
+        self.idle = idle
+        for reader in self.readers:
+            stride = max(1, round(reader.fps / self.idle_fps)) if idle else 1
+            reader.set_decode_stride(stride)
+        if idle:
+            logger.info(f"💤 [Gobernador] Sin actividad en {self.idle_after:.0f}s: modo ocioso a ~{self.idle_fps:.1f} FPS")
+        else:
+            logger.info("⚡ [Gobernador] Actividad detectada: tasa completa")
@@ -0,0 +1,69 @@
+# risk_detection/utils/box_relations.py
+import numpy as np
+
+
+def box_areas(boxes):
+    """Áreas de cajas xyxy [M,4]."""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+
+class BoxRelations:
+    """
+    Relaciones entre todas las instancias de dos clases (cajas xyxy A [M,4] y B [N,4]),
+    calculadas de una vez con broadcasting. Cada matriz es [M,N]:
+        - intersection / iou
+        - overlap_min: intersección / max(min(área A, área B), 1) (como hacían las escenas)
+        - distance: distancia entre bordes (0 si se tocan o solapan; igual que shapely.distance)
+        - center_dx: |cx A - cx B| y width_avg: promedio de los anchos (alineación horizontal)
+    """
+
+    def __init__(self, boxes_a, boxes_b):
+        a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)[:, None, :]
+        b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)[None, :, :]
+        self.shape = (a.shape[0], b.shape[1])
+
+        iw = np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0])
+        ih = np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1])
+        self.intersection = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+        area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+        area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+        union = area_a + area_b - self.intersection
+        self.iou = np.divide(self.intersection, union, out=np.zeros(self.shape), where=union > 0)
+        self.overlap_min = self.intersection / np.maximum(np.minimum(area_a, area_b), 1.0)
+
+        dx = np.clip(np.maximum(a[..., 0] - b[..., 2], b[..., 0] - a[..., 2]), 0, None)
+        dy = np.clip(np.maximum(a[..., 1] - b[..., 3], b[..., 1] - a[..., 3]), 0, None)
+        self.distance = np.hypot(dx, dy)
+
+        self.center_dx = np.abs((a[..., 0] + a[..., 2]) - (b[..., 0] + b[..., 2])) / 2.0
+        self.width_avg = ((a[..., 2] - a[..., 0]) + (b[..., 2] - b[..., 0])) / 2.0
+
+
+def box_regions(boxes, region):
+    """
+    Sub-caja de cada caja xyxy [M,4]: 'region' = (fx1, fy1, fx2, fy2) como fracciones del ancho y
+    alto medidas desde la esquina superior izquierda (p. ej. la entrada de la safata).
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    fx1, fy1, fx2, fy2 = region
+    width = boxes[:, 2] - boxes[:, 0]
+    height = boxes[:, 3] - boxes[:, 1]
+    return np.stack([boxes[:, 0] + width * fx1, boxes[:, 1] + height * fy1,
+                     boxes[:, 0] + width * fx2, boxes[:, 1] + height * fy2], axis=1)
+
+
+def point_box_distance(points, boxes):
+    """Distancia [P,B] de cada punto (x, y) a cada caja xyxy (0 dentro o sobre el borde)."""
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)[:, None, :]
+    b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)[None, :, :]
+    dx = np.clip(np.maximum(b[..., 0] - p[..., 0], p[..., 0] - b[..., 2]), 0, None)
+    dy = np.clip(np.maximum(b[..., 1] - p[..., 1], p[..., 1] - b[..., 3]), 0, None)
+    return np.hypot(dx, dy)
+
+
+def points_in_boxes(points, boxes):
+    """bool [P,B]: punto estrictamente dentro de la caja (como Point.within(caja))."""
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)[:, None, :]
+    b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)[None, :, :]
+    return (p[..., 0] > b[..., 0]) & (p[..., 0] < b[..., 2]) & (p[..., 1] > b[..., 1]) & (p[..., 1] < b[..., 3])
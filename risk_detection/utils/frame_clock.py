@@ -0,0 +1,37 @@
+# risk_detection/utils/frame_clock.py
+import time
+from datetime import datetime
+
+import cv2
+import pytz
+
+BOGOTA = pytz.timezone("America/Bogota")
+
+# Origen del timestamp de cada frame (Config.FRAME_CLOCK)
+CLOCK_CAPTURE = "capture"   # time.time() del momento de captura
+CLOCK_VIDEO = "video"       # Inicio del video + PTS del frame (CAP_PROP_POS_MSEC)
+FRAME_CLOCKS = (CLOCK_CAPTURE, CLOCK_VIDEO)
+
+
+def frame_stamp(ts, tz=BOGOTA):
+    """Hora ISO (America/Bogota) de un timestamp en segundos: la misma para todas las escenas del frame."""
+    return datetime.fromtimestamp(ts, tz).isoformat()
+
+
+class VideoClock:
+    """
+    Reloj de un video: base (época en s del primer frame) + PTS del último frame leído.
+    Si la fuente no informa PTS se usa el índice del frame / FPS.
+    """
+
+    def __init__(self, cap, base=None, fps=None):
+        self.cap = cap
+        self.base = time.time() if base is None else base
+        self.fps = fps or cap.get(cv2.CAP_PROP_FPS) or 15.0
+
+    def __call__(self, frame_index):
+        """Timestamp del frame número 'frame_index' (desde 0) recién leído."""
+        msec = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        if not msec and frame_index:
+            msec = 1000.0 * frame_index / self.fps
+        return self.base + msec / 1000.0
@@ -0,0 +1,74 @@
+# risk_detection/utils/frame_pool.py
+import threading
+import numpy as np
+
+
+class FrameSlot:
+    """
+    Buffer de frame preasignado con conteo de referencias.
+    Cada consumidor (pre-roll, grabador de clips, bucle principal) hace retain()
+    al guardarlo y release() al terminar; con 0 referencias vuelve al pool.
+    """
+    __slots__ = ("pool", "array", "refs", "ts")
+
+    def __init__(self, pool, array, ts=None):
+        self.pool = pool
+        self.array = array
+        self.refs = 0
+        self.ts = ts    # Timestamp del frame cargado (s; None = sin reloj de frames)
+
+    def retain(self):
+        if self.pool is not None:
+            self.pool._retain(self)
+        return self
+
+    def release(self):
+        if self.pool is not None:
+            self.pool._release(self)
+
+
+class FramePool:
+    """
+    Anillo de tamaño fijo de frames preasignados (sin asignaciones por frame en el bucle).
+
+    Los slots libres se reutilizan en orden LIFO para que el conjunto de memoria
+    realmente tocada se limite a los slots en uso. Si el pool se agota se entrega
+    un slot temporal fuera del pool (contado en 'misses') en lugar de bloquear.
+    """
+
+    def __init__(self, size, shape, dtype=np.uint8):
+        self.size = size
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        self._slots = [FrameSlot(self, np.empty(self.shape, dtype=dtype)) for _ in range(size)]
+        self._free = list(self._slots)
+        self.misses = 0
+
+    def acquire(self):
+        """Entrega un slot libre con una referencia (la del llamador)."""
+        with self._lock:
+            if self._free:
+                slot = self._free.pop()
+                slot.refs = 1
+                return slot
+            self.misses += 1
+        slot = FrameSlot(None, np.empty(self.shape, dtype=self.dtype))
+        slot.refs = 1
+        return slot
+
+    def _retain(self, slot):
+        with self._lock:
+            slot.refs += 1
+
+    def _release(self, slot):
+        with self._lock:
+            slot.refs -= 1
+            if slot.refs == 0:
+                self._free.append(slot)
+            elif slot.refs < 0:
+                raise RuntimeError("FrameSlot liberado más veces de las retenidas.")
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "in_use": self.size - len(self._free), "misses": self.misses}
@@ -0,0 +1,95 @@
+# risk_detection/utils/overload_controller.py
+import sys
+import time
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)s | %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+# Pasos de recorte, en el orden en que se aplican (y al revés se restauran)
+SHED_VISUALIZATION = "visualization"        # Sin anotaciones ni ventana
+SHED_WRITE_OUTPUT = "write_output"          # Sin video de salida (WRITE_OUTPUT)
+SHED_POSE_RATE = "pose_rate"                # Pose uno de cada dos keyframes salvo escenas de prioridad alta
+SHED_LOW_PRIORITY = "low_priority_scenes"   # Escenas de prioridad baja uno de cada dos frames
+SHED_STEPS = (SHED_VISUALIZATION, SHED_WRITE_OUTPUT, SHED_POSE_RATE, SHED_LOW_PRIORITY)
+
+LATENCY_EMA = 0.2   # Peso de la última latencia en el promedio móvil
+
+
+class OverloadController:
+    """
+    Control de sobrecarga (OVERLOAD_CONTROL_ENABLED). Compara la latencia por frame (lectura
+    excluida) con el presupuesto: tras OVERLOAD_SHED_AFTER frames seguidos por encima de
+    OVERLOAD_SHED_RATIO × presupuesto recorta el siguiente paso de SHED_STEPS, y tras
+    OVERLOAD_RESTORE_AFTER frames seguidos por debajo de OVERLOAD_RESTORE_RATIO × presupuesto
+    restaura el último. Los pasos que no aplican (p. ej. sin VISUALIZE) se omiten.
+    """
+
+    def __init__(self, cfg, source_fps):
+        self.enabled = cfg.OVERLOAD_CONTROL_ENABLED
+        self.budget = cfg.OVERLOAD_BUDGET_MS / 1000.0 if cfg.OVERLOAD_BUDGET_MS > 0 else 1.0 / source_fps
+        self.shed_ratio = cfg.OVERLOAD_SHED_RATIO
+        self.restore_ratio = cfg.OVERLOAD_RESTORE_RATIO
+        self.shed_after = cfg.OVERLOAD_SHED_AFTER
+        self.restore_after = cfg.OVERLOAD_RESTORE_AFTER
+        skip = {SHED_VISUALIZATION: not cfg.VISUALIZE, SHED_WRITE_OUTPUT: not cfg.WRITE_OUTPUT}
+        self.steps = [step for step in SHED_STEPS if not skip.get(step, False)]
+        self.level = 0
+        self.latency = None
+        self.frames_over = 0
+        self.frames_under = 0
+        self.shed_count = {step: 0 for step in self.steps}
+        self.shed_seconds = {step: 0.0 for step in self.steps}
+        self._shed_since = {}
+
+    @property
+    def active(self):
+        """Pasos recortados en este momento."""
+        return frozenset(self.steps[:self.level])
+
+    def shedding(self, step):
+        return step in self.steps[:self.level]
+
+    def observe(self, latency_sec):
+        """Latencia del frame recién procesado; recorta o restaura un paso si corresponde."""
+        if not self.enabled:
+            return
+        self.latency = latency_sec if self.latency is None else (1 - LATENCY_EMA) * self.latency + LATENCY_EMA * latency_sec
+        ratio = self.latency / self.budget
+        self.frames_over = self.frames_over + 1 if ratio > self.shed_ratio else 0
+        self.frames_under = self.frames_under + 1 if ratio < self.restore_ratio else 0
+        if self.frames_over >= self.shed_after and self.level < len(self.steps):
+            self._shed(ratio)
+        elif self.frames_under >= self.restore_after and self.level > 0:
+            self._restore(ratio)
+
+    def _shed(self, ratio):
+        step = self.steps[self.level]
+        self.level += 1
+        self.frames_over = 0
+        self.shed_count[step] += 1
+        self._shed_since[step] = time.monotonic()
+        logger.warning(f"🔥 [Sobrecarga] Latencia {1000 * self.latency:.1f}ms ({ratio:.0%} del presupuesto): se recorta '{step}' (nivel {self.level}/{len(self.steps)})")
+
+    def _restore(self, ratio):
+        self.level -= 1
+        step = self.steps[self.level]
+        self.frames_under = 0
+        self.shed_seconds[step] += time.monotonic() - self._shed_since.pop(step)
+        logger.info(f"🟢 [Sobrecarga] Latencia {1000 * self.latency:.1f}ms ({ratio:.0%} del presupuesto): se restaura '{step}' (nivel {self.level}/{len(self.steps)})")
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "level": self.level,
+            "active": list(self.steps[:self.level]),
+            "budget_ms": round(1000 * self.budget, 2),
+            "latency_ms": round(1000 * self.latency, 2) if self.latency is not None else None,
+            "shed_count": dict(self.shed_count),
+            "shed_seconds": {step: round(sec + (now - self._shed_since[step] if step in self._shed_since else 0.0), 1)
+                             for step, sec in self.shed_seconds.items()},
+        }
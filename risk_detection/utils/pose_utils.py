@@ -1,10 +1,31 @@
 # risk_detection/utils/pose_utils.py
 import numpy as np
 
+def keypoints_array(res_pose):
+    """Keypoints (x, y, conf) como numpy [N,K,3], ya sea de un Results de ultralytics o de un PoseResult."""
+    if not res_pose or getattr(res_pose[0], "keypoints", None) is None:
+        return np.zeros((0, 17, 3), dtype=np.float32)
+    data = res_pose[0].keypoints.data
+    data = data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)
+    if data.ndim == 3 and data.shape[-1] == 2:  # Modelos sin confianza por keypoint
+        data = np.concatenate([data, np.ones(data.shape[:2] + (1,), dtype=data.dtype)], axis=-1)
+    return data
+
 def iter_keypoints(res_pose):
-    if not res_pose or not hasattr(res_pose[0], "keypoints") or res_pose[0].keypoints is None:
-        return []
-    return res_pose[0].keypoints.xy.cpu().numpy()  # [N,17,2]
+    """Keypoints (x, y) como numpy [N,17,2], ya sea de un Results de ultralytics o de un PoseResult."""
+    return keypoints_array(res_pose)[..., :2]
+
+def virtual_fingertips(keypoints, arms_idxs, extension):
+    """
+    Punta de los dedos estimada de cada brazo (codo, muñeca) de 'arms_idxs' para todas las personas
+    de 'keypoints' [N,K,2]: muñeca + antebrazo × 'extension'. Devuelve [N·brazos, 2], persona a persona.
+    Con antebrazo de menos de 1 px la punta queda en la muñeca.
+    """
+    elbows = keypoints[:, [e for e, _ in arms_idxs]].reshape(-1, 2).astype(np.float64)
+    wrists = keypoints[:, [w for _, w in arms_idxs]].reshape(-1, 2).astype(np.float64)
+    vec_forearm = wrists - elbows
+    arm_length = np.linalg.norm(vec_forearm, axis=1, keepdims=True)
+    return np.where(arm_length < 1, wrists, wrists + vec_forearm * extension)
 
 def iter_feet(res_pose, feet_idxs=(15,16)):
     kps = iter_keypoints(res_pose)
@@ -13,8 +13,8 @@ def draw_line(frame, p1, p2, active=False):
 def put_text(frame, text, org=(20, 40), color=(255,255,255), scale=0.8, thick=2):
     cv2.putText(frame, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thick)
 
-def draw_hud(frame, fps=None, lines=[], detections={}):
-    y = 450
+def draw_hud(frame, fps=None, lines=[], keypoints=()):
+    y = int(frame.shape[0] * 0.69)  # 450 px a 648 de alto
     if fps is not None:
         put_text(frame, f"FPS: {fps:.1f}", (20, y), (0,255,0), 0.9, 2); y += 30
     for s in lines:
@@ -42,10 +42,8 @@ def draw_hud(frame, fps=None, lines=[], detections={}):
     COLOR_FOOT = (255, 0, 255)  # Magenta
     COLOR_SKELETON = (200, 100, 0) # Azulado para el esqueleto
 
-    # Verificación de detección
-    if hasattr(detections["pose"][0], "keypoints") and detections["pose"][0].keypoints is not None:
-        # Obtener coordenadas (x, y)
-        keypoints = detections["pose"][0].keypoints.xy.cpu().numpy()
+    # Coordenadas (x, y) [N,17,2] del FrameContext (vacío si no hay personas detectadas)
+    if len(keypoints):
         
         # Iterar sobre cada persona detectada
         for kp_set in keypoints:
@@ -0,0 +1,62 @@
+# risk_detection/utils/zone_index.py
+import cv2
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+OUTSIDE, INSIDE, EDGE = 0, 1, 2
+EDGE_BAND_PX = 3    # Píxeles a cada lado del borde que se resuelven con la geometría exacta
+
+
+class ZoneIndex:
+    """
+    Índice de las zonas de riesgo estáticas (polígonos en píxeles de la resolución de trabajo),
+    armado una sola vez. Por zona guarda el polígono shapely preparado y una máscara raster
+    (fuera / dentro / franja de borde). query() responde para todo un arreglo de puntos a la vez
+    qué puntos están dentro o tocan cada zona: los que caen lejos del borde se resuelven con una
+    sola lectura de las máscaras y solo los de la franja de borde con shapely (intersects_xy,
+    equivalente a within() or touches()).
+    """
+
+    def __init__(self, zones, frame_size):
+        self.names = list(zones)
+        self.slot = {name: i for i, name in enumerate(self.names)}
+        self.frame_size = tuple(frame_size)
+        width, height = self.frame_size
+        self.polygons = [Polygon(zones[name]) for name in self.names]
+        shapely.prepare(self.polygons)
+        self.raster = np.zeros((len(self.names), height, width), dtype=np.uint8)
+        for i, name in enumerate(self.names):
+            pts = [np.round(zones[name]).astype(np.int32).reshape(-1, 1, 2)]
+            cv2.fillPoly(self.raster[i], pts, INSIDE)
+            cv2.polylines(self.raster[i], pts, True, EDGE, thickness=2 * EDGE_BAND_PX + 1)
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Índice de los polígonos POLIGONO_* (Config.ZONE_KEYS) a la resolución de trabajo."""
+        return cls({key: getattr(cfg, key) for key in cfg.ZONE_KEYS}, cfg.RESIZE)
+
+    def query(self, points):
+        """
+        'points': arreglo [..., 2] de (x, y). Devuelve bool [..., Z] (Z = zonas en el orden de
+        'names'): True si el punto está dentro o sobre el borde de la zona.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        shape = points.shape[:-1] + (len(self.names),)
+        pts = points.reshape(-1, 2)
+        if not len(pts) or not self.names:
+            return np.zeros(shape, dtype=bool)
+
+        width, height = self.frame_size
+        xi = np.floor(pts[:, 0]).astype(np.int64)
+        yi = np.floor(pts[:, 1]).astype(np.int64)
+        in_frame = (xi >= 0) & (xi < width) & (yi >= 0) & (yi < height)
+        cells = np.full((len(pts), len(self.names)), EDGE, dtype=np.uint8)  # Fuera del frame: geometría exacta
+        cells[in_frame] = self.raster[:, yi[in_frame], xi[in_frame]].T
+
+        hits = cells == INSIDE
+        rows, zones = np.nonzero(cells == EDGE)
+        for z in np.unique(zones):
+            r = rows[zones == z]
+            hits[r, z] = shapely.intersects_xy(self.polygons[z], pts[r, 0], pts[r, 1])
+        return hits.reshape(shape)
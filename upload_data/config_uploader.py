@@ -17,6 +17,8 @@ class ConfigUploader:
     # --- Configuración de Rutas Locales ---
     LOG_DIR = os.environ.get("LOG_DIR", "logs")
     CLIPS_DIR = os.environ.get("CLIPS_DIR", "risk_clips") # Carpeta de salida (mapeada por Docker)
+    # Almacén de resultados compartido por los nodos de detección (modo clúster); si no, LOG_DIR/registros_riesgos.db
+    RESULT_STORE_PATH = os.environ.get("RESULT_STORE_PATH")
     METADATA_FILE_PATH = os.environ.get("METADATA_FILE_PATH", "/app/config_data/risk_metadata.json")
 
     # --- Scheduler ---
@@ -15,9 +15,9 @@ logger = logging.getLogger()
 cfg = ConfigUploader()
 
 def find_db():
-    """Encuentra el archivo .db."""
+    """Encuentra el archivo .db (el almacén consolidado de todos los nodos si RESULT_STORE_PATH está definido)."""
     db_name = f"registros_riesgos.db"
-    db_path = os.path.join(cfg.LOG_DIR, db_name)
+    db_path = cfg.RESULT_STORE_PATH or os.path.join(cfg.LOG_DIR, db_name)
     
     if not os.path.exists(db_path):
         logger.warning(f"No se encontró el archivo de log: {db_path}")
@@ -40,10 +40,15 @@ def process_risk_events(db_path):
             return pd.DataFrame() # Devolver DataFrame vacío
 
         df['timestamp'] = pd.to_datetime(df['timestamp'])
+        # En modo multi-cámara los incidentes se agrupan también por cámara
+        group_cols = ['scene_name']
+        if 'camera_id' in df.columns:
+            df['camera_id'] = df['camera_id'].fillna('')
+            group_cols = ['camera_id', 'scene_name']
         # Ordenar por escena y luego por tiempo
-        df = df.sort_values(by=['scene_name', 'timestamp'])
+        df = df.sort_values(by=group_cols + ['timestamp'])
         # Encontrar los "saltos" de tiempo
-        time_diff = df.groupby('scene_name')['timestamp'].diff()
+        time_diff = df.groupby(group_cols)['timestamp'].diff()
         
         # Identificar el inicio de un nuevo incidente
         is_new_incident = (time_diff.isna()) | (time_diff > pd.Timedelta(seconds=cfg.GAP_THRESHOLD_SECONDS))
@@ -55,7 +60,7 @@ def process_risk_events(db_path):
             return unique_files if unique_files else [] # Devolver lista vacía en lugar de None
 
         # Agrupar por escena y ID de incidente, y agregar
-        summary_df = df.groupby(['scene_name', incident_grouper.rename('incident_id')]).agg(
+        summary_df = df.groupby(group_cols + [incident_grouper.rename('incident_id')]).agg(
             t_start=('timestamp', 'min'),
             t_end=('timestamp', 'max'),
             # Si se requiere, crear una lista de archivos de video para este incidente
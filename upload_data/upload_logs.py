@@ -46,6 +46,10 @@ def main():
 
     summary_df = db_processor.process_risk_events(db_file_path)
     if summary_df.empty:
+        if cfg.RESULT_STORE_PATH:
+            # El almacén compartido sigue abierto por los nodos de detección: no se borra
+            logger.info("No hay datos para subir. Terminando.")
+            sys.exit(0)
         logger.info("No hay datos para subir. Borrando BBDD y terminando.")
         try:
             os.remove(db_file_path)